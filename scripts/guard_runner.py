@@ -1,7 +1,9 @@
 import json
 import os
+import signal
 import subprocess
 import sys
+import time
 import argparse
 import logging
 from logging.handlers import RotatingFileHandler
@@ -16,6 +18,20 @@ PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
 STATE_FILE = os.path.join(PROJECT_ROOT, "wallpaper_state.json")
 LOG_FILE = os.path.join(PROJECT_ROOT, "wallpaper_activity.log")
 WALLPAPER_MODULE = "life_wallpaper.main"
+OUTPUT_FILE = os.path.join(PROJECT_ROOT, "life_wallpaper.png")
+# Copy of the last successful render, re-applied when a render fails
+LAST_GOOD_FILE = os.path.join(PROJECT_ROOT, "life_wallpaper.last_good.png")
+# Forces the renderer's low-power profile for the degraded fallback render
+LOW_POWER_ENV = "LIFE_WALLPAPER_LOW_POWER"
+# Tells the render when it will be killed, so it stops waiting for the
+# render lock of another update in time (see life_wallpaper.main.lock_wait)
+DEADLINE_ENV = "LIFE_WALLPAPER_DEADLINE"
+
+# Watchdog defaults; the worst case (3 x 60s renders, 5s + 10s backoff, one
+# fallback render) stays inside the scheduled task's 5 minute limit
+RENDER_TIMEOUT = 60
+MAX_RETRIES = 2
+RETRY_BACKOFF = 5
 
 
 def setup_logging():
@@ -55,6 +71,24 @@ def parse_arguments():
         action="store_true",
         help="Force execution even if already run today",
     )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=RENDER_TIMEOUT,
+        help="Seconds a render may take before its process tree is killed",
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=MAX_RETRIES,
+        help="Extra attempts after a failed or timed-out render",
+    )
+    parser.add_argument(
+        "--backoff",
+        type=float,
+        default=RETRY_BACKOFF,
+        help="Seconds before the first retry; doubles with every retry",
+    )
     return parser.parse_args()
 
 
@@ -98,6 +132,136 @@ def save_state(logger, new_state):
                 pass
 
 
+def kill_tree(proc):
+    """Kills a process together with everything it spawned."""
+    try:
+        if sys.platform == "win32":
+            subprocess.run(
+                ["taskkill", "/T", "/F", "/PID", str(proc.pid)],
+                capture_output=True,
+            )
+        else:
+            # The child leads its own session, see run_with_deadline
+            os.killpg(proc.pid, signal.SIGKILL)
+    except (OSError, subprocess.SubprocessError):
+        pass
+    try:
+        proc.kill()
+    except OSError:
+        pass
+
+
+def run_with_deadline(cmd, timeout, env=None):
+    """
+    Runs `cmd` in its own process group and kills the whole tree once
+    `timeout` seconds pass; the child learns the deadline from DEADLINE_ENV.
+    Returns (exit code or None on timeout, stdout, stderr).
+    """
+    env = dict(env or os.environ, **{DEADLINE_ENV: str(time.time() + timeout)})
+    if sys.platform == "win32":
+        options = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+    else:
+        options = {"start_new_session": True}
+    proc = subprocess.Popen(
+        cmd,
+        cwd=PROJECT_ROOT,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        env=env,
+        **options,
+    )
+    try:
+        stdout, stderr = proc.communicate(timeout=timeout)
+        return proc.returncode, stdout, stderr
+    except subprocess.TimeoutExpired:
+        kill_tree(proc)
+        try:
+            stdout, stderr = proc.communicate(timeout=5)
+        except subprocess.TimeoutExpired:
+            # A grandchild still holds the pipes open
+            stdout, stderr = "", ""
+        return None, stdout, stderr
+
+
+def log_output(logger, stdout, stderr):
+    if stdout:
+        logger.info(f"OUTPUT:\n{stdout.strip()}")
+    if stderr:
+        logger.error(f"ERROR:\n{stderr.strip()}")
+
+
+def render_with_retries(logger, cmd, args):
+    """Runs the render until it succeeds; returns (success, attempts, error)."""
+    error = None
+    for attempt in range(args.retries + 1):
+        if attempt:
+            delay = args.backoff * 2 ** (attempt - 1)
+            logger.info(f"Retrying in {delay:g}s (attempt {attempt + 1}).")
+            time.sleep(delay)
+
+        code, stdout, stderr = run_with_deadline(cmd, args.timeout)
+        log_output(logger, stdout, stderr)
+        if code == 0:
+            return True, attempt + 1, None
+        if code is None:
+            error = f"timed out after {args.timeout:g}s"
+        else:
+            error = f"exited with code {code}"
+        logger.error(f"Render attempt {attempt + 1} {error}.")
+    return False, args.retries + 1, error
+
+
+def apply_wallpaper(logger, path):
+    """Sets an existing image as the wallpaper (Windows only)."""
+    if sys.platform != "win32":
+        logger.info(f"Wallpaper left at: {path}")
+        return True
+    import ctypes
+
+    if not ctypes.windll.user32.SystemParametersInfoW(20, 0, path, 3):
+        logger.error(f"Could not apply {path} as wallpaper.")
+        return False
+    return True
+
+
+def restore_last_good(logger):
+    """Copies the last good wallpaper back over the output and applies it."""
+    try:
+        tmp = f"{OUTPUT_FILE}.{os.getpid()}.tmp"
+        shutil.copyfile(LAST_GOOD_FILE, tmp)
+        os.replace(tmp, OUTPUT_FILE)
+    except OSError as e:
+        logger.error(f"Could not restore the last good wallpaper: {e}")
+        return False
+    return apply_wallpaper(logger, OUTPUT_FILE)
+
+
+def fall_back(logger, cmd, args):
+    """
+    Keeps the desktop current after the renders failed: restores the last
+    good wallpaper, or else tries one low-power render. Returns the outcome.
+
+    What low power saves depends on the theme: og drops to its cheapest
+    plan (no grain, half resolution, ...), the dashboard draws in standard
+    quality on a palette canvas and weeks only uses the fast encoder. None
+    of them helps a render that hangs rather than runs slowly, which is why
+    the last good wallpaper comes first.
+    """
+    if os.path.exists(LAST_GOOD_FILE):
+        logger.warning("Falling back to the last good wallpaper.")
+        if restore_last_good(logger):
+            return "fallback_cached"
+
+    logger.warning("Falling back to a low-power render.")
+    env = dict(os.environ, **{LOW_POWER_ENV: "1"})
+    code, stdout, stderr = run_with_deadline(cmd, args.timeout, env=env)
+    log_output(logger, stdout, stderr)
+    if code == 0:
+        return "fallback_degraded"
+    return "failed"
+
+
 def main():
     logger = setup_logging()
     args = parse_arguments()
@@ -122,33 +286,46 @@ def main():
         # Use the same python interpreter
         python_exe = sys.executable
 
-        # Run the module
-        result = subprocess.run(
-            [python_exe, "-m", WALLPAPER_MODULE],
-            cwd=PROJECT_ROOT,
-            capture_output=True,
-            text=True,
-        )
+        # Run the module under the watchdog
+        cmd = [python_exe, "-m", WALLPAPER_MODULE]
+        success, attempts, error = render_with_retries(logger, cmd, args)
+        if success:
+            outcome = "success"
+            try:
+                # Copy then rename, so a concurrent fallback never reads half
+                tmp = f"{LAST_GOOD_FILE}.{os.getpid()}.tmp"
+                shutil.copyfile(OUTPUT_FILE, tmp)
+                os.replace(tmp, LAST_GOOD_FILE)
+            except OSError as e:
+                logger.warning(f"Could not keep a copy of the wallpaper: {e}")
+        else:
+            outcome = fall_back(logger, cmd, args)
 
-        # 3. Log Output
-        if result.stdout:
-            logger.info(f"OUTPUT:\n{result.stdout.strip()}")
-        if result.stderr:
-            logger.error(f"ERROR:\n{result.stderr.strip()}")
+        # 3. Update State
+        now = datetime.now()
+        new_state = dict(state)
+        new_state.update(
+            {
+                "LastOutcome": outcome,
+                "LastAttemptTime": now.strftime("%Y-%m-%d %H:%M:%S"),
+                "LastAttempts": attempts,
+                "LastError": error,
+            }
+        )
+        # A re-applied old wallpaper does not count: the next trigger retries
+        if outcome in ("success", "fallback_degraded"):
+            new_state["LastRunDate"] = today
+            new_state["LastRunTime"] = now.strftime("%H:%M:%S")
+        save_state(logger, new_state)
 
-        if result.returncode == 0:
+        if outcome == "success":
             logger.info("SUCCESS: Wallpaper updated.")
-
-            # 4. Update State
-            new_state = {
-                "LastRunDate": today,
-                "LastRunTime": datetime.now().strftime("%H:%M:%S"),
-            }
-            save_state(logger, new_state)
             return 0
-        else:
-            logger.error(f"FAILURE: Script exited with code {result.returncode}")
-            return result.returncode
+        if outcome == "failed":
+            logger.error(f"FAILURE: Render {error}; no fallback available.")
+            return 1
+        logger.warning(f"DEGRADED: Render {error}; outcome {outcome}.")
+        return 0
 
     except Exception as e:
         logger.exception(f"CRITICAL UNHANDLED ERROR: {e}")
@@ -0,0 +1,128 @@
+from PIL import Image, ImageDraw
+
+QUALITY_STANDARD = "standard"
+QUALITY_HIGH = "high"
+
+# Linear supersampling factor for curved primitives in "high" quality
+SUPERSAMPLE = 4
+# Finished tiles remembered for repeated shapes (grid dots, glows)
+TILE_MEMO_SIZE = 256
+
+
+def _flatten(xy):
+    """Normalizes ImageDraw coordinates into a flat [x0, y0, x1, y1, ...] list."""
+    flat = []
+    for item in xy:
+        if isinstance(item, (tuple, list)):
+            flat.extend(item)
+        else:
+            flat.append(item)
+    return flat
+
+
+class SupersampledDraw:
+    """
+    Drop-in ImageDraw wrapper that anti-aliases curved primitives.
+
+    Ellipses, arcs, polygons and lines are drawn onto an upscaled copy of just
+    their own bounding box, which is then box-filtered back into the canvas.
+    Everything else is forwarded to a regular ImageDraw, so the cost grows
+    with the area of the curved shapes rather than the whole frame. A shape
+    repeated at the same sub-pixel offset over the same background (a grid of
+    dots) is supersampled once and then pasted.
+    """
+
+    def __init__(self, img, mode=None, factor=SUPERSAMPLE):
+        self.img = img
+        self.mode = mode
+        self.factor = factor
+        self._draw = ImageDraw.Draw(img, mode)
+        self._memo = {}
+
+    def __getattr__(self, name):
+        return getattr(self._draw, name)
+
+    def _supersample(self, coords, pad, paint, key):
+        f = self.factor
+        xs, ys = coords[0::2], coords[1::2]
+        x0 = max(int(min(xs) - pad) - 1, 0)
+        y0 = max(int(min(ys) - pad) - 1, 0)
+        x1 = min(int(max(xs) + pad) + 2, self.img.width)
+        y1 = min(int(max(ys) + pad) + 2, self.img.height)
+        if x0 >= x1 or y0 >= y1:
+            return
+
+        box = (x0, y0, x1, y1)
+        under = self.img.crop(box)
+        rel = tuple(v - o for v, o in zip(coords, (x0, y0) * (len(coords) // 2)))
+        memo_key = (key, rel, under.tobytes())
+        done = self._memo.get(memo_key)
+        if done is None:
+            w, h = x1 - x0, y1 - y0
+            tile = under.resize((w * f, h * f), Image.NEAREST)
+
+            def to_tile(x, y):
+                # Map a pixel center on the canvas to the matching sub-pixel center
+                return ((x - x0) * f + (f - 1) / 2, (y - y0) * f + (f - 1) / 2)
+
+            paint(ImageDraw.Draw(tile, self.mode), to_tile)
+            done = tile.reduce(f)
+            if len(self._memo) >= TILE_MEMO_SIZE:
+                self._memo.clear()
+            self._memo[memo_key] = done
+        self.img.paste(done, box)
+
+    def _bbox_on_tile(self, xy, to_tile):
+        x0, y0, x1, y1 = _flatten(xy)
+        half = (self.factor - 1) / 2
+        (tx0, ty0), (tx1, ty1) = to_tile(x0, y0), to_tile(x1, y1)
+        return [tx0 - half, ty0 - half, tx1 + half, ty1 + half]
+
+    def ellipse(self, xy, fill=None, outline=None, width=1):
+        f = self.factor
+        self._supersample(
+            _flatten(xy),
+            width,
+            lambda d, t: d.ellipse(
+                self._bbox_on_tile(xy, t), fill=fill, outline=outline, width=width * f
+            ),
+            ("ellipse", fill, outline, width),
+        )
+
+    def arc(self, xy, start, end, fill=None, width=1):
+        f = self.factor
+        self._supersample(
+            _flatten(xy),
+            width,
+            lambda d, t: d.arc(
+                self._bbox_on_tile(xy, t), start, end, fill=fill, width=width * f
+            ),
+            ("arc", start, end, fill, width),
+        )
+
+    def polygon(self, xy, fill=None, outline=None, width=1):
+        coords = _flatten(xy)
+        f = self.factor
+
+        def paint(d, t):
+            points = [t(x, y) for x, y in zip(coords[0::2], coords[1::2])]
+            d.polygon(points, fill=fill, outline=outline, width=width * f)
+
+        self._supersample(coords, width, paint, ("polygon", fill, outline, width))
+
+    def line(self, xy, fill=None, width=0, joint=None):
+        coords = _flatten(xy)
+        f = self.factor
+
+        def paint(d, t):
+            points = [t(x, y) for x, y in zip(coords[0::2], coords[1::2])]
+            d.line(points, fill=fill, width=max(width, 1) * f, joint=joint)
+
+        self._supersample(coords, width, paint, ("line", fill, width, joint))
+
+
+def new_draw(img, mode=None, quality=QUALITY_STANDARD):
+    """Returns the drawing context matching the configured render quality."""
+    if quality == QUALITY_HIGH:
+        return SupersampledDraw(img, mode)
+    return ImageDraw.Draw(img, mode)
@@ -0,0 +1,176 @@
+import asyncio
+import io
+from datetime import date, datetime
+from typing import TYPE_CHECKING, Callable, Optional, Tuple
+
+from . import buffers
+from .budget import Plan
+from .corpus import choose_text
+from .renderer import HEIGHT, SCALE, WIDTH
+from .themes import DEFAULT_THEME, THEMES
+
+if TYPE_CHECKING:
+    from .config import AppConfig
+
+
+# Formats that can store indexed ("P") images as they are
+PALETTE_FORMATS = {"PNG", "GIF", "BMP", "TIFF", "WEBP"}
+# Linear scale of the progressive preview: 960x540 for a 4K wallpaper
+PREVIEW_SCALE = 0.25
+PREVIEW = "preview"
+FINAL = "final"
+
+
+def encode_image(img, format: str = "PNG", threads: int = 0, **params) -> bytes:
+    """
+    Encodes an image into bytes using the given Pillow format. PNGs go
+    through the parallel writer in png.py when `threads` > 1.
+    """
+    from . import png
+
+    if img.mode == "P" and format.upper() not in PALETTE_FORMATS:
+        img = img.convert("RGB")
+    buf = io.BytesIO()
+    if threads > 1 and format.upper() == "PNG" and img.mode in png.MODES:
+        level = params.get("compress_level", png.DEFAULT_LEVEL)
+        png.save_png(img, buf, compress_level=level, threads=threads)
+    else:
+        img.save(buf, format=format, **params)
+    return buf.getvalue()
+
+
+def pin_collections(config: "AppConfig", day: Optional[date] = None) -> "AppConfig":
+    """
+    Copy of `config` with one mantra and one footer quote drawn at random
+    (from the corpus files when set), so that several renders of it show the
+    same text.
+    """
+    config = config.model_copy(deep=True)
+    collections = config.collections
+    for name in ("mantras", "footer_quotes"):
+        text = choose_text(collections, name, day)
+        setattr(collections, name, [text] if text is not None else [])
+        setattr(collections, f"{name}_file", None)
+    return config
+
+
+def _render(config, on, size, theme, plan=None):
+    theme = theme or config.theme
+    renderer_cls = THEMES.get(theme, THEMES[DEFAULT_THEME])
+    now = on if isinstance(on, datetime) else None
+    today = on.date() if now else on
+    options = {"plan": plan} if plan is not None and theme == "og" else {}
+    renderer = renderer_cls(
+        config, today=today or date.today(), size=size, now=now, **options
+    )
+    return renderer.render_image()
+
+
+def render_image(
+    config: "AppConfig",
+    on: Optional[date] = None,
+    size: Optional[Tuple[int, int]] = None,
+    theme: Optional[str] = None,
+    format: Optional[str] = None,
+    **params,
+):
+    """
+    Renders a wallpaper entirely in memory.
+
+    `on` pins the date being visualized (defaults to today; a datetime also
+    pins the time shown by the intraday ring), `size` sets the
+    output resolution and `theme` overrides `config.theme`. Returns a PIL
+    image, or the encoded bytes when a `format` such as "PNG" is given; extra
+    keyword arguments go to the encoder. Nothing is written to disk.
+    """
+    img = _render(config, on, size, theme)
+    if format is None:
+        return img
+    data = encode_image(img, format, **params)
+    # The frame never leaves this function, so its buffer can be reused
+    buffers.release(img)
+    return data
+
+
+def iter_progressive(
+    config: "AppConfig",
+    on: Optional[date] = None,
+    size: Optional[Tuple[int, int]] = None,
+    theme: Optional[str] = None,
+    format: Optional[str] = None,
+    preview_scale: float = PREVIEW_SCALE,
+    **params,
+):
+    """
+    Renders like render_image() in two passes and yields (stage, result) for
+    each: first PREVIEW, the same layout at `preview_scale` of the size in
+    standard quality without vignette or grain (tens of milliseconds), then
+    FINAL, the full-quality frame. Both show the same mantra and quote.
+
+    A PREVIEW image is smaller than the final one; front ends scale it up
+    themselves. With a `format`, the preview is encoded for speed and the
+    final frame with `params`.
+    """
+    day = on.date() if isinstance(on, datetime) else on
+    config = pin_collections(config, day)
+    width, height = size or (WIDTH * SCALE, HEIGHT * SCALE)
+    small = (
+        max(1, round(width * preview_scale)),
+        max(1, round(height * preview_scale)),
+    )
+    fast = config.model_copy(deep=True)
+    fast.render.quality = "standard"
+    img = _render(fast, on, small, theme, plan=Plan(skip_post=True))
+    if format is None:
+        yield PREVIEW, img
+    else:
+        fast_params = {"compress_level": 1} if format.upper() == "PNG" else params
+        data = encode_image(img, format, **fast_params)
+        buffers.release(img)
+        yield PREVIEW, data
+
+    yield FINAL, render_image(
+        config, on=on, size=(width, height), theme=theme, format=format, **params
+    )
+
+
+def render_progressive(
+    config: "AppConfig",
+    on_result: Callable[[str, object], None],
+    on: Optional[date] = None,
+    size: Optional[Tuple[int, int]] = None,
+    theme: Optional[str] = None,
+    format: Optional[str] = None,
+    **params,
+):
+    """
+    Calls `on_result(stage, result)` with the preview and then the final
+    frame (see iter_progressive) and returns the final result.
+    """
+    for stage, result in iter_progressive(
+        config, on=on, size=size, theme=theme, format=format, **params
+    ):
+        on_result(stage, result)
+    return result
+
+
+async def aiter_progressive(
+    config: "AppConfig",
+    on: Optional[date] = None,
+    size: Optional[Tuple[int, int]] = None,
+    theme: Optional[str] = None,
+    format: Optional[str] = None,
+    **params,
+):
+    """
+    Async iterator over iter_progressive(). Each pass runs in a worker thread,
+    so the event loop keeps serving while the full frame renders.
+    """
+    stages = iter_progressive(
+        config, on=on, size=size, theme=theme, format=format, **params
+    )
+    while True:
+        item = await asyncio.to_thread(next, stages, None)
+        if item is None:
+            return
+        yield item
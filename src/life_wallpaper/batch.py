@@ -0,0 +1,422 @@
+"""Render wallpapers for every profile in a JSON Lines or CSV export."""
+
+import csv
+import hashlib
+import json
+import os
+import re
+import functools
+import threading
+from array import array
+from datetime import date
+
+from . import buffers
+from .utils import parse_size, positive_int
+
+FORMATS = {".jsonl": "jsonl", ".ndjson": "jsonl", ".csv": "csv"}
+# CSV cells of these fields hold several values separated by LIST_SEPARATOR
+LIST_FIELDS = {"collections.mantras", "collections.footer_quotes"}
+LIST_SEPARATOR = "|"
+ID_FIELD = "id"
+
+
+class RecordError(ValueError):
+    """A record that cannot be read, before validation even starts."""
+
+
+def _unflatten(row):
+    """{'profile.name': 'Ada', ...} -> {'profile': {'name': 'Ada'}, ...}"""
+    data = {}
+    for key, value in row.items():
+        if key is None:
+            raise RecordError("More cells than header columns")
+        if key in LIST_FIELDS:
+            value = [part.strip() for part in (value or "").split(LIST_SEPARATOR)]
+            value = [part for part in value if part]
+        elif value is None or value == "":
+            continue  # Missing cells fall back to the defaults
+        *parents, leaf = key.strip().split(".")
+        node = data
+        for part in parents:
+            node = node.setdefault(part, {})
+        node[leaf] = value
+    return data
+
+
+def read_records(path, format=None):
+    """
+    Yields (line number, record dict or RecordError) lazily, one at a time.
+
+    JSON Lines files hold one config object per line. CSV columns are dotted
+    config paths such as `profile.name`, `profile.dob` or `render.quality`,
+    with list fields split on "|". Either may carry an `id` used to name the
+    output file.
+    """
+    format = format or FORMATS.get(os.path.splitext(path)[1].lower())
+    if format not in ("jsonl", "csv"):
+        raise ValueError(f"Unknown input format for {path}; use .jsonl or .csv")
+
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        if format == "jsonl":
+            for number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    yield number, RecordError(f"Invalid JSON: {e}")
+                    continue
+                if not isinstance(record, dict):
+                    record = RecordError("Expected a JSON object")
+                yield number, record
+        else:
+            reader = csv.DictReader(f)
+            for row in reader:
+                try:
+                    yield reader.line_num, _unflatten(row)
+                except RecordError as e:
+                    yield reader.line_num, e
+
+
+class _NameSet:
+    """
+    Output names mapped to the line of their record, stored as 64-bit hashes
+    in an open-addressing table of two arrays: 32 bytes per name or less,
+    where a dict of the names takes over 100.
+    """
+
+    def __init__(self, capacity=1024):
+        self._hashes = array("Q", bytes(8 * capacity))  # 0 = free slot
+        self._lines = array("Q", bytes(8 * capacity))
+        self._count = 0
+
+    @staticmethod
+    def _hash(name):
+        digest = hashlib.blake2b(name.encode("utf-8"), digest_size=8).digest()
+        return int.from_bytes(digest, "little") | 1
+
+    def _slot(self, h):
+        mask = len(self._hashes) - 1
+        i = h & mask
+        while self._hashes[i] not in (0, h):
+            i = (i + 1) & mask
+        return i
+
+    def get(self, name):
+        i = self._slot(self._hash(name))
+        return self._lines[i] if self._hashes[i] else None
+
+    def add(self, name, line):
+        if 2 * (self._count + 1) > len(self._hashes):
+            old = zip(self._hashes, self._lines)
+            self._hashes = array("Q", bytes(16 * len(self._hashes)))
+            self._lines = array("Q", bytes(8 * len(self._hashes)))
+            for h, old_line in old:
+                if h:
+                    i = self._slot(h)
+                    self._hashes[i], self._lines[i] = h, old_line
+        h = self._hash(name)
+        i = self._slot(h)
+        if not self._hashes[i]:
+            self._count += 1
+        self._hashes[i], self._lines[i] = h, line
+
+
+def iter_configs(records, rejects=None):
+    """
+    Validates records into (record id, AppConfig) pairs on the fly.
+
+    Records that fail go to `rejects` (a text file) as one JSON object per
+    line with the line number, the error and the raw record, and are
+    skipped. Yields nothing but the valid configs, so it can feed a render
+    loop directly.
+
+    A record whose id names the same output file as an earlier record's
+    (equal ids, or ids equal once sanitized or compared ignoring case, as
+    on Windows and macOS file systems) is rejected too, instead of
+    silently overwriting that wallpaper. The names seen so far are kept as
+    _NameSet hashes, a few bytes per record.
+    """
+    from pydantic import ValidationError
+
+    from .config import AppConfig
+
+    seen = _NameSet()
+    for number, record in records:
+        try:
+            if isinstance(record, RecordError):
+                raise record
+            data = dict(record)
+            record_id = str(data.pop(ID_FIELD, number))
+            name = output_name(record_id).casefold()
+            earlier = seen.get(name)
+            if earlier is not None:
+                raise RecordError(
+                    f"Id {record_id!r} writes the same file as the record "
+                    f"on line {earlier}"
+                )
+            config = AppConfig(**data)
+            seen.add(name, number)
+        except (RecordError, ValidationError, TypeError) as e:
+            if rejects is not None:
+                raw = None if isinstance(record, RecordError) else record
+                entry = {"line": number, "error": str(e), "record": raw}
+                rejects.write(json.dumps(entry, ensure_ascii=False, default=str))
+                rejects.write("\n")
+            continue
+        yield record_id, config
+
+
+def output_name(record_id):
+    """A record id with the characters unsafe in file names replaced."""
+    return re.sub(r"[^A-Za-z0-9._-]", "_", record_id).strip(".") or "_"
+
+
+def output_key(record_id, format):
+    """Sink key for a record: its output name and the format's extension."""
+    return f"{output_name(record_id)}.{format.lower()}"
+
+
+def _render_record(job, size, on):
+    from .api import render_image
+
+    _, config = job
+    return render_image(config, on=on, size=size)
+
+
+def _encode_record(img, job, format):
+    from .api import encode_image
+
+    return encode_image(img, format, threads=job[1].render.png_threads)
+
+
+# Sinks opened by pipeline encode workers, one per spec and process
+_worker_sinks = {}
+
+
+def _write_record(img, job, sink, format):
+    """Encodes and stores a frame in a worker; returns the journal hash."""
+    from .journal import output_hash
+    from .sinks import open_sink
+
+    if sink not in _worker_sinks:
+        _worker_sinks[sink] = open_sink(sink)
+    data = _encode_record(img, job, format)
+    _worker_sinks[sink].put(output_key(job[0], format), data).result()
+    return output_hash(data)
+
+
+def _close_worker_sinks():
+    """Pipeline teardown: closes this worker's sinks; returns their stats."""
+    from .sinks import merge_stats
+
+    stats = merge_stats(sink.close() for sink in _worker_sinks.values())
+    _worker_sinks.clear()
+    return stats
+
+
+def run_batch(
+    path,
+    out_dir,
+    rejects_path=None,
+    format="png",
+    size=None,
+    on=None,
+    input_format=None,
+    validate_only=False,
+    pipeline=None,
+    sink=None,
+    journal=None,
+):
+    """
+    Streams every record of `path` through validation and rendering.
+
+    Memory stays nearly flat in the number of records (iter_configs keeps a
+    hash per output name): records are read, validated, rendered and written
+    one by one (or a bounded handful at a time when
+    `pipeline` is a dict of run_pipeline options). Wallpapers go to the
+    sinks.open_sink spec `sink`, by default `dir:<out_dir>`; uploads run
+    while the next record renders. Returns counts of rendered, rejected and
+    failed records.
+
+    With a `journal` path, every stored wallpaper is appended to that
+    journal.Journal. Records it already lists for the same date, config,
+    sink, format and size are skipped (and counted as such) while the sink
+    still holds the recorded bytes, so a run that was interrupted resumes
+    where it stopped and retries only what failed.
+    """
+    from .journal import Journal, job_hash, output_hash
+    from .sinks import format_stats, merge_stats, open_sink
+
+    on = on or date.today()
+    sink = sink or f"dir:{out_dir}"
+    counts = {"read": 0, "rendered": 0, "rejected": 0, "failed": 0}
+    if journal is not None and not validate_only:
+        journal = Journal(journal, on)
+        counts["skipped"] = 0
+    else:
+        journal = None
+    counts_lock = threading.Lock()
+
+    def job_key(job):
+        record_id, config = job
+        key = output_key(record_id, format)
+        return job_hash(sink, key, format, size, config.model_dump(mode="json"))
+
+    def counted(records):
+        for number, record in records:
+            counts["read"] += 1
+            yield number, record
+
+    def pending(configs, target):
+        for record_id, config in configs:
+            digest = journal.done(record_id, config.theme, job_key((record_id, config)))
+            if digest and target.holds(output_key(record_id, format), digest):
+                counts["skipped"] += 1
+                continue
+            yield record_id, config
+
+    def finished(job, error, digest=None):
+        with counts_lock:
+            counts["failed" if error else "rendered"] += 1
+        if error:
+            print(f"Record {job[0]} failed: {error}")
+        elif journal is not None:
+            journal.record(job[0], job[1].theme, job_key(job), digest)
+
+    rejects = open(rejects_path, "w", encoding="utf-8") if rejects_path else None
+    try:
+        configs = iter_configs(counted(read_records(path, input_format)), rejects)
+        if validate_only:
+            counts["valid"] = sum(1 for _ in configs)
+        else:
+            sink_stats = []
+            with open_sink(sink) as target:
+                if journal is not None:
+                    configs = pending(configs, target)
+                if pipeline:
+                    from .pipeline import run_pipeline
+
+                    report = run_pipeline(
+                        configs,
+                        functools.partial(_render_record, size=size, on=on),
+                        size or (3840, 2160),
+                        encode=functools.partial(
+                            _write_record, sink=sink, format=format
+                        ),
+                        on_result=lambda job, digest, error: finished(
+                            job, error, digest
+                        ),
+                        teardown=_close_worker_sinks,
+                        **pipeline,
+                    )
+                    for closed in report["teardown"]:
+                        if isinstance(closed, dict):
+                            sink_stats.append(closed)
+                        else:
+                            print(f"Closing a worker's sink failed: {closed}")
+                else:
+                    for job in configs:
+                        try:
+                            img = _render_record(job, size, on)
+                            data = _encode_record(img, job, format)
+                            buffers.release(img)
+                        except Exception as e:
+                            finished(job, e)
+                            continue
+                        future = target.put(output_key(job[0], format), data)
+                        future.add_done_callback(
+                            lambda f, job=job, digest=output_hash(data): finished(
+                                job, f.exception(), digest
+                            )
+                        )
+            sink_stats.append(target.stats)
+            stats = merge_stats(sink_stats)
+            if any(stats.values()):
+                print(format_stats(sink, stats))
+    finally:
+        if rejects is not None:
+            rejects.close()
+        if journal is not None:
+            journal.close()
+    done = counts["rendered"] + counts["failed"] + counts.get("skipped", 0)
+    valid = counts.get("valid", done)
+    counts["rejected"] = counts["read"] - valid
+    return counts
+
+
+def add_arguments(parser):
+    parser.add_argument("input", help="Profiles as .jsonl or .csv")
+    parser.add_argument(
+        "--out-dir", default="renders", help="Directory for the wallpapers"
+    )
+    parser.add_argument(
+        "--sink",
+        help="Where to store the wallpapers: dir:PATH, users:PATH (a directory "
+        "per user), file:PATH or s3://BUCKET/PREFIX (default: --out-dir)",
+    )
+    parser.add_argument(
+        "--rejects",
+        help="Write invalid records here (JSON Lines) instead of dropping them",
+    )
+    parser.add_argument(
+        "--input-format", choices=["jsonl", "csv"], help="Override the file extension"
+    )
+    parser.add_argument("--format", default="png", help="Output image format")
+    parser.add_argument(
+        "--size", type=parse_size, help="Output resolution, e.g. 1920x1080"
+    )
+    parser.add_argument(
+        "--date", type=date.fromisoformat, help="Date to render (default: today)"
+    )
+    parser.add_argument(
+        "--validate-only",
+        action="store_true",
+        help="Only validate the records and write the rejects",
+    )
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="Draw and encode in separate worker pools (see loadtest --pipeline)",
+    )
+    parser.add_argument(
+        "--pool",
+        action="store_true",
+        help="Reuse canvas buffers between renders (see buffers.py)",
+    )
+    parser.add_argument(
+        "--journal",
+        help="Log finished renders here and skip them when the run is restarted",
+    )
+    parser.add_argument("--draw-workers", type=positive_int, default=1)
+    parser.add_argument("--encode-workers", type=positive_int, default=1)
+
+
+def run(args):
+    if args.pool:
+        buffers.enable()
+    pipeline = None
+    if args.pipeline:
+        pipeline = {
+            "draw_workers": args.draw_workers,
+            "encode_workers": args.encode_workers,
+        }
+    counts = run_batch(
+        args.input,
+        args.out_dir,
+        rejects_path=args.rejects,
+        format=args.format,
+        size=args.size,
+        on=args.date,
+        input_format=args.input_format,
+        validate_only=args.validate_only,
+        pipeline=pipeline,
+        sink=args.sink,
+        journal=args.journal,
+    )
+    summary = ", ".join(f"{v} {k}" for k, v in counts.items())
+    print(f"Batch finished: {summary}")
+    stats = buffers.pool_stats()
+    if stats and not pipeline:
+        print(buffers.format_stats(stats))
+    return 1 if counts["failed"] else 0
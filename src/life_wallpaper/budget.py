@@ -0,0 +1,192 @@
+"""
+Render-budget planning from measured stage costs.
+
+Every render records what each of its stages cost, in milliseconds per
+megapixel, as a moving average in the user cache. Before the next render
+those costs price the strategy ladder below, from the least visible
+compromise to the most visible one, and the planner picks:
+
+- with a render budget: the shortest prefix of the ladder that fits it
+  (or the cheapest one when nothing fits);
+- in low-power mode: the cheapest prefix overall.
+
+Renders with neither configured skip all of this: they use the full-quality
+plan and do not touch the costs file or the power source.
+"""
+
+import json
+import os
+
+from . import power
+from .utils import cache_dir
+
+COSTS_FILE = "stage_costs.json"
+# Set by scripts/guard_runner.py for its degraded fallback render
+LOW_POWER_ENV = "LIFE_WALLPAPER_LOW_POWER"
+# Weight of the newest measurement in the moving average
+SMOOTHING = 0.3
+
+# Seed costs in ms per megapixel until a stage has been measured here
+DEFAULT_COSTS = {
+    "draw": 4.0,
+    "vignette": 26.0,
+    "vignette_cached": 8.5,
+    "grain": 20.0,
+    "encode": 57.0,
+    "encode_fast": 22.0,
+    "upscale": 19.0,
+}
+
+# (attribute, value, log label), least visible compromise first
+LADDER = [
+    ("cached_vignette", True, "cached vignette"),
+    ("fast_encode", True, "fast encoder"),
+    ("skip_grain", True, "no grain"),
+    ("scale", 0.5, "half resolution"),
+]
+
+
+class Plan:
+    """The strategies chosen for one render; the defaults are full quality."""
+
+    def __init__(
+        self,
+        cached_vignette=False,
+        skip_grain=False,
+        fast_encode=False,
+        scale=1.0,
+        skip_post=False,
+    ):
+        self.cached_vignette = cached_vignette
+        self.skip_grain = skip_grain
+        self.fast_encode = fast_encode
+        self.scale = scale
+        # No vignette or grain at all; progressive previews only, not on the ladder
+        self.skip_post = skip_post
+
+    def describe(self):
+        labels = [
+            label for attr, value, label in LADDER if getattr(self, attr) == value
+        ]
+        return ", ".join(labels) or "full quality"
+
+    def save_params(self):
+        """Encoder options for the PNG written by the render command."""
+        return {"compress_level": 1} if self.fast_encode else {}
+
+
+class StageCosts:
+    """Moving averages of stage costs (ms per megapixel) for one theme."""
+
+    def __init__(self, theme, path=None):
+        self.theme = theme
+        self.path = path or os.path.join(cache_dir(), COSTS_FILE)
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self._all = json.load(f)
+        except (OSError, ValueError):
+            self._all = {}
+        self.costs = self._all.setdefault(theme, {})
+
+    def get(self, stage):
+        return self.costs.get(stage, DEFAULT_COSTS[stage])
+
+    def record(self, measured):
+        """Folds a render's {stage: ms per megapixel} into the averages."""
+        for stage, cost in measured.items():
+            old = self.costs.get(stage)
+            self.costs[stage] = cost if old is None else old + SMOOTHING * (cost - old)
+
+    def save(self):
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._all, f, indent=2)
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
+
+    def estimate(self, plan, size):
+        """Predicted wall time in ms of a render at `size` with `plan`."""
+        full_mp = size[0] * size[1] / 1e6
+        mp = full_mp * plan.scale**2
+        ms = self.get("draw") * mp
+        ms += self.get("vignette_cached" if plan.cached_vignette else "vignette") * mp
+        if not plan.skip_grain:
+            ms += self.get("grain") * mp
+        if plan.scale < 1:
+            ms += self.get("upscale") * full_mp
+        ms += self.get("encode_fast" if plan.fast_encode else "encode") * full_mp
+        return ms
+
+
+def candidates():
+    """Full quality followed by every prefix of the ladder."""
+    plans = [Plan()]
+    for attr, value, _ in LADDER:
+        plan = Plan(**vars(plans[-1]))
+        setattr(plan, attr, value)
+        plans.append(plan)
+    return plans
+
+
+def choose_plan(costs, size, budget_ms=None, low_power=False):
+    """Returns (plan, estimated ms) for the given constraints."""
+    priced = [(plan, costs.estimate(plan, size)) for plan in candidates()]
+    if low_power:
+        # min() keeps the earliest, least degraded plan on ties
+        return min(priced, key=lambda p: p[1])
+    if budget_ms is not None:
+        for plan, ms in priced:
+            if ms <= budget_ms:
+                return plan, ms
+        return min(priced, key=lambda p: p[1])
+    return priced[0]
+
+
+def low_power_mode(settings):
+    """
+    (on, reason) for the low-power profile of the `render` config section.
+
+    `settings.low_power` "auto" follows the power source: running on battery
+    turns the low-power profile on. Only then is the power source checked.
+    LOW_POWER_ENV forces it on.
+    """
+    if os.environ.get(LOW_POWER_ENV):
+        return True, "forced low power"
+    if settings.low_power == "auto":
+        return power.power_source() == power.BATTERY, "on battery"
+    return bool(settings.low_power), "low power"
+
+
+def low_power_config(config, palette=False):
+    """
+    Copy of `config` with the cheapest settings of the themes that have no
+    cost ladder (dashboard, weeks): standard quality and, with `palette`,
+    the 8-bit canvas. Their low-power renders also use the fast encoder.
+    """
+    config = config.model_copy(deep=True)
+    config.render.quality = "standard"
+    if palette:
+        config.render.palette = True
+    return config
+
+
+def plan_render(settings, costs, size, mode=None):
+    """
+    Plans a render from the `render` config section and logs the decision.
+    `mode` is low_power_mode(settings) when the caller already has it.
+    """
+    low_power, reason = mode or low_power_mode(settings)
+    budget_ms = settings.budget_ms
+    plan, estimate = choose_plan(costs, size, budget_ms, low_power)
+    if low_power or budget_ms is not None:
+        why = [reason] if low_power else []
+        if budget_ms is not None:
+            fits = "fits" if estimate <= budget_ms else "over"
+            why.append(f"budget {budget_ms} ms, {fits}")
+        print(
+            f"Render plan: {plan.describe()}, est. {estimate:.0f} ms ({'; '.join(why)})"
+        )
+    return plan
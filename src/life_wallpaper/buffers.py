@@ -0,0 +1,148 @@
+"""
+Per-process pool of image buffers for long-lived renderers.
+
+A 4K RGB canvas is 24 MiB. Allocating a fresh one for every render (and
+freeing it right after) makes a daemon or batch worker's RSS saw-tooth and
+spends time in the allocator and page faults. With pooling on, renderers
+take canvases from a pool keyed by (mode, size) and refill them with the
+background colour instead, and whoever is done with a frame hands it back
+with release(). Layers that only depend on the size (the og vignette) are
+built once per process and kept.
+
+Pooling is off unless LIFE_WALLPAPER_POOL is set, which the --pool flags
+do, so that worker processes inherit it. new_image() and release() then
+fall back to plain Image.new and a no-op.
+"""
+
+import os
+import threading
+
+from PIL import Image
+
+POOL_ENV = "LIFE_WALLPAPER_POOL"
+MAX_PER_KEY = 2  # idle buffers kept per (mode, size)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+class BufferPool:
+    """Idle images by (mode, size); thread-safe."""
+
+    def __init__(self, max_per_key=MAX_PER_KEY):
+        self.max_per_key = max_per_key
+        self._idle = {}
+        self._kept = {}
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.released = self.dropped = 0
+
+    def acquire(self, mode, size, color=0):
+        """An image of `mode` and `size` filled with `color`, reused if possible."""
+        size = (int(size[0]), int(size[1]))
+        with self._lock:
+            idle = self._idle.get((mode, size))
+            img = idle.pop() if idle else None
+            if img is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if img is None:
+            return Image.new(mode, size, color)
+        # Refilling in place is a memset; no allocation, no page faults
+        img.paste(color, (0, 0) + size)
+        img.info.clear()
+        return img
+
+    def release(self, img):
+        """Returns `img` to the pool; it must not be used afterwards."""
+        # Palette images carry their palette along, so they are not reused
+        if img is None or img.mode == "P" or img.readonly:
+            return
+        key = (img.mode, img.size)
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_per_key and not any(i is img for i in idle):
+                idle.append(img)
+                self.released += 1
+            else:
+                self.dropped += 1
+
+    def kept(self, key):
+        """A layer stored with keep(), or None."""
+        with self._lock:
+            return self._kept.get(key)
+
+    def keep(self, key, value):
+        """Keeps a read-only layer for the rest of the process."""
+        with self._lock:
+            self._kept[key] = value
+
+    def stats(self):
+        with self._lock:
+            idle = [img for imgs in self._idle.values() for img in imgs]
+            kept = list(self._kept.values())
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "released": self.released,
+                "dropped": self.dropped,
+                "idle": len(idle),
+                "idle_bytes": sum(_nbytes(img) for img in idle),
+                "kept_bytes": sum(_nbytes(img) for img in kept),
+            }
+
+
+def _nbytes(img):
+    bands = len(img.getbands())
+    return img.size[0] * img.size[1] * (4 if bands > 1 else 1)
+
+
+def enable(max_per_key=MAX_PER_KEY):
+    """Turns pooling on for this process and the processes it starts."""
+    global _pool
+    os.environ[POOL_ENV] = "1"
+    with _pool_lock:
+        if _pool is None:
+            _pool = BufferPool(max_per_key)
+    return _pool
+
+
+def get_pool():
+    """The process's pool, or None when pooling is off."""
+    global _pool
+    if _pool is None and os.environ.get(POOL_ENV):
+        with _pool_lock:
+            if _pool is None:
+                _pool = BufferPool()
+    return _pool
+
+
+def new_image(mode, size, color=0):
+    """Image.new, served from the pool when pooling is on."""
+    pool = get_pool()
+    if pool is None or mode == "P":
+        return Image.new(mode, (int(size[0]), int(size[1])), color)
+    return pool.acquire(mode, size, color)
+
+
+def release(img):
+    """Hands a finished frame back to the pool; a no-op when pooling is off."""
+    pool = get_pool()
+    if pool is not None:
+        pool.release(img)
+
+
+def pool_stats():
+    pool = get_pool()
+    return pool.stats() if pool is not None else None
+
+
+def format_stats(stats):
+    served = stats["hits"] + stats["misses"]
+    rate = stats["hits"] / served * 100 if served else 0.0
+    return (
+        f"Buffer pool: {stats['hits']}/{served} buffers reused ({rate:.0f}%), "
+        f"{stats['idle']} idle ({stats['idle_bytes'] / 1024 / 1024:.0f} MiB), "
+        f"{stats['kept_bytes'] / 1024 / 1024:.0f} MiB of kept layers, "
+        f"{stats['dropped']} dropped"
+    )
@@ -1,10 +1,12 @@
 from datetime import date
-from typing import List, Optional
+from typing import List, Literal, Optional, Tuple, Union
 import json
 import os
-from pydantic import BaseModel, Field
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from pydantic import BaseModel, Field, field_validator
+
+from .config_snapshot import CONFIG_FILE, find_config_path
 
-CONFIG_FILE = "life_config.json"
 DEFAULT_DATA = {
     "profile": {"name": "User", "dob": "2000-01-01", "life_expectancy": 80},
     "collections": {
@@ -13,53 +15,91 @@ DEFAULT_DATA = {
     },
     "theme": "original",
 }
+# Collections fields holding file paths, relative to the config file
+CORPUS_FIELDS = ("mantras_file", "footer_quotes_file")
 
 
 class Profile(BaseModel):
     name: str = "User"
     dob: date = date(2000, 1, 1)
     life_expectancy: int = 80
+    timezone: Optional[str] = None  # IANA name such as "Asia/Tokyo"; None = local
+
+    @field_validator("timezone")
+    @classmethod
+    def _known_timezone(cls, value):
+        if value is not None:
+            try:
+                ZoneInfo(value)
+            except (ZoneInfoNotFoundError, ValueError):
+                raise ValueError(f"Unknown time zone '{value}'") from None
+        return value
 
 
 class Collections(BaseModel):
     mantras: List[str] = Field(default_factory=list)
     footer_quotes: List[str] = Field(default_factory=list)
+    mantras_file: Optional[str] = None  # One mantra per line; used over `mantras`
+    footer_quotes_file: Optional[str] = None  # Same for `footer_quotes`
+    no_repeat_days: int = 0  # Files only: don't show a line again for N days
+
+
+class RenderSettings(BaseModel):
+    quality: str = "standard"  # Options: "standard", "high" (supersampled curves)
+    intraday: bool = False  # Day-progress ring, kept current by `intraday`
+    palette: bool = False  # Dashboard: 8-bit indexed canvas (standard quality only)
+    budget_ms: Optional[int] = None  # og: trade quality for speed to finish in time
+    # Cheapest render; "auto" = when on battery (checks the power source)
+    low_power: Union[bool, Literal["auto"], None] = None
+    png_threads: int = 0  # >1: deflate PNG output in parallel on this many threads
 
 
 class AppConfig(BaseModel):
     profile: Profile
     collections: Collections
-    theme: str = "original"  # Options: "original" (Dashboard), "og" (Life Progress)
+    render: RenderSettings = Field(default_factory=RenderSettings)
+    # Options: "original" (Dashboard), "og" (Life Progress), "weeks" (Life in Weeks)
+    theme: str = "original"
 
 
-def load_config(config_path: Optional[str] = None) -> AppConfig:
-    """Load configuration from JSON file or return default data."""
-    if not config_path:
-        # Look in current directory or package directory
-        possible_paths = [
-            CONFIG_FILE,
-            os.path.join(
-                os.path.dirname(__file__), "..", "..", CONFIG_FILE
-            ),  # original location relative to src/life_wallpaper
-        ]
-        for p in possible_paths:
-            if os.path.exists(p):
-                config_path = p
-                break
+def _resolve_corpus_paths(data, base):
+    """
+    Makes relative corpus paths absolute against `base`, so they do not
+    depend on the working directory (arbitrary under the scheduled task).
+    """
+    collections = data.get("collections") if isinstance(data, dict) else None
+    if not isinstance(collections, dict):
+        return
+    for name in CORPUS_FIELDS:
+        value = collections.get(name)
+        if isinstance(value, str) and value and not os.path.isabs(value):
+            collections[name] = os.path.join(base, os.path.expanduser(value))
+
 
+def read_config_data(config_path: Optional[str]) -> Tuple[dict, bool]:
+    """Raw config data from the file, or the defaults; flags which one it is."""
     data = DEFAULT_DATA
+    from_file = False
     if config_path and os.path.exists(config_path):
         try:
             with open(config_path, "r") as f:
                 loaded = json.load(f)
                 # Merge with default to ensure structure
                 data = loaded
+                from_file = True
         except Exception as e:
             print(f"Warning: Could not load config from {config_path}: {e}")
+    if from_file:
+        _resolve_corpus_paths(data, os.path.dirname(os.path.abspath(config_path)))
 
     # Ensure defaults if keys missing (simple merge)
     # Pydantic handles validation, but we need to feed it the right structure
     # If the file is partial, this might fail without more complex merging,
     # but for now let's assume valid JSON structure or fallback.
+    return data, from_file
+
 
+def load_config(config_path: Optional[str] = None) -> AppConfig:
+    """Load configuration from JSON file or return default data."""
+    data, _ = read_config_data(find_config_path(config_path))
     return AppConfig(**data)
@@ -0,0 +1,145 @@
+"""
+Validated-config snapshots that let warm starts skip pydantic entirely.
+
+After a config file passes full validation its normalized data is stored in
+the user cache, keyed by the file's path, mtime, size and SCHEMA_VERSION. On
+the next run a matching key rebuilds a lightweight, attribute-compatible
+config from the snapshot without importing pydantic. Any mismatch falls
+back to config.load_config, which reports invalid files exactly as before.
+"""
+
+import copy
+import json
+import os
+from datetime import date
+from typing import Optional
+
+from .utils import cache_dir
+
+# Bump whenever the fields of config.AppConfig change
+SCHEMA_VERSION = 8
+SNAPSHOT_FILE = "config_snapshot.json"
+CONFIG_FILE = "life_config.json"
+
+
+def find_config_path(config_path: Optional[str] = None) -> Optional[str]:
+    """The config file to load: the given path, or the first one that exists."""
+    if config_path:
+        return config_path if os.path.exists(config_path) else None
+    # Look in current directory or package directory
+    possible_paths = [
+        CONFIG_FILE,
+        os.path.join(
+            os.path.dirname(__file__), "..", "..", CONFIG_FILE
+        ),  # original location relative to src/life_wallpaper
+    ]
+    for p in possible_paths:
+        if os.path.exists(p):
+            return p
+    return None
+
+
+class LiteProfile:
+    def __init__(self, name, dob, life_expectancy, timezone):
+        self.name = name
+        self.dob = date.fromisoformat(dob)
+        self.life_expectancy = life_expectancy
+        self.timezone = timezone
+
+
+class LiteCollections:
+    def __init__(
+        self, mantras, footer_quotes, mantras_file, footer_quotes_file, no_repeat_days
+    ):
+        self.mantras = mantras
+        self.footer_quotes = footer_quotes
+        self.mantras_file = mantras_file
+        self.footer_quotes_file = footer_quotes_file
+        self.no_repeat_days = no_repeat_days
+
+
+class LiteRenderSettings:
+    def __init__(self, quality, intraday, palette, budget_ms, low_power, png_threads):
+        self.quality = quality
+        self.intraday = intraday
+        self.palette = palette
+        self.budget_ms = budget_ms
+        self.low_power = low_power
+        self.png_threads = png_threads
+
+
+class LiteConfig:
+    """Plain-attribute stand-in for config.AppConfig built from a snapshot."""
+
+    def __init__(self, data):
+        self.profile = LiteProfile(**data["profile"])
+        self.collections = LiteCollections(**data["collections"])
+        self.render = LiteRenderSettings(**data["render"])
+        self.theme = data["theme"]
+
+    def model_copy(self, deep=False):
+        """Mirrors pydantic's model_copy so callers need not tell them apart."""
+        return copy.deepcopy(self) if deep else copy.copy(self)
+
+
+def _snapshot_key(path):
+    st = os.stat(path)
+    return [os.path.abspath(path), st.st_mtime_ns, st.st_size, SCHEMA_VERSION]
+
+
+def _snapshot_path():
+    return os.path.join(cache_dir(), SNAPSHOT_FILE)
+
+
+def _read_snapshot(key):
+    try:
+        with open(_snapshot_path(), encoding="utf-8") as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if snapshot.get("key") != key:
+        return None
+    return snapshot.get("data")
+
+
+def _write_snapshot(key, data):
+    path = _snapshot_path()
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"key": key, "data": data}, f, separators=(",", ":"))
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
+def load_config(config_path: Optional[str] = None):
+    """
+    Loads the config, from the snapshot when the source file is unchanged.
+
+    Returns a LiteConfig on a snapshot hit, otherwise the fully validated
+    AppConfig (which is then snapshotted for the next run).
+    """
+    path = find_config_path(config_path)
+    key = None
+    if path:
+        try:
+            key = _snapshot_key(path)
+        except OSError:
+            pass
+    if key:
+        data = _read_snapshot(key)
+        if data is not None:
+            try:
+                return LiteConfig(data)
+            except (KeyError, TypeError, ValueError):
+                pass  # Damaged snapshot, validate from scratch
+
+    from . import config as full
+
+    data, from_file = full.read_config_data(path)
+    app_config = full.AppConfig(**data)
+    if key and from_file:
+        _write_snapshot(key, app_config.model_dump(mode="json"))
+    return app_config
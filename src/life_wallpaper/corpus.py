@@ -0,0 +1,207 @@
+"""
+External quote corpora: text files with one mantra or quote per line.
+
+Inline collections are loaded and validated with the config on every run,
+which is fine for a handful of lines but not for a corpus of hundreds of
+thousands. A corpus file is instead indexed once into a binary table of
+line offsets in the user cache, rebuilt only when the file's size or
+modification time changes. Picking a line reads one offset from the index
+and one line from the corpus, whatever the size of either.
+
+With `no_repeat_days` the picks are remembered per day in a small rotation
+file, so a line is not shown again within that many days, and re-renders on
+the same day show the same line.
+"""
+
+import hashlib
+import json
+import os
+import random
+import struct
+import sys
+from array import array
+from datetime import date, timedelta
+
+from .lock import FileLock
+from .utils import cache_dir
+
+INDEX_MAGIC = b"LWCORP1\0"
+# magic, corpus size, corpus mtime_ns, line count
+INDEX_HEADER = struct.Struct("<8sQqQ")
+ROTATION_FILE = "corpus_rotation.json"
+# Random draws before falling back to a scan for a line not shown lately
+MAX_DRAWS = 32
+
+
+def index_path(path):
+    """Where the offset index of the corpus at `path` is cached."""
+    digest = hashlib.sha1(os.path.abspath(path).encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir(), f"corpus_{digest[:16]}.idx")
+
+
+class Corpus:
+    """
+    Random access to the non-blank lines of a UTF-8 text file through its
+    offset index. Raises OSError when the file cannot be read.
+    """
+
+    def __init__(self, path, index=None):
+        self.path = path
+        self.index = index or index_path(path)
+        st = os.stat(path)
+        self.stamp = (st.st_size, st.st_mtime_ns)
+        self.count = self._load()
+        if self.count is None:
+            self.count = self.rebuild()
+
+    def _load(self):
+        try:
+            with open(self.index, "rb") as f:
+                header = f.read(INDEX_HEADER.size)
+        except OSError:
+            return None
+        if len(header) != INDEX_HEADER.size:
+            return None
+        magic, size, mtime_ns, count = INDEX_HEADER.unpack(header)
+        if magic != INDEX_MAGIC or (size, mtime_ns) != self.stamp:
+            return None
+        return count
+
+    def rebuild(self):
+        """Scans the corpus and writes its index; returns the line count."""
+        offsets = array("Q")
+        position = 0
+        with open(self.path, "rb") as f:
+            for line in f:
+                if line.strip():
+                    offsets.append(position)
+                position += len(line)
+        if sys.byteorder == "big":
+            offsets.byteswap()  # Stored little-endian, like the header
+        tmp = f"{self.index}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.index), exist_ok=True)
+            with open(tmp, "wb") as f:
+                f.write(INDEX_HEADER.pack(INDEX_MAGIC, *self.stamp, len(offsets)))
+                f.write(offsets.tobytes())
+            os.replace(tmp, self.index)
+        except OSError:
+            pass
+        self._offsets = offsets
+        return len(offsets)
+
+    def __len__(self):
+        return self.count
+
+    def _offset(self, i):
+        offsets = getattr(self, "_offsets", None)
+        if offsets is not None:
+            return offsets[i]
+        with open(self.index, "rb") as f:
+            f.seek(INDEX_HEADER.size + 8 * i)
+            return struct.unpack("<Q", f.read(8))[0]
+
+    def line(self, i):
+        """The `i`-th non-blank line, without its line break."""
+        if not 0 <= i < self.count:
+            raise IndexError(f"Line {i} is out of range for {self.path}")
+        with open(self.path, "rb") as f:
+            f.seek(self._offset(i))
+            raw = f.readline()
+        return raw.decode("utf-8-sig", "replace").strip()
+
+    def choice(self, rng=random):
+        return self.line(rng.randrange(self.count))
+
+
+class Rotation:
+    """
+    Picks per corpus and day, kept in the user cache. `slot` tells apart
+    different uses of the same file (mantras and footer quotes). Updates
+    hold a lock next to the file, so concurrent renders (batch workers) do
+    not lose each other's picks.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(cache_dir(), ROTATION_FILE)
+        self._all = {}
+
+    def _read(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def pick(self, corpus, day, days, slot="", rng=random):
+        """A line of `corpus` for `day` that was not picked in the `days` before."""
+        with FileLock(f"{self.path}.lock"):
+            self._all = self._read()
+            i = self._pick(corpus, day, days, slot, rng)
+        return corpus.line(i)
+
+    def _pick(self, corpus, day, days, slot, rng):
+        key = f"{slot}:{os.path.abspath(corpus.path)}"
+        entry = self._all.get(key)
+        if entry is None or entry.get("stamp") != list(corpus.stamp):
+            # Line numbers of another version of the file mean nothing
+            entry = {"stamp": list(corpus.stamp), "picks": {}}
+        today = day.isoformat()
+        oldest = (day - timedelta(days=days - 1)).isoformat()
+        # Later days stay: renders for several dates may come in any order
+        picks = {d: i for d, i in entry["picks"].items() if d >= oldest}
+        if today in picks:
+            return picks[today]
+
+        recent = {i for d, i in picks.items() if d <= today}
+        if len(recent) >= len(corpus):
+            recent = set()  # Everything was shown lately; start over
+        for _ in range(MAX_DRAWS):
+            i = rng.randrange(len(corpus))
+            if i not in recent:
+                break
+        else:
+            start = rng.randrange(len(corpus))
+            i = next(
+                (start + k) % len(corpus)
+                for k in range(len(corpus))
+                if (start + k) % len(corpus) not in recent
+            )
+        picks[today] = i
+        entry["picks"] = picks
+        self._all[key] = entry
+        self.save()
+        return i
+
+    def save(self):
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._all, f, separators=(",", ":"))
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
+
+
+def choose_text(collections, name, day=None, rng=random):
+    """
+    A random entry of the collection `name` ("mantras" or "footer_quotes"):
+    a line of its corpus file when `<name>_file` is set, otherwise one of the
+    inline entries. None when there is nothing to choose from.
+    """
+    path = getattr(collections, f"{name}_file", None)
+    if path:
+        try:
+            corpus = Corpus(path)
+            if len(corpus):
+                days = collections.no_repeat_days
+                if days > 0:
+                    return Rotation().pick(
+                        corpus, day or date.today(), days, slot=name, rng=rng
+                    )
+                return corpus.choice(rng)
+        except OSError as e:
+            print(f"Could not read {name} from {path}: {e}")
+    items = getattr(collections, name)
+    return rng.choice(items) if items else None
@@ -0,0 +1,246 @@
+"""
+Installed-font discovery.
+
+The standard font directories are scanned once into an index of file names
+and family/style names, cached on disk and reused until the modification
+time of one of the scanned directories changes. Font lists in the themes
+are resolved against the index, so a missing font costs a dict lookup
+instead of a file-system search inside ImageFont.truetype.
+"""
+
+import json
+import os
+import struct
+import sys
+
+from .utils import cache_dir
+
+INDEX_VERSION = 1
+INDEX_FILE = "font_index.json"
+FONT_EXTENSIONS = (".ttf", ".ttc", ".otf", ".otc")
+
+# name table IDs, typographic names first
+_FAMILY_IDS = (16, 1)
+_STYLE_IDS = (17, 2)
+_PLAIN_STYLES = {"regular", "normal", "book", "roman"}
+
+
+def font_dirs():
+    """Standard font directories for this platform, in lookup priority order."""
+    home = os.path.expanduser("~")
+    if os.name == "nt":
+        windir = os.environ.get("WINDIR", r"C:\Windows")
+        local = os.environ.get("LOCALAPPDATA", os.path.join(home, "AppData", "Local"))
+        return [
+            os.path.join(windir, "Fonts"),
+            os.path.join(local, "Microsoft", "Windows", "Fonts"),
+        ]
+    if sys.platform == "darwin":
+        return [
+            os.path.join(home, "Library", "Fonts"),
+            "/Library/Fonts",
+            "/System/Library/Fonts",
+        ]
+    data_home = os.environ.get("XDG_DATA_HOME") or os.path.join(home, ".local", "share")
+    data_dirs = os.environ.get("XDG_DATA_DIRS") or "/usr/local/share:/usr/share"
+    dirs = [os.path.join(data_home, "fonts"), os.path.join(home, ".fonts")]
+    dirs += [os.path.join(d, "fonts") for d in data_dirs.split(":") if d]
+    return list(dict.fromkeys(dirs))
+
+
+def _normalize(name):
+    return "".join(ch for ch in name.lower() if ch.isalnum())
+
+
+# --- sfnt helpers ---
+
+
+def face_offsets(f):
+    """Offsets of the table directories of every face in a font file."""
+    f.seek(0)
+    if f.read(4) != b"ttcf":
+        return [0]
+    f.seek(8)
+    (count,) = struct.unpack(">I", f.read(4))
+    return list(struct.unpack(f">{count}I", f.read(4 * count)))
+
+
+def read_table(f, tag, font_index=0):
+    """Raw bytes of one sfnt table of face `font_index`, or None if absent."""
+    offset = face_offsets(f)[font_index]
+    f.seek(offset + 4)
+    (num_tables,) = struct.unpack(">H", f.read(2))
+    f.seek(offset + 12)
+    directory = f.read(16 * num_tables)
+    for i in range(num_tables):
+        rec_tag, _, table_off, length = struct.unpack_from(">4sIII", directory, 16 * i)
+        if rec_tag == tag:
+            f.seek(table_off)
+            return f.read(length)
+    return None
+
+
+def read_names(f, font_index=0):
+    """(family, style) from the name table, preferring US English Windows names."""
+    data = read_table(f, b"name", font_index)
+    if data is None:
+        return None, None
+    count, string_offset = struct.unpack_from(">HH", data, 2)
+    found = {}
+    for i in range(count):
+        platform, encoding, language, name_id, length, off = struct.unpack_from(
+            ">HHHHHH", data, 6 + 12 * i
+        )
+        if name_id not in _FAMILY_IDS + _STYLE_IDS:
+            continue
+        raw = data[string_offset + off : string_offset + off + length]
+        if platform == 3:
+            rank = 2 if language == 0x409 else 1
+            text = raw.decode("utf-16-be", "replace")
+        elif platform == 1 and encoding == 0:
+            rank = 0
+            text = raw.decode("latin-1")
+        else:
+            continue
+        if rank > found.get(name_id, (-1, ""))[0]:
+            found[name_id] = (rank, text)
+
+    def pick(ids):
+        for name_id in ids:
+            if name_id in found:
+                return found[name_id][1]
+        return None
+
+    return pick(_FAMILY_IDS), pick(_STYLE_IDS)
+
+
+# --- index ---
+
+
+class FontIndex:
+    """
+    File-name and family/style lookup over the installed fonts.
+
+    `files` maps lower-case file names to paths, `faces` maps normalized
+    "family style" names to [path, face index]. `stamps` records the mtime of
+    every scanned directory (None for roots that did not exist), which is
+    what decides whether the cached index is still valid.
+    """
+
+    def __init__(self, dirs=None, path=None):
+        self.dirs = list(dirs) if dirs is not None else font_dirs()
+        self.path = path or os.path.join(cache_dir(), INDEX_FILE)
+        self.stamps = {}
+        self.files = {}
+        self.faces = {}
+        if not self._load():
+            self.rescan()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if data.get("version") != INDEX_VERSION or data.get("dirs") != self.dirs:
+            return False
+        self.stamps = data["stamps"]
+        if not self._fresh():
+            return False
+        self.files = data["files"]
+        self.faces = data["faces"]
+        return True
+
+    def _fresh(self):
+        for directory, mtime in self.stamps.items():
+            try:
+                current = os.stat(directory).st_mtime_ns
+            except OSError:
+                current = None
+            if current != mtime:
+                return False
+        return True
+
+    def rescan(self):
+        """Walks the font directories and rebuilds and saves the index."""
+        self.stamps, self.files, self.faces = {}, {}, {}
+        for root in self.dirs:
+            if not os.path.isdir(root):
+                self.stamps[root] = None
+                continue
+            for directory, subdirs, names in os.walk(root):
+                subdirs.sort()
+                try:
+                    self.stamps[directory] = os.stat(directory).st_mtime_ns
+                except OSError:
+                    continue
+                for name in sorted(names):
+                    if name.lower().endswith(FONT_EXTENSIONS):
+                        self._add(os.path.join(directory, name))
+        self.save()
+
+    def _add(self, path):
+        self.files.setdefault(os.path.basename(path).lower(), path)
+        try:
+            with open(path, "rb") as f:
+                for face in range(len(face_offsets(f))):
+                    family, style = read_names(f, face)
+                    if not family:
+                        continue
+                    style = style or "Regular"
+                    self.faces.setdefault(_normalize(family + style), [path, face])
+                    if style.lower() in _PLAIN_STYLES:
+                        self.faces.setdefault(_normalize(family), [path, face])
+        except (OSError, struct.error, IndexError):
+            pass
+
+    def save(self):
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "version": INDEX_VERSION,
+                        "dirs": self.dirs,
+                        "stamps": self.stamps,
+                        "files": self.files,
+                        "faces": self.faces,
+                    },
+                    f,
+                    separators=(",", ":"),
+                )
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
+
+    def find(self, name):
+        """
+        (path, face index) for a font list entry, or None if not installed.
+
+        Entries may be existing paths, file names such as "arialbd.ttf"
+        (matched case-insensitively) or family/style names such as
+        "Inter SemiBold"; "inter-semibold.ttf" also matches that face.
+        """
+        if os.path.isfile(name):
+            return name, 0
+        if os.path.dirname(name):
+            name = os.path.basename(name)
+        path = self.files.get(name.lower())
+        if path is not None:
+            return path, 0
+        face = self.faces.get(_normalize(os.path.splitext(name)[0]))
+        if face is not None:
+            return face[0], face[1]
+        return None
+
+
+_index = None
+
+
+def font_index():
+    """Process-wide font index, loaded from the cache on first use."""
+    global _index
+    if _index is None:
+        _index = FontIndex()
+    return _index
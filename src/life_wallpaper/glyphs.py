@@ -0,0 +1,389 @@
+"""
+Per-character font fallback driven by a persisted glyph coverage index.
+
+Each font's cmap is parsed once into sorted codepoint ranges and stored in the
+user cache, keyed by file path, size and mtime. A FontChain pairs a primary
+font with fallbacks and memoizes codepoint -> font, so after warm-up splitting
+a string into same-font runs costs one dictionary lookup per character.
+"""
+
+import io
+import json
+import os
+import struct
+import unicodedata
+from bisect import bisect_right
+
+from PIL import ImageFont
+
+from .fonts import font_index, read_table
+from .utils import cache_dir
+
+INDEX_VERSION = 2
+INDEX_FILE = "glyph_coverage.json"
+
+# Wide-coverage fonts tried in order for characters the primary font lacks.
+# Bitmap-only colour emoji fonts are left out: FreeType cannot scale them.
+FALLBACK_FONTS = [
+    # Latin, Greek, Cyrillic
+    "segoeui.ttf",
+    "arial.ttf",
+    "DejaVuSans.ttf",
+    "NotoSans-Regular.ttf",
+    # CJK
+    "msyh.ttc",
+    "YuGothM.ttc",
+    "malgun.ttf",
+    "NotoSansCJK-Regular.ttc",
+    "wqy-microhei.ttc",
+    "/System/Library/Fonts/PingFang.ttc",
+    "/System/Library/Fonts/Hiragino Sans GB.ttc",
+    # Indic, Arabic, Hebrew, Thai and friends
+    "Nirmala.ttf",
+    "tahoma.ttf",
+    "/System/Library/Fonts/Supplemental/Arial Unicode.ttf",
+    # Symbols and emoji
+    "seguisym.ttf",
+    "seguiemj.ttf",
+    "NotoEmoji-Regular.ttf",
+    "Symbola.ttf",
+]
+
+# Slot returned for marks and joiners, which stay in the run they follow
+INHERIT = -1
+_INHERIT_CATEGORIES = {"Mn", "Me", "Cf"}
+
+
+# --- cmap parsing ---
+
+
+def _format4(data, off):
+    seg_count = struct.unpack_from(">H", data, off + 6)[0] // 2
+    ends = struct.unpack_from(f">{seg_count}H", data, off + 14)
+    starts_at = off + 16 + 2 * seg_count
+    starts = struct.unpack_from(f">{seg_count}H", data, starts_at)
+    deltas = struct.unpack_from(f">{seg_count}h", data, starts_at + 2 * seg_count)
+    ro_at = starts_at + 4 * seg_count
+    range_offsets = struct.unpack_from(f">{seg_count}H", data, ro_at)
+
+    ranges = []
+    for i in range(seg_count):
+        start, end, delta, ro = starts[i], ends[i], deltas[i], range_offsets[i]
+        if start == 0xFFFF:
+            continue
+        if ro == 0:
+            ranges.append((start, end))
+            continue
+        # Glyph ids live in glyphIdArray; unmapped codepoints hold glyph 0
+        base = ro_at + 2 * i + ro
+        for c in range(start, end + 1):
+            pos = base + 2 * (c - start)
+            if pos + 2 <= len(data) and struct.unpack_from(">H", data, pos)[0]:
+                ranges.append((c, c))
+    return ranges
+
+
+def _format12(data, off):
+    (n_groups,) = struct.unpack_from(">I", data, off + 12)
+    ranges = []
+    for i in range(n_groups):
+        start, end, glyph = struct.unpack_from(">III", data, off + 16 + 12 * i)
+        if glyph == 0:
+            start += 1
+        if start <= end:
+            ranges.append((start, end))
+    return ranges
+
+
+def _merge(ranges):
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+def read_cmap(source, font_index=0):
+    """
+    Codepoints mapped by a TrueType/OpenType font, as merged [start, end] pairs.
+
+    `source` is a file path or the raw font bytes. Only the table directory
+    and the cmap table are read, so large collections stay cheap.
+    """
+    if isinstance(source, (bytes, bytearray)):
+        data = read_table(io.BytesIO(source), b"cmap", font_index)
+    else:
+        with open(source, "rb") as f:
+            data = read_table(f, b"cmap", font_index)
+    if data is None:
+        return []
+
+    n_subtables = struct.unpack_from(">H", data, 2)[0]
+    best = None
+    for i in range(n_subtables):
+        platform, encoding, off = struct.unpack_from(">HHI", data, 4 + 8 * i)
+        fmt = struct.unpack_from(">H", data, off)[0]
+        unicode_table = platform == 0 or (platform == 3 and encoding in (1, 10))
+        symbol_table = platform == 3 and encoding == 0
+        if fmt not in (4, 12) or not (unicode_table or symbol_table):
+            continue
+        # Full-repertoire format 12 beats BMP-only format 4 beats symbol maps
+        rank = (unicode_table, fmt == 12)
+        if best is None or rank > best[0]:
+            best = (rank, fmt, off)
+    if best is None:
+        return []
+
+    _, fmt, off = best
+    ranges = _format12(data, off) if fmt == 12 else _format4(data, off)
+    return _merge(ranges)
+
+
+# --- persisted index ---
+
+
+def _stamp(path):
+    st = os.stat(path)
+    return [st.st_mtime_ns, st.st_size]
+
+
+class CoverageIndex:
+    """
+    Coverage ranges of font files, persisted as JSON in the user cache and
+    revalidated against file stamps.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(cache_dir(), INDEX_FILE)
+        self.fonts = {}
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") == INDEX_VERSION:
+            self.fonts = data.get("fonts", {})
+
+    def save(self):
+        """Writes the index back if anything changed. Failures are ignored."""
+        if not self._dirty:
+            return
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(
+                    {"version": INDEX_VERSION, "fonts": self.fonts},
+                    f,
+                    separators=(",", ":"),
+                )
+            os.replace(tmp, self.path)
+            self._dirty = False
+        except OSError:
+            pass
+
+    def ranges(self, path, font_index=0):
+        """Coverage ranges of the font file, parsed only when it changed."""
+        path = os.path.abspath(path)
+        key = f"{path}#{font_index}"
+        try:
+            stamp = _stamp(path)
+        except OSError:
+            return []
+        entry = self.fonts.get(key)
+        if entry is None or entry["stamp"] != stamp:
+            try:
+                ranges = read_cmap(path, font_index)
+            except (OSError, struct.error):
+                ranges = []
+            entry = self.fonts[key] = {"stamp": stamp, "ranges": ranges}
+            self._dirty = True
+        return entry["ranges"]
+
+
+# --- font chains ---
+
+
+def _covers(starts, ends, cp):
+    i = bisect_right(starts, cp) - 1
+    return i >= 0 and cp <= ends[i]
+
+
+class FontChain:
+    """
+    A primary font followed by fallback fonts at the same pixel size.
+
+    `primary_ranges` is the primary font's coverage; `fallbacks` is a list of
+    (path, face index, ranges). Fallback fonts are only opened once a
+    character needs them.
+    """
+
+    def __init__(self, primary, primary_ranges, fallbacks=()):
+        self.primary = primary
+        self._faces = [None] + [(path, face) for path, face, _ in fallbacks]
+        self._fonts = [primary] + [None] * len(fallbacks)
+        self._coverage = []
+        for ranges in [primary_ranges] + [ranges for _, _, ranges in fallbacks]:
+            self._coverage.append(([r[0] for r in ranges], [r[1] for r in ranges]))
+        self._slots = {}
+
+    def _lookup(self, ch):
+        if unicodedata.category(ch) in _INHERIT_CATEGORIES:
+            return INHERIT
+        cp = ord(ch)
+        for slot, (starts, ends) in enumerate(self._coverage):
+            if _covers(starts, ends, cp):
+                return slot
+        # Nothing has it; let the primary font draw its missing-glyph box
+        return 0
+
+    def font(self, slot):
+        font = self._fonts[slot]
+        if font is None:
+            try:
+                path, face = self._faces[slot]
+                font = ImageFont.truetype(path, self.primary.size, index=face)
+            except OSError:
+                font = self.primary
+            self._fonts[slot] = font
+        return font
+
+    def runs(self, text):
+        """Splits text into [(substring, font)] runs of consecutive characters."""
+        slots = self._slots
+        bounds = []
+        current = None
+        for i, ch in enumerate(text):
+            slot = slots.get(ch)
+            if slot is None:
+                slot = slots[ch] = self._lookup(ch)
+            if slot == INHERIT:
+                if current is not None:
+                    continue
+                slot = 0
+            if slot != current:
+                bounds.append((i, slot))
+                current = slot
+        if len(bounds) <= 1:
+            return [(text, self.font(current or 0))]
+        ends = [start for start, _ in bounds[1:]] + [len(text)]
+        return [
+            (text[start:end], self.font(slot))
+            for (start, slot), end in zip(bounds, ends)
+        ]
+
+
+_index = None
+_chains = {}
+
+
+def coverage_index():
+    """Process-wide coverage index, loaded from the cache on first use."""
+    global _index
+    if _index is None:
+        _index = CoverageIndex()
+    return _index
+
+
+def font_chain(font):
+    """The memoized FontChain for a font returned by load_font_family."""
+    path = getattr(font, "path", None)
+    key = (path if isinstance(path, str) else id(font), getattr(font, "size", 0))
+    chain = _chains.get(key)
+    if chain is not None:
+        return chain
+
+    index = coverage_index()
+    if isinstance(path, str):
+        primary_ranges = index.ranges(path, font.index)
+    elif getattr(font, "font_bytes", None):
+        primary_ranges = read_cmap(font.font_bytes)
+    else:
+        # Bitmap fonts cannot be combined with others; assume full coverage
+        chain = _chains[key] = FontChain(font, [[0, 0x10FFFF]])
+        return chain
+
+    fallbacks = []
+    own = (os.path.abspath(path), font.index) if isinstance(path, str) else None
+    installed = font_index()
+    for name in FALLBACK_FONTS:
+        found = installed.find(name)
+        if found is None:
+            continue
+        found_path, face = os.path.abspath(found[0]), found[1]
+        if (found_path, face) != own:
+            fallbacks.append((found_path, face, index.ranges(found_path, face)))
+    index.save()
+
+    chain = _chains[key] = FontChain(font, primary_ranges, fallbacks)
+    return chain
+
+
+# --- drawing ---
+
+
+def _baseline(chain, runs, y, anchor):
+    vertical = anchor[1]
+    if vertical == "s":
+        return y
+    ascent, descent = chain.primary.getmetrics()
+    if vertical == "a":
+        return y + ascent
+    if vertical == "d":
+        return y - descent
+    if vertical == "m":
+        return y + (ascent - descent) / 2
+    boxes = [font.getbbox(part, anchor="ls") for part, font in runs]
+    if vertical == "t":
+        return y - min(box[1] for box in boxes)
+    return y - max(box[3] for box in boxes)
+
+
+def _layout(chain, runs, xy, anchor):
+    widths = [font.getlength(part) for part, font in runs]
+    x, y = xy
+    x -= sum(widths) * {"l": 0, "m": 0.5, "r": 1}.get(anchor[0], 0)
+    baseline = _baseline(chain, runs, y, anchor)
+    origins = []
+    for width in widths:
+        origins.append((x, baseline))
+        x += width
+    return origins
+
+
+def draw_text(draw, xy, text, font, fill, anchor=None):
+    """
+    draw.text() with per-character fallback fonts.
+
+    Text the primary font covers is passed straight to draw.text(); mixed
+    text is drawn run by run on a shared baseline, honouring the anchor.
+    """
+    chain = font_chain(font)
+    runs = chain.runs(text)
+    if len(runs) == 1:
+        draw.text(xy, text, font=runs[0][1], fill=fill, anchor=anchor)
+        return
+    for (part, run_font), origin in zip(runs, _layout(chain, runs, xy, anchor or "la")):
+        draw.text(origin, part, font=run_font, fill=fill, anchor="ls")
+
+
+def text_bbox(draw, xy, text, font, anchor=None):
+    """draw.textbbox() counterpart of draw_text()."""
+    chain = font_chain(font)
+    runs = chain.runs(text)
+    if len(runs) == 1:
+        return draw.textbbox(xy, text, font=runs[0][1], anchor=anchor)
+    boxes = [run_font.getbbox(part, anchor="ls") for part, run_font in runs]
+    origins = _layout(chain, runs, xy, anchor or "la")
+    return (
+        min(ox + box[0] for (ox, _), box in zip(origins, boxes)),
+        min(oy + box[1] for (_, oy), box in zip(origins, boxes)),
+        max(ox + box[2] for (ox, _), box in zip(origins, boxes)),
+        max(oy + box[3] for (_, oy), box in zip(origins, boxes)),
+    )
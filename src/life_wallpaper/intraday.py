@@ -0,0 +1,144 @@
+"""Keep a day-progress ring current by repainting only its own region."""
+
+import io
+import os
+import struct
+import time
+from datetime import datetime
+
+import numpy as np
+
+from .utils import day_fraction, parse_size, positive_int
+
+DEFAULT_INTERVAL = 300  # seconds between ticks
+TICK_BUDGET_MS = 100
+OUTPUT_FILE = "life_wallpaper_intraday.bmp"
+
+
+class BmpFrame:
+    """
+    A 24-bit BMP encoding of a frame whose pixel rows can be patched in place.
+
+    BMP stores raw rows, so re-encoding a changed region is a strided copy
+    into the cached file bytes rather than a full compression pass.
+    """
+
+    def __init__(self, img):
+        buf = io.BytesIO()
+        img.convert("RGB").save(buf, "BMP")
+        self.data = bytearray(buf.getvalue())
+        (offset,) = struct.unpack_from("<I", self.data, 10)
+        w, h = img.size
+        stride = (w * 3 + 3) & ~3
+        rows = np.frombuffer(self.data, np.uint8, h * stride, offset)
+        # Rows are stored bottom-up in BGR order
+        self._rows = rows.reshape(h, stride)[::-1]
+
+    def patch(self, img, box):
+        """Copies the pixels of `img` inside `box` into the encoded bytes."""
+        x0, y0, x1, y1 = box
+        tile = np.asarray(img.crop(box).convert("RGB"))
+        self._rows[y0:y1, x0 * 3 : x1 * 3] = tile[..., ::-1].reshape(y1 - y0, -1)
+
+    def write(self, path):
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(self.data)
+        os.replace(tmp, path)
+
+
+class IntradayUpdater:
+    """
+    Renders the day's frame once without the day ring, then on every tick
+    restores the ring's background, redraws the ring and patches the encoded
+    frame. Themes opt in by providing intraday_box() and repaint_intraday().
+    """
+
+    def __init__(self, config, size=None, now=None):
+        from .main import get_renderer
+
+        now = now or datetime.now()
+        base = config.model_copy(deep=True)
+        base.render.intraday = False
+        self.renderer = get_renderer(base, today=now.date(), size=size, now=now)
+        if not hasattr(self.renderer, "intraday_box"):
+            raise ValueError(f"Theme '{config.theme}' has no intraday widget")
+
+        self.day = now.date()
+        self.frame = self.renderer.render_image()
+        self.box = self.renderer.intraday_box()
+        self.background = self.frame.crop(self.box)
+        self.encoded = BmpFrame(self.frame)
+
+    def tick(self, now, path=None):
+        """Repaints the ring for `now`; returns per-stage timings in ms."""
+        start = time.perf_counter()
+        self.frame.paste(self.background, self.box[:2])
+        self.renderer.repaint_intraday(self.frame, now)
+        drawn = time.perf_counter()
+        self.encoded.patch(self.frame, self.box)
+        encoded = time.perf_counter()
+        if path:
+            self.encoded.write(path)
+        written = time.perf_counter()
+        return {
+            "draw": (drawn - start) * 1000,
+            "encode": (encoded - drawn) * 1000,
+            "write": (written - encoded) * 1000,
+            "total": (written - start) * 1000,
+        }
+
+
+def add_arguments(parser):
+    parser.add_argument("--config", help="Path to life_config.json")
+    parser.add_argument("--theme", help="Theme to use (defaults to config)")
+    parser.add_argument(
+        "--size", type=parse_size, help="Output resolution, e.g. 3840x2160"
+    )
+    parser.add_argument(
+        "--interval",
+        type=positive_int,
+        default=DEFAULT_INTERVAL,
+        help="Seconds between updates",
+    )
+    parser.add_argument(
+        "--ticks", type=int, default=0, help="Stop after N updates (0 = run forever)"
+    )
+    parser.add_argument(
+        "--no-wallpaper",
+        action="store_true",
+        help="Only write the image, do not set it as wallpaper",
+    )
+
+
+def run(args):
+    from .config_snapshot import load_config
+    from .main import set_wallpaper
+
+    config = load_config(args.config)
+    if args.theme:
+        config.theme = args.theme
+    out_path = os.path.join(os.getcwd(), OUTPUT_FILE)
+
+    updater = None
+    done = 0
+    while True:
+        now = datetime.now()
+        if updater is None or now.date() != updater.day:
+            print("Rendering base frame...")
+            updater = IntradayUpdater(config, size=args.size, now=now)
+
+        timings = updater.tick(now, out_path)
+        over = "  (over budget)" if timings["total"] > TICK_BUDGET_MS else ""
+        print(
+            f"{now:%H:%M} day {day_fraction(now):.0%}: "
+            f"draw {timings['draw']:.1f} ms, encode {timings['encode']:.1f} ms, "
+            f"write {timings['write']:.1f} ms, total {timings['total']:.1f} ms{over}"
+        )
+        if not args.no_wallpaper:
+            set_wallpaper(out_path)
+
+        done += 1
+        if args.ticks and done >= args.ticks:
+            return 0
+        time.sleep(args.interval - time.time() % args.interval)
@@ -0,0 +1,119 @@
+"""
+Append-only journal of finished batch renders, so restarted runs resume.
+
+Every wallpaper that reached its sink adds one line, a compact JSON array
+of profile id, date, theme, a hash of the job (the validated config, sink,
+output key, format and size) and a hash of the stored bytes. On restart the
+entries of the run's date are read back, and a render is skipped when the
+job hash matches and the sink still holds those bytes; anything else, and
+failures, which were never written, is rendered again. Entries of other
+dates are not kept in memory, so a journal that is never cleared costs
+disk space only.
+
+Lines are written as renders finish but only fsynced every SYNC_EVERY
+entries or SYNC_INTERVAL seconds, whichever comes first, and on close. Both
+are checked when an entry is written, so a run that stalls syncs on its
+next entry or when it closes the journal. A crash can lose the entries
+since the last sync, and those profiles are rendered once more. Rendering
+is idempotent, so that only costs time. A line cut short by the crash is
+ignored.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+SYNC_EVERY = 64  # entries between fsyncs
+SYNC_INTERVAL = 2.0  # seconds between fsyncs at most
+HASH_CHARS = 32  # hex digits of the sha256 kept per entry
+
+
+def output_hash(data):
+    """Short hash of a stored wallpaper, as kept in the journal."""
+    return hashlib.sha256(data).hexdigest()[:HASH_CHARS]
+
+
+def job_hash(*parts):
+    """Short hash of the JSON-serializable inputs that decide an output."""
+    text = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:HASH_CHARS]
+
+
+class Journal:
+    """
+    Completed renders of the date `day`, backed by the file at `path`.
+    Thread-safe; entries arrive from sink callbacks.
+    """
+
+    def __init__(self, path, day, sync_every=SYNC_EVERY, sync_interval=SYNC_INTERVAL):
+        self.path = path
+        self.day = day.isoformat()
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self._lock = threading.Lock()
+        self._done = {}
+        self._pending = 0
+        self._synced = time.monotonic()
+        torn = self._load()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, "a", encoding="utf-8")
+        if torn:
+            self._file.write("\n")  # Keep the next entry off the torn line
+
+    def _load(self):
+        """Reads the entries of the day; True when the file ends mid-line."""
+        line = "\n"
+        try:
+            with open(self.path, encoding="utf-8", errors="replace") as f:
+                for line in f:
+                    # Cheap test first: most lines of a long-lived journal are old
+                    if self.day not in line:
+                        continue
+                    try:
+                        profile, day, theme, job, digest = json.loads(line)
+                    except (ValueError, TypeError):
+                        continue
+                    if day == self.day:
+                        self._done[(profile, theme, job)] = digest
+        except FileNotFoundError:
+            pass
+        return not line.endswith("\n")
+
+    def __len__(self):
+        return len(self._done)
+
+    def done(self, profile, theme, job):
+        """The output hash of the finished render of this job, or None."""
+        with self._lock:
+            return self._done.get((profile, theme, job))
+
+    def record(self, profile, theme, job, digest):
+        entry = [profile, self.day, theme, job, digest]
+        line = json.dumps(entry, ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            self._done[(profile, theme, job)] = digest
+            self._file.write(line + "\n")
+            self._pending += 1
+            due = time.monotonic() - self._synced >= self.sync_interval
+            if self._pending >= self.sync_every or due:
+                self._sync()
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+        self._synced = time.monotonic()
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._sync()
+                self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
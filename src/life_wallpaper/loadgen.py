@@ -0,0 +1,407 @@
+"""Generate synthetic profiles and measure multi-process rendering throughput."""
+
+import os
+import sys
+import time
+import random
+import functools
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+
+from . import buffers
+from .utils import parse_size, positive_int
+
+NAME_PARTS = [
+    "Alex",
+    "Maria",
+    "José",
+    "Zoë",
+    "Søren",
+    "Łukasz",
+    "Nguyễn",
+    "Ngozi",
+    "李小龙",
+    "さくら",
+    "김민준",
+    "Αλέξανδρος",
+    "Владимир",
+    "محمد",
+    "अर्जुन",
+    "O'Connor",
+    "van der Berg",
+    "Jean-Luc",
+    "🚀",
+    "✨",
+]
+WORDS = [
+    "TIME",
+    "IS",
+    "THE",
+    "ONLY",
+    "NON-RENEWABLE",
+    "RESOURCE",
+    "DISCIPLINE",
+    "FREEDOM",
+    "STAY",
+    "HARD",
+    "MEMENTO",
+    "MORI",
+    "CARPE",
+    "DIEM",
+    "NOW",
+    "ÉLAN",
+    "FÜR",
+    "IMMER",
+    "一期一会",
+    "🔥",
+]
+# Collection sizes drawn per profile; the big ones stress config validation
+LIST_SIZES = [0, 1, 5, 50, 1000, 20000]
+# Frame slots of the pipelined mode are sized for this unless --size is given
+PIPELINE_SIZE = (3840, 2160)
+# Seconds to wait for every worker to start and warm up
+WARMUP_TIMEOUT = 300
+
+
+def _phrase(rng, low, high):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(low, high)))
+
+
+def synthetic_profile(seed, themes=None):
+    """Builds one randomized config dict, fully determined by `seed`."""
+    from .themes import THEMES
+
+    rng = random.Random(seed)
+    dob = date(1930, 1, 1) + timedelta(days=rng.randrange(90 * 365))
+    name = " ".join(rng.choice(NAME_PARTS) for _ in range(rng.choice([1, 2, 3, 12])))
+    return {
+        "theme": rng.choice(themes or sorted(THEMES)),
+        "profile": {
+            "name": name,
+            "dob": dob.isoformat(),
+            "life_expectancy": rng.randint(40, 110),
+        },
+        "collections": {
+            "mantras": [_phrase(rng, 1, 6) for _ in range(rng.choice(LIST_SIZES))],
+            "footer_quotes": [
+                _phrase(rng, 4, 25) for _ in range(rng.choice(LIST_SIZES))
+            ],
+        },
+    }
+
+
+def generate_configs(count, seed=0, themes=None):
+    """Yields `count` validated AppConfigs from consecutive seeds."""
+    from .config import AppConfig
+
+    for i in range(count):
+        yield AppConfig(**synthetic_profile(seed + i, themes))
+
+
+def _peak_rss_bytes():
+    """Peak resident set size of this process, or None if unavailable."""
+    try:
+        import resource
+    except ImportError:
+        resource = None
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports kilobytes, macOS bytes
+        return peak if sys.platform == "darwin" else peak * 1024
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [
+                ("cb", wintypes.DWORD),
+                ("PageFaultCount", wintypes.DWORD),
+                ("PeakWorkingSetSize", ctypes.c_size_t),
+                ("WorkingSetSize", ctypes.c_size_t),
+                ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+                ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                ("PagefileUsage", ctypes.c_size_t),
+                ("PeakPagefileUsage", ctypes.c_size_t),
+            ]
+
+        counters = PROCESS_MEMORY_COUNTERS()
+        counters.cb = ctypes.sizeof(counters)
+        handle = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(
+            handle, ctypes.byref(counters), counters.cb
+        ):
+            return counters.PeakWorkingSetSize
+    return None
+
+
+# Shared by the workers of a run_load pool, see _wait_for_workers
+_barrier = None
+
+
+def _warm_worker(barrier=None):
+    # Pay for imports and font loading before the clock starts
+    from .api import render_image
+    from .config import AppConfig
+
+    global _barrier
+    _barrier = barrier
+    render_image(AppConfig(**synthetic_profile(0)), size=(64, 36))
+
+
+def _wait_for_workers():
+    """
+    Blocks until every worker runs this task. A blocked worker cannot take a
+    second one, so one task each per worker makes all of them start, and
+    finish their warm-up initializer, before any returns.
+    """
+    _barrier.wait(WARMUP_TIMEOUT)
+
+
+def _render_job(seed, themes, size, encode, on):
+    from .api import render_image
+    from .config import AppConfig
+
+    build_start = time.perf_counter()
+    config = AppConfig(**synthetic_profile(seed, themes))
+    build = time.perf_counter() - build_start
+
+    cpu_start = time.process_time()
+    start = time.perf_counter()
+    result = render_image(config, on=on, size=size, format="PNG" if encode else None)
+    if not encode:
+        buffers.release(result)
+    latency = time.perf_counter() - start
+    return {
+        "pid": os.getpid(),
+        "theme": config.theme,
+        "latency": latency,
+        "build": build,
+        "cpu": time.process_time() - cpu_start,
+        "peak_rss": _peak_rss_bytes(),
+        "pool": buffers.pool_stats(),
+    }
+
+
+def _pipeline_frame(seed, themes, size, on):
+    from .api import render_image
+    from .config import AppConfig
+
+    return render_image(AppConfig(**synthetic_profile(seed, themes)), on=on, size=size)
+
+
+def run_pipelined_load(
+    count,
+    draw_workers=1,
+    encode_workers=1,
+    depth=None,
+    size=None,
+    seed=0,
+    themes=None,
+    on=None,
+):
+    """
+    Renders `count` synthetic profiles through the two-stage pipeline, with
+    drawing and PNG encoding in separate worker pools; see pipeline.run_pipeline.
+    """
+    from .pipeline import run_pipeline
+
+    size = size or PIPELINE_SIZE
+    frame = functools.partial(
+        _pipeline_frame, themes=themes, size=size, on=on or date.today()
+    )
+    return run_pipeline(
+        range(seed, seed + count),
+        frame,
+        size,
+        draw_workers=draw_workers,
+        encode_workers=encode_workers,
+        depth=depth,
+    )
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    idx = min(int(round(pct / 100 * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[idx]
+
+
+def run_load(
+    count, concurrency=None, size=None, encode=True, seed=0, themes=None, on=None
+):
+    """
+    Renders `count` synthetic profiles across `concurrency` worker processes.
+
+    Returns a report dict with throughput, latency percentiles, CPU
+    utilisation (worker CPU time over wall time x workers) and the peak RSS
+    of every worker. Building and validating each config is timed separately
+    ("build_mean") and excluded from the render latencies, but not from the
+    throughput.
+    """
+    concurrency = concurrency or os.cpu_count() or 1
+    on = on or date.today()
+
+    context = multiprocessing.get_context()
+    barrier = context.Barrier(concurrency)
+    with ProcessPoolExecutor(
+        max_workers=concurrency,
+        mp_context=context,
+        initializer=_warm_worker,
+        initargs=(barrier,),
+    ) as pool:
+        # Start the clock only once every worker has warmed up
+        warmups = [pool.submit(_wait_for_workers) for _ in range(concurrency)]
+        for future in warmups:
+            future.result()
+        start = time.perf_counter()
+        futures = [
+            pool.submit(_render_job, seed + i, themes, size, encode, on)
+            for i in range(count)
+        ]
+        results = [f.result() for f in futures]
+        wall = time.perf_counter() - start
+
+    latencies = sorted(r["latency"] for r in results)
+    cpu_total = sum(r["cpu"] for r in results)
+    workers = {}
+    for r in results:
+        stats = workers.setdefault(r["pid"], {"renders": 0, "peak_rss": 0})
+        stats["renders"] += 1
+        stats["peak_rss"] = max(stats["peak_rss"], r["peak_rss"] or 0)
+        # Pool counters are cumulative; keep the worker's latest
+        if r["pool"] and (
+            not stats.get("pool")
+            or r["pool"]["hits"] + r["pool"]["misses"]
+            > stats["pool"]["hits"] + stats["pool"]["misses"]
+        ):
+            stats["pool"] = r["pool"]
+    by_theme = {}
+    for r in results:
+        by_theme[r["theme"]] = by_theme.get(r["theme"], 0) + 1
+
+    return {
+        "count": count,
+        "concurrency": concurrency,
+        "wall": wall,
+        "throughput": count / wall if wall else 0.0,
+        "latency": {
+            "mean": sum(latencies) / len(latencies) if latencies else 0.0,
+            "p50": _percentile(latencies, 50),
+            "p90": _percentile(latencies, 90),
+            "p99": _percentile(latencies, 99),
+            "max": latencies[-1] if latencies else 0.0,
+        },
+        "build_mean": (
+            sum(r["build"] for r in results) / len(results) if results else 0.0
+        ),
+        "cpu_utilisation": cpu_total / (wall * concurrency) if wall else 0.0,
+        "workers": workers,
+        "themes": by_theme,
+    }
+
+
+def format_report(report):
+    lat = report["latency"]
+    lines = [
+        f"Rendered {report['count']} wallpapers with {report['concurrency']} worker(s) "
+        f"in {report['wall']:.2f}s",
+        f"Throughput: {report['throughput']:.2f} wallpapers/s",
+        "Latency (ms): "
+        + "  ".join(
+            f"{k} {lat[k] * 1000:.0f}" for k in ("mean", "p50", "p90", "p99", "max")
+        ),
+        f"Config build + validation (mean): {report['build_mean'] * 1000:.0f} ms",
+        f"CPU utilisation: {report['cpu_utilisation'] * 100:.0f}% of {report['concurrency']} core(s)",
+        "Themes: " + ", ".join(f"{k}={v}" for k, v in sorted(report["themes"].items())),
+        "Workers:",
+    ]
+    for pid, stats in sorted(report["workers"].items()):
+        rss = (
+            f"{stats['peak_rss'] / 1024 / 1024:.0f} MiB" if stats["peak_rss"] else "n/a"
+        )
+        pool = stats.get("pool")
+        reuse = ""
+        if pool:
+            served = pool["hits"] + pool["misses"]
+            reuse = f", {pool['hits']}/{served} buffers reused"
+        lines.append(f"  pid {pid}: {stats['renders']} renders, peak RSS {rss}{reuse}")
+    return "\n".join(lines)
+
+
+def add_arguments(parser):
+    parser.add_argument(
+        "--count", type=positive_int, default=100, help="Profiles to render"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=positive_int,
+        help="Worker processes (default: CPU count)",
+    )
+    parser.add_argument(
+        "--size", type=parse_size, help="Output resolution, e.g. 1920x1080"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="First profile seed")
+    parser.add_argument(
+        "--themes", help="Comma-separated themes to draw from (default: all)"
+    )
+    parser.add_argument(
+        "--no-encode", action="store_true", help="Skip in-memory PNG encoding"
+    )
+    parser.add_argument(
+        "--pool",
+        action="store_true",
+        help="Reuse canvas buffers between renders in every worker",
+    )
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="Draw and encode in separate worker pools linked by shared memory",
+    )
+    parser.add_argument(
+        "--draw-workers", type=positive_int, default=1, help="Pipeline draw processes"
+    )
+    parser.add_argument(
+        "--encode-workers",
+        type=positive_int,
+        default=1,
+        help="Pipeline encode processes",
+    )
+    parser.add_argument(
+        "--depth",
+        type=positive_int,
+        help="Pipeline frames in flight (default: one per worker)",
+    )
+
+
+def run(args):
+    if args.pool:
+        buffers.enable()
+    themes = args.themes.split(",") if args.themes else None
+    if args.pipeline:
+        from .pipeline import format_report as format_pipeline_report
+
+        report = run_pipelined_load(
+            args.count,
+            draw_workers=args.draw_workers,
+            encode_workers=args.encode_workers,
+            depth=args.depth,
+            size=args.size,
+            seed=args.seed,
+            themes=themes,
+        )
+        print(format_pipeline_report(report))
+        return 0
+
+    report = run_load(
+        args.count,
+        concurrency=args.concurrency,
+        size=args.size,
+        encode=not args.no_encode,
+        seed=args.seed,
+        themes=themes,
+    )
+    print(format_report(report))
+    return 0
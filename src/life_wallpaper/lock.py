@@ -0,0 +1,73 @@
+"""
+Cross-process file lock.
+
+Uses an advisory lock on a small lock file: fcntl.flock on POSIX and
+msvcrt.locking on Windows. The operating system drops the lock when its
+holder exits, so a crashed or killed process never leaves a stale lock.
+"""
+
+import os
+import time
+
+if os.name == "nt":
+    import msvcrt
+else:
+    import fcntl
+
+POLL_INTERVAL = 0.1
+
+
+class FileLock:
+    """Exclusive lock on `path`, usable as a context manager."""
+
+    def __init__(self, path):
+        self.path = path
+        self._fd = None
+        # Whether acquire() had to wait for another holder
+        self.contended = False
+
+    def _try_lock(self):
+        try:
+            if os.name == "nt":
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_NBLCK, 1)
+            else:
+                fcntl.flock(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+    def acquire(self, timeout=None):
+        """Waits up to `timeout` seconds (None = forever); returns success."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        self.contended = False
+        while not self._try_lock():
+            self.contended = True
+            if deadline is not None and time.monotonic() >= deadline:
+                os.close(self._fd)
+                self._fd = None
+                return False
+            time.sleep(POLL_INTERVAL)
+        return True
+
+    def release(self):
+        if self._fd is None:
+            return
+        try:
+            if os.name == "nt":
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
@@ -1,8 +1,32 @@
+import os
 import sys
+import json
+import time
 import ctypes
-from .config import load_config
-from .renderer import WallpaperRenderer
-from .themes.dashboard import DashboardRenderer
+import argparse
+from .config_snapshot import load_config
+from . import batch, intraday, loadgen, profiling, scheduler, timelapse
+from .lock import FileLock
+from .themes import DEFAULT_THEME, THEMES
+from .utils import cache_dir
+
+# Subcommand name -> module providing add_arguments(parser) and run(args)
+COMMANDS = {
+    "profile": profiling,
+    "loadtest": loadgen,
+    "intraday": intraday,
+    "batch": batch,
+    "schedule": scheduler,
+    "timelapse": timelapse,
+}
+
+# Concurrent updates (scheduled task, logon trigger, manual run) share one
+# render: the first takes the lock, the rest wait and reuse its output
+RENDER_LOCK = "render.lock"
+LAST_RENDER = "last_render.json"
+LOCK_WAIT = 120  # seconds; afterwards render anyway
+# Set by scripts/guard_runner.py: Unix time at which it kills this process
+DEADLINE_ENV = "LIFE_WALLPAPER_DEADLINE"
 
 
 def set_wallpaper(path: str):
@@ -17,29 +41,121 @@ def set_wallpaper(path: str):
         print(f"Wallpaper generated at: {path}")
 
 
-def get_renderer(config):
+def get_renderer(config, **options):
     """Factory to return the correct renderer based on config theme."""
     print(f"Theme selected: {config.theme}")
-    if config.theme == "original":
-        return DashboardRenderer(config)
-    elif config.theme == "og":
-        return WallpaperRenderer(config)
-    else:
+    renderer_cls = THEMES.get(config.theme)
+    if renderer_cls is None:
         # Fallback
         print(f"Unknown theme '{config.theme}', defaulting to 'original' (Dashboard)")
-        return DashboardRenderer(config)
+        renderer_cls = THEMES[DEFAULT_THEME]
+    return renderer_cls(config, **options)
+
 
+def lock_wait():
+    """
+    Seconds to wait for another update's lock. Under the watchdog only half
+    of the time left, so that the render itself still fits before it kills
+    this process as hung.
+    """
+    try:
+        deadline = float(os.environ[DEADLINE_ENV])
+    except (KeyError, ValueError):
+        return LOCK_WAIT
+    return max(0.0, min(LOCK_WAIT, (deadline - time.time()) / 2))
 
-def main():
+
+def parse_arguments(argv=None):
+    """Parses command line arguments; no subcommand means a normal update."""
+    parser = argparse.ArgumentParser(
+        prog="life-wallpaper", description="Life progress wallpaper generator"
+    )
+    parser.add_argument(
+        "--publish",
+        metavar="SINK",
+        help="Also store the wallpaper in a sink such as s3://BUCKET/PREFIX "
+        "or dir:PATH (see batch --sink)",
+    )
+    subparsers = parser.add_subparsers(dest="command")
+    for name, module in COMMANDS.items():
+        module.add_arguments(subparsers.add_parser(name, help=module.__doc__))
+    args = parser.parse_args(argv)
+    if args.publish and args.command:
+        parser.error(
+            f"--publish only applies to a plain update, not to '{args.command}' "
+            "(batch and schedule take --sink)"
+        )
+    return args
+
+
+def main(argv=None):
     """Main execution point."""
-    print("Loading configuration...")
-    config = load_config()
+    args = parse_arguments(argv)
+    if args.command:
+        return COMMANDS[args.command].run(args)
+
+    started = time.time()
+    lock = FileLock(os.path.join(cache_dir(), RENDER_LOCK))
+    if not lock.acquire(timeout=lock_wait()):
+        print("Another update is still running, rendering anyway.")
+    try:
+        output_path = _reuse_render(started) if lock.contended else None
+        if output_path:
+            print(f"Reusing the render that just finished: {output_path}")
+        else:
+            print("Loading configuration...")
+            config = load_config()
 
-    app = get_renderer(config)
-    output_path = app.render()
+            # Profiles in another time zone see their own date
+            app = get_renderer(config, now=scheduler.profile_now(config))
+            output_path = app.render()
+            _record_render(output_path)
+    finally:
+        lock.release()
 
     set_wallpaper(output_path)
+    if args.publish:
+        publish(args.publish, output_path)
+    return 0
+
+
+def publish(spec, path):
+    """Stores the rendered file in a sink; a failure leaves the wallpaper set."""
+    from .sinks import open_sink
+
+    name = os.path.basename(path)
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+        with open_sink(spec) as sink:
+            outcome = sink.put(name, data).result()
+        print(f"Published {sink.location(name)} ({outcome})")
+    except Exception as e:
+        print(f"Error publishing wallpaper: {e}")
+
+
+def _record_render(path):
+    record = os.path.join(cache_dir(), LAST_RENDER)
+    tmp = f"{record}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"path": os.path.abspath(path), "finished": time.time()}, f)
+        os.replace(tmp, record)
+    except OSError:
+        pass
+
+
+def _reuse_render(since):
+    """Output of a render that finished after `since`, if there is one."""
+    try:
+        with open(os.path.join(cache_dir(), LAST_RENDER), encoding="utf-8") as f:
+            last = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if last.get("finished", 0) >= since and os.path.exists(last.get("path", "")):
+        return last["path"]
+    return None
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
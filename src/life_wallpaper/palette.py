@@ -0,0 +1,90 @@
+import math
+
+import numpy as np
+from PIL import Image, ImageColor, ImageDraw
+
+# Coverage steps kept for anti-aliased text edges on an indexed canvas
+TEXT_LEVELS = 32
+
+
+class PaletteDraw:
+    """
+    ImageDraw wrapper for 8-bit indexed ("P") canvases.
+
+    Shapes go straight to ImageDraw, which gives every RGB fill its own
+    palette entry. Plain ImageDraw renders text on "P" images without
+    anti-aliasing, so text is rasterized into a coverage mask instead,
+    quantized to TEXT_LEVELS steps, and each (background entry, ink, step)
+    blend is mapped to a palette entry of its own. Flat-colour themes keep
+    their smooth glyph edges at one byte per pixel.
+    """
+
+    def __init__(self, img):
+        self.img = img
+        self._draw = ImageDraw.Draw(img)
+        # Measure text the way an RGB canvas would
+        self._draw.fontmode = "L"
+        # Per ink colour: (background entry, glyph coverage) -> palette entry
+        self._luts = {}
+
+    def __getattr__(self, name):
+        return getattr(self._draw, name)
+
+    def _index(self, color):
+        try:
+            return self.img.palette.getcolor(color, self.img)
+        except ValueError:
+            # Palette full: settle for the closest existing entry
+            entries = np.frombuffer(bytes(self.img.palette.palette), np.uint8)
+            entries = entries.reshape(-1, 3).astype(np.int32)
+            return int(((entries - color) ** 2).sum(axis=1).argmin())
+
+    @staticmethod
+    def _new_lut():
+        lut = np.full((256, 256), -1, dtype=np.int16)
+        # Coverage that rounds down to step 0 leaves the background alone
+        faint = -(-128 // (TEXT_LEVELS - 1))
+        lut[:, :faint] = np.arange(256)[:, None]
+        return lut
+
+    def _blend(self, bg_index, ink, level):
+        palette = self.img.palette.palette
+        bg = tuple(palette[3 * bg_index : 3 * bg_index + 3])
+        a = level * 255 / (TEXT_LEVELS - 1)
+        color = tuple(int((b * (255 - a) + i * a) / 255 + 0.5) for b, i in zip(bg, ink))
+        return self._index(color)
+
+    def text(self, xy, text, fill=None, font=None, anchor=None, **kwargs):
+        box = self._draw.textbbox(xy, text, font=font, anchor=anchor, **kwargs)
+        # Anti-aliased edges can spill a pixel or two past the reported box.
+        # The tile also covers the anchor point: drawing at a negative offset
+        # would round the glyph origin the other way
+        pad = 3
+        x0 = max(min(int(box[0]) - pad, math.floor(xy[0])), 0)
+        y0 = max(min(int(box[1]) - pad, math.floor(xy[1])), 0)
+        x1 = min(int(box[2]) + pad, self.img.width)
+        y1 = min(int(box[3]) + pad, self.img.height)
+        if x0 >= x1 or y0 >= y1:
+            return
+
+        # Integer offsets keep the sub-pixel phase of the glyphs unchanged
+        mask = Image.new("L", (x1 - x0, y1 - y0), 0)
+        ImageDraw.Draw(mask).text(
+            (xy[0] - x0, xy[1] - y0), text, fill=255, font=font, anchor=anchor, **kwargs
+        )
+        coverage = np.asarray(mask)
+        ink = ImageColor.getrgb(fill) if isinstance(fill, str) else tuple(fill[:3])
+        lut = self._luts.get(ink)
+        if lut is None:
+            lut = self._luts[ink] = self._new_lut()
+
+        region = np.asarray(self.img.crop((x0, y0, x1, y1)))
+        blended = lut[region, coverage]
+        missing = blended < 0
+        if missing.any():
+            pairs = set(zip(region[missing].tolist(), coverage[missing].tolist()))
+            for bg_index, alpha in pairs:
+                level = (alpha * (TEXT_LEVELS - 1) + 127) // 255
+                lut[bg_index, alpha] = self._blend(bg_index, ink, level)
+            blended = lut[region, coverage]
+        self.img.paste(Image.fromarray(blended.astype(np.uint8), "P"), (x0, y0))
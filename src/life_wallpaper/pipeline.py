@@ -0,0 +1,286 @@
+"""
+Two-stage render pipeline: draw workers hand raw frames to encode workers.
+
+Drawing (Python + ImageDraw) and PNG deflate have very different CPU
+profiles, so they get separate process pools that can be sized
+independently. Frames travel through a fixed ring of shared-memory slots
+instead of being pickled through a pipe: a draw worker copies its pixels
+into a free slot and queues only the slot number, and the encode worker
+returns the slot as soon as it has read the pixels back. The number of
+slots bounds the frames in flight, so fast drawing blocks on a free slot
+(backpressure) rather than piling frames up in memory.
+"""
+
+import io
+import os
+import queue
+import threading
+import time
+import traceback
+import multiprocessing
+from multiprocessing.shared_memory import SharedMemory
+
+from PIL import Image
+
+from . import buffers
+
+# Renderers produce RGB or P frames; 3 bytes per pixel fits both
+BYTES_PER_PIXEL = 3
+_POLL = 1.0  # seconds between worker liveness checks while waiting
+
+
+def encode_png(img, job):
+    """Default encode stage: PNG in memory; returns the encoded size."""
+    buf = io.BytesIO()
+    img.save(buf, "PNG")
+    return buf.tell()
+
+
+def _attach(names):
+    return [SharedMemory(name=name) for name in names]
+
+
+def _draw_worker(frame, jobs, free, ready, results, hello, names, slot_bytes):
+    slots = _attach(names)
+    hello.put(os.getpid())
+    frames = 0
+    busy = blocked = 0.0
+    while True:
+        job = jobs.get()
+        if job is None:
+            break
+        start = time.perf_counter()
+        try:
+            img = frame(job)
+            data = img.tobytes()
+            if len(data) > slot_bytes:
+                raise ValueError(
+                    f"{img.mode} frame of {img.size} does not fit a "
+                    f"{slot_bytes}-byte slot"
+                )
+            palette = img.getpalette() if img.mode == "P" else None
+            buffers.release(img)
+        except Exception:
+            results.put((job, None, traceback.format_exc()))
+            busy += time.perf_counter() - start
+            continue
+        drawn = time.perf_counter()
+        slot = free.get()
+        got_slot = time.perf_counter()
+        slots[slot].buf[: len(data)] = data
+        ready.put((slot, job, img.mode, img.size, palette, len(data)))
+        frames += 1
+        busy += (drawn - start) + (time.perf_counter() - got_slot)
+        blocked += got_slot - drawn
+    for shm in slots:
+        shm.close()
+    results.put(("draw", os.getpid(), frames, busy, blocked, None))
+
+
+def _encode_worker(encode, free, ready, results, hello, names, teardown):
+    slots = _attach(names)
+    hello.put(os.getpid())
+    frames = 0
+    busy = blocked = 0.0
+    while True:
+        wait_start = time.perf_counter()
+        item = ready.get()
+        start = time.perf_counter()
+        blocked += start - wait_start
+        if item is None:
+            break
+        slot, job, mode, size, palette, length = item
+        with slots[slot].buf[:length] as view:
+            img = Image.frombytes(mode, size, view)
+        # The pixels are in Pillow's own memory now; the slot can be refilled
+        free.put(slot)
+        if palette is not None:
+            img.putpalette(palette)
+        try:
+            results.put((job, encode(img, job), None))
+        except Exception:
+            results.put((job, None, traceback.format_exc()))
+        frames += 1
+        busy += time.perf_counter() - start
+    for shm in slots:
+        shm.close()
+    closed = None
+    if teardown is not None:
+        try:
+            closed = teardown()
+        except Exception:
+            closed = traceback.format_exc()
+    results.put(("encode", os.getpid(), frames, busy, blocked, closed))
+
+
+def _feed(jobs, job_queue, sentinels, fed):
+    try:
+        for job in jobs:
+            job_queue.put(job)
+            fed[0] += 1
+    except BaseException as e:
+        fed[1] = e
+    finally:
+        for _ in range(sentinels):
+            job_queue.put(None)
+
+
+def _get(results, procs):
+    """Next result; raises if a worker died instead of producing one."""
+    while True:
+        try:
+            return results.get(timeout=_POLL)
+        except queue.Empty:
+            dead = [p for p in procs if p.exitcode not in (None, 0)]
+            if dead:
+                raise RuntimeError(
+                    f"Pipeline worker {dead[0].pid} died with exit code "
+                    f"{dead[0].exitcode}"
+                )
+
+
+def run_pipeline(
+    jobs,
+    frame,
+    frame_size,
+    draw_workers=1,
+    encode_workers=1,
+    depth=None,
+    encode=encode_png,
+    on_result=None,
+    teardown=None,
+):
+    """
+    Pushes every job through draw workers (`frame(job)` -> PIL image no larger
+    than `frame_size`) and encode workers (`encode(img, job)` -> result).
+
+    `frame` and `encode` must be picklable, i.e. module-level functions or
+    partials of them. `depth` is the number of shared frame slots (default:
+    one per worker). `on_result(job, result, error)` is called in this
+    process as jobs complete, in completion order. `teardown()`, if given,
+    runs in every encode worker once it is done (to close what `encode`
+    opened); its return values are listed in the report's "teardown". Returns
+    a report with the overall throughput and the busy and blocked time of
+    each stage. Raises ValueError for fewer than one worker per stage or
+    frame slot, with which the run would never finish.
+    """
+    for name, value in [
+        ("draw_workers", draw_workers),
+        ("encode_workers", encode_workers),
+    ]:
+        if value < 1:
+            raise ValueError(f"Invalid {name} {value}, it must be at least 1")
+    if depth is not None and depth < 1:
+        raise ValueError(f"Invalid depth {depth}, it must be at least 1")
+    depth = depth or draw_workers + encode_workers
+    slot_bytes = frame_size[0] * frame_size[1] * BYTES_PER_PIXEL
+    ctx = multiprocessing.get_context()
+    slots = [SharedMemory(create=True, size=slot_bytes) for _ in range(depth)]
+    names = [shm.name for shm in slots]
+    job_queue = ctx.Queue(maxsize=2 * depth)
+    free, ready, results, hello = ctx.Queue(), ctx.Queue(), ctx.Queue(), ctx.Queue()
+    for i in range(depth):
+        free.put(i)
+
+    procs = [
+        ctx.Process(
+            target=_draw_worker,
+            args=(frame, job_queue, free, ready, results, hello, names, slot_bytes),
+            daemon=True,
+        )
+        for _ in range(draw_workers)
+    ] + [
+        ctx.Process(
+            target=_encode_worker,
+            args=(encode, free, ready, results, hello, names, teardown),
+            daemon=True,
+        )
+        for _ in range(encode_workers)
+    ]
+    try:
+        for p in procs:
+            p.start()
+        for _ in procs:
+            hello.get()
+
+        start = time.perf_counter()
+        fed = [0, None]  # jobs queued, error raised by the jobs iterable
+        feeder = threading.Thread(
+            target=_feed, args=(jobs, job_queue, draw_workers, fed), daemon=True
+        )
+        feeder.start()
+        done = errors = 0
+        stages = {"draw": [], "encode": []}
+        # Draw workers only report after the feeder's end-of-jobs sentinels
+        while len(stages["draw"]) < draw_workers or done < fed[0]:
+            item = _get(results, procs)
+            if len(item) == 6:
+                stages[item[0]].append(item[2:])
+                continue
+            job, result, error = item
+            done += 1
+            errors += error is not None
+            if on_result:
+                on_result(job, result, error)
+        wall = time.perf_counter() - start
+        feeder.join()
+        if fed[1] is not None:
+            raise fed[1]
+
+        for _ in range(encode_workers):
+            ready.put(None)
+        while len(stages["encode"]) < encode_workers:
+            stage, _, *stats = _get(results, procs)
+            stages[stage].append(stats)
+        for p in procs:
+            p.join()
+    finally:
+        for p in procs:
+            if p.is_alive():
+                p.terminate()
+        for shm in slots:
+            shm.close()
+            shm.unlink()
+
+    report = {
+        "count": done,
+        "errors": errors,
+        "wall": wall,
+        "throughput": done / wall if wall else 0.0,
+        "depth": depth,
+        "stages": {},
+        "teardown": [w[3] for w in stages["encode"] if teardown is not None],
+    }
+    for stage, workers in stages.items():
+        frames = sum(w[0] for w in workers)
+        busy = sum(w[1] for w in workers)
+        report["stages"][stage] = {
+            "workers": len(workers),
+            "frames": frames,
+            "busy": busy,
+            "blocked": sum(w[2] for w in workers),
+            # Frames per second the stage sustains with its current workers
+            "capacity": frames / busy * len(workers) if busy else 0.0,
+            "utilisation": busy / (wall * len(workers)) if wall else 0.0,
+        }
+    return report
+
+
+def format_report(report):
+    lines = [
+        f"Pipelined {report['count']} wallpapers in {report['wall']:.2f}s "
+        f"({report['throughput']:.2f}/s, {report['depth']} frame slots, "
+        f"{report['errors']} error(s))",
+    ]
+    waits = {"draw": "waiting for a free slot", "encode": "waiting for frames"}
+    for stage, s in report["stages"].items():
+        lines.append(
+            f"  {stage:<6} {s['workers']} worker(s): {s['capacity']:.2f} frames/s "
+            f"capacity, {s['utilisation'] * 100:.0f}% busy, "
+            f"{s['blocked']:.2f}s {waits[stage]}"
+        )
+    stages = report["stages"]
+    if stages["draw"]["capacity"] and stages["encode"]["capacity"]:
+        slow = min(stages, key=lambda k: stages[k]["capacity"])
+        lines.append(f"Bottleneck: {slow} (add workers there first)")
+    return "\n".join(lines)
@@ -0,0 +1,262 @@
+"""
+Multithreaded PNG writer.
+
+Pillow deflates the whole image as one zlib stream on one core. Here the
+image is cut into strips of rows that are filtered (NumPy) and deflated
+(zlib, which releases the GIL) on a thread pool. Each strip is a raw
+deflate stream ending on a sync flush, so the strips concatenate into one
+valid zlib stream. Every strip's compressor is primed with the 32 KiB of
+filtered data in front of it, which keeps the ratio close to a single
+stream; the Adler-32 checksums of the strips are combined arithmetically.
+
+ApngWriter reuses the same deflater to stream animated PNGs frame by frame.
+"""
+
+import os
+import struct
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# (channels, PNG colour type) per supported Pillow mode
+MODES = {"L": (1, 0), "LA": (2, 4), "RGB": (3, 2), "RGBA": (4, 6), "P": (1, 3)}
+DEFAULT_LEVEL = 6  # same as Pillow
+STRIP_BYTES = 1 << 20  # uncompressed bytes per strip
+WINDOW = 32768  # deflate window, the most history a strip can refer to
+IDAT_SIZE = 1 << 18  # bytes per IDAT chunk
+_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+_ADLER_BASE = 65521
+
+
+def chunk(tag, data=b""):
+    crc = zlib.crc32(data, zlib.crc32(tag))
+    return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", crc)
+
+
+def _adler32_combine(adler1, adler2, len2):
+    """Adler-32 of A + B from those of A and B (zlib's adler32_combine)."""
+    rem = len2 % _ADLER_BASE
+    sum1 = adler1 & 0xFFFF
+    sum2 = (rem * sum1) % _ADLER_BASE
+    sum1 += (adler2 & 0xFFFF) + _ADLER_BASE - 1
+    sum2 += (adler1 >> 16) + (adler2 >> 16) + _ADLER_BASE - rem
+    sum1 %= _ADLER_BASE
+    sum2 %= _ADLER_BASE
+    return sum1 | (sum2 << 16)
+
+
+def filter_rows(rows, prev, bpp, adaptive=True):
+    """
+    PNG-filters `rows` ((h, row bytes) uint8), `prev` being the row above the
+    first one (zeros at the top of the image). Returns (h, 1 + row bytes)
+    with the filter type in front of each row.
+
+    Adaptive filtering tries None, Sub, Up and Average on every row and keeps
+    the one leaving the fewest non-zero bytes. That is cheaper to score than
+    libpng's sum of absolute differences and picks the same filters on the
+    flat-colour frames the themes produce. Paeth is left out: it needs 16-bit
+    intermediates, costs as much as the other three together and hardly ever
+    wins on these frames.
+    """
+    h, width = rows.shape
+    out = np.empty((h, width + 1), np.uint8)
+    out[:, 0] = 0
+    out[:, 1:] = rows
+    if not adaptive:
+        return out
+
+    up = np.empty_like(rows)
+    up[0] = prev
+    up[1:] = rows[:-1]
+    left = np.zeros_like(rows)
+    left[:, bpp:] = rows[:, :-bpp]
+    # uint8 arithmetic wraps modulo 256, exactly as PNG filters are defined
+    candidates = [
+        rows - left,
+        rows - up,
+        rows - ((left >> 1) + (up >> 1) + (left & up & 1)),
+    ]
+    scores = np.stack([np.count_nonzero(c, axis=1) for c in [rows] + candidates])
+    best = scores.argmin(axis=0)
+    for kind, filtered in enumerate(candidates, start=1):
+        chosen = best == kind
+        if chosen.any():
+            out[chosen, 0] = kind
+            out[chosen, 1:] = filtered[chosen]
+    return out
+
+
+def _compress_strip(pixels, start, stop, bpp, adaptive, level, last):
+    # A few rows in front of the strip are filtered again to prime the window
+    row_bytes = pixels.shape[1]
+    lead = min(start, -(-WINDOW // (row_bytes + 1)))
+    first = start - lead
+    prev = pixels[first - 1] if first else np.zeros(row_bytes, np.uint8)
+    filtered = filter_rows(pixels[first:stop], prev, bpp, adaptive)
+    history = filtered[:lead].tobytes()[-WINDOW:]
+    data = filtered[lead:].tobytes()
+
+    if history:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15, zdict=history)
+    else:
+        compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    flush = zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH
+    deflated = compressor.compress(data) + compressor.flush(flush)
+    return deflated, zlib.adler32(data), len(data)
+
+
+def deflate_rows(pixels, bpp, adaptive=True, level=DEFAULT_LEVEL, threads=None):
+    """
+    zlib stream of the PNG-filtered rows of `pixels` ((h, row bytes) uint8),
+    deflated in strips on `threads` threads (default: CPU count).
+    """
+    h = pixels.shape[0]
+    rows_per_strip = max(1, STRIP_BYTES // (pixels.shape[1] + 1))
+    bounds = [(y, min(y + rows_per_strip, h)) for y in range(0, h, rows_per_strip)]
+
+    def compress(b):
+        return _compress_strip(pixels, b[0], b[1], bpp, adaptive, level, b[1] == h)
+
+    if len(bounds) == 1:
+        strips = [compress(bounds[0])]
+    else:
+        with ThreadPoolExecutor(max_workers=threads or os.cpu_count() or 1) as pool:
+            strips = list(pool.map(compress, bounds))
+
+    adler = 1
+    for _, strip_adler, length in strips:
+        adler = _adler32_combine(adler, strip_adler, length)
+    flevel = 0 if level < 2 else 1 if level < 6 else 2 if level == 6 else 3
+    header = 0x7800 | (flevel << 6)
+    header += -header % 31
+    return b"".join(
+        [struct.pack(">H", header)]
+        + [deflated for deflated, _, _ in strips]
+        + [struct.pack(">I", adler)]
+    )
+
+
+def _header(img):
+    """IHDR (and PLTE/tRNS for palette images) of `img`."""
+    channels, color_type = MODES[img.mode]
+    w, h = img.size
+    parts = [chunk(b"IHDR", struct.pack(">IIBBBBB", w, h, 8, color_type, 0, 0, 0))]
+    if img.mode == "P":
+        palette = img.getpalette() or []
+        parts.append(chunk(b"PLTE", bytes(palette[:768])))
+        transparency = img.info.get("transparency")
+        if isinstance(transparency, int):
+            parts.append(chunk(b"tRNS", b"\xff" * transparency + b"\x00"))
+        elif isinstance(transparency, bytes):
+            parts.append(chunk(b"tRNS", transparency))
+    return parts
+
+
+def _pixels(img):
+    channels = MODES[img.mode][0]
+    w, h = img.size
+    return np.asarray(img, dtype=np.uint8).reshape(h, w * channels), channels
+
+
+def save_png(img, fp, compress_level=DEFAULT_LEVEL, threads=None):
+    """
+    Writes `img` (L, LA, RGB, RGBA or P) as PNG to a path or binary file,
+    deflating strips of rows on `threads` threads (default: CPU count).
+    """
+    if img.mode not in MODES:
+        raise ValueError(f"Parallel PNG writer does not support mode {img.mode}")
+    pixels, channels = _pixels(img)
+    # Palette indices are not magnitudes, so filters would not help
+    stream = deflate_rows(pixels, channels, img.mode != "P", compress_level, threads)
+
+    parts = [_SIGNATURE] + _header(img)
+    for i in range(0, len(stream), IDAT_SIZE):
+        parts.append(chunk(b"IDAT", stream[i : i + IDAT_SIZE]))
+    parts.append(chunk(b"IEND"))
+
+    if isinstance(fp, (str, os.PathLike)):
+        with open(fp, "wb") as f:
+            f.writelines(parts)
+    else:
+        fp.writelines(parts)
+
+
+class ApngWriter:
+    """
+    Streams an animated PNG to a binary file one frame at a time.
+
+    Frames after the first only store the box that changed since the frame
+    before (APNG's frame regions, replacing the pixels underneath), so a
+    timelapse whose days differ in a few cells stays small and quick to
+    encode. The frame count goes into the header, so it must be known in
+    advance; close() checks that exactly that many frames were added.
+    """
+
+    def __init__(self, fp, frames, delay_ms, loop=0, compress_level=DEFAULT_LEVEL):
+        self.fp = fp
+        self.frames = frames
+        self.delay_ms = delay_ms
+        self.loop = loop
+        self.level = compress_level
+        self.added = 0
+        self._sequence = 0
+        self._mode = None
+
+    def _frame_control(self, size, offset):
+        control = struct.pack(
+            ">IIIIIHHBB",
+            self._sequence,
+            size[0],
+            size[1],
+            offset[0],
+            offset[1],
+            round(self.delay_ms),
+            1000,
+            0,  # dispose_op NONE: the next frame draws over this one
+            0,  # blend_op SOURCE: region pixels replace what is there
+        )
+        self._sequence += 1
+        return chunk(b"fcTL", control)
+
+    def add(self, img, box=None):
+        """
+        Appends a frame; `box` (x0, y0, x1, y1) limits it to the region that
+        changed since the previous frame, None meaning the whole image.
+        """
+        if img.mode not in MODES or img.mode == "P":
+            img = img.convert("RGB")
+        if self.added == 0:
+            self._mode, self._size = img.mode, img.size
+            self.fp.writelines(
+                [_SIGNATURE]
+                + _header(img)
+                + [chunk(b"acTL", struct.pack(">II", self.frames, self.loop))]
+            )
+            box = None
+        elif img.mode != self._mode or img.size != self._size:
+            raise ValueError("All frames of an animation need the same mode and size")
+        if self.added >= self.frames:
+            raise ValueError(f"Animation was announced with {self.frames} frames")
+
+        box = box or (0, 0) + img.size
+        region = img if box == (0, 0) + img.size else img.crop(box)
+        pixels, channels = _pixels(region)
+        stream = deflate_rows(pixels, channels, True, self.level, threads=1)
+        parts = [self._frame_control(region.size, box[:2])]
+        for i in range(0, len(stream), IDAT_SIZE):
+            data = stream[i : i + IDAT_SIZE]
+            if self.added == 0:
+                parts.append(chunk(b"IDAT", data))
+            else:
+                parts.append(chunk(b"fdAT", struct.pack(">I", self._sequence) + data))
+                self._sequence += 1
+        self.fp.writelines(parts)
+        self.added += 1
+
+    def close(self):
+        if self.added != self.frames:
+            raise ValueError(
+                f"Animation was announced with {self.frames} frames, got {self.added}"
+            )
+        self.fp.write(chunk(b"IEND"))
@@ -0,0 +1,97 @@
+"""
+Power-source detection for the low-power render profile.
+
+Each platform has a detector returning AC, BATTERY or UNKNOWN. The active
+detector can be swapped with set_detector(), which is how tests (or an
+embedding application that knows better) fake the power source.
+"""
+
+import glob
+import os
+import subprocess
+import sys
+
+AC = "ac"
+BATTERY = "battery"
+UNKNOWN = "unknown"
+
+POWER_SUPPLY_DIR = "/sys/class/power_supply"
+
+
+def _read(path):
+    try:
+        with open(path, encoding="ascii") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def detect_linux(root=POWER_SUPPLY_DIR):
+    """Reads the kernel's power_supply class: any online mains adapter wins."""
+    batteries = False
+    for supply in sorted(glob.glob(os.path.join(root, "*"))):
+        kind = _read(os.path.join(supply, "type"))
+        if kind == "Mains" and _read(os.path.join(supply, "online")) == "1":
+            return AC
+        if kind == "Battery":
+            batteries = True
+            if _read(os.path.join(supply, "status")) == "Discharging":
+                return BATTERY
+    # Desktops have no battery at all; a charged, idle battery means mains
+    return AC if batteries or os.path.isdir(root) else UNKNOWN
+
+
+def detect_windows():
+    """GetSystemPowerStatus: ACLineStatus is 0 offline, 1 online, 255 unknown."""
+    import ctypes
+
+    class SystemPowerStatus(ctypes.Structure):
+        _fields_ = [
+            ("ACLineStatus", ctypes.c_ubyte),
+            ("BatteryFlag", ctypes.c_ubyte),
+            ("BatteryLifePercent", ctypes.c_ubyte),
+            ("SystemStatusFlag", ctypes.c_ubyte),
+            ("BatteryLifeTime", ctypes.c_ulong),
+            ("BatteryFullLifeTime", ctypes.c_ulong),
+        ]
+
+    status = SystemPowerStatus()
+    if not ctypes.windll.kernel32.GetSystemPowerStatus(ctypes.byref(status)):
+        return UNKNOWN
+    return {0: BATTERY, 1: AC}.get(status.ACLineStatus, UNKNOWN)
+
+
+def detect_macos():
+    """Parses the first line of `pmset -g batt`."""
+    out = subprocess.run(
+        ["pmset", "-g", "batt"], capture_output=True, text=True, timeout=5
+    ).stdout
+    if "'AC Power'" in out:
+        return AC
+    if "'Battery Power'" in out:
+        return BATTERY
+    return UNKNOWN
+
+
+if sys.platform == "win32":
+    _platform_detector = detect_windows
+elif sys.platform == "darwin":
+    _platform_detector = detect_macos
+else:
+    _platform_detector = detect_linux
+
+_detector = None
+
+
+def set_detector(detector):
+    """Replaces the power-source detector; None restores the platform one."""
+    global _detector
+    _detector = detector
+
+
+def power_source():
+    """AC, BATTERY or UNKNOWN; detection failures count as UNKNOWN."""
+    try:
+        return (_detector or _platform_detector)()
+    except Exception:
+        return UNKNOWN
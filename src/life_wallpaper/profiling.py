@@ -0,0 +1,183 @@
+"""Profile repeated renders with cProfile, stack sampling and tracemalloc."""
+
+import os
+import sys
+import time
+import cProfile
+import pstats
+import threading
+import tracemalloc
+from collections import Counter
+from datetime import date
+
+from .utils import parse_size, positive_int
+
+# How often the stack sampler wakes up to record the render thread's stack
+SAMPLE_INTERVAL = 0.002
+
+
+class StackSampler(threading.Thread):
+    """
+    Periodically records the call stack of one thread.
+
+    The counts are written in the "collapsed stack" format understood by
+    flamegraph.pl, speedscope and inferno: one `root;caller;callee count` line
+    per distinct stack.
+    """
+
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                module = os.path.splitext(os.path.basename(code.co_filename))[0]
+                stack.append(f"{module}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def write(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def _render_once(config, on, size, encode):
+    # Imported here so the profile also covers the factory and theme modules
+    from .api import encode_image
+    from .main import get_renderer
+
+    img = get_renderer(config, today=on, size=size).render_image()
+    if encode:
+        encode_image(img, "PNG")
+    return img
+
+
+def profile_renders(
+    config, runs=5, size=None, on=None, encode=True, out_dir="profile", top=30
+):
+    """
+    Renders `config` `runs` times under cProfile and then under tracemalloc.
+
+    Writes into `out_dir`:
+      hotspots.txt     functions sorted by cumulative and by own time
+      render.pstats    raw cProfile data (snakeviz, pstats)
+      stacks.folded    sampled collapsed stacks for flamegraph tools
+      allocations.txt  top allocation sites and the traced peak
+    The two passes are kept apart so tracing allocations does not distort
+    the timings. Returns a dict with the file paths and wall-clock seconds.
+    """
+    if runs < 1:
+        raise ValueError(f"Invalid number of runs {runs}, it must be at least 1")
+    os.makedirs(out_dir, exist_ok=True)
+    on = on or date.today()
+    paths = {
+        "hotspots": os.path.join(out_dir, "hotspots.txt"),
+        "pstats": os.path.join(out_dir, "render.pstats"),
+        "folded": os.path.join(out_dir, "stacks.folded"),
+        "allocations": os.path.join(out_dir, "allocations.txt"),
+    }
+
+    # Pass 1: time profile plus stack samples
+    profiler = cProfile.Profile()
+    sampler = StackSampler(threading.get_ident())
+    sampler.start()
+    start = time.perf_counter()
+    profiler.enable()
+    for _ in range(runs):
+        _render_once(config, on, size, encode)
+    profiler.disable()
+    elapsed = time.perf_counter() - start
+    sampler.stop()
+
+    profiler.dump_stats(paths["pstats"])
+    sampler.write(paths["folded"])
+    with open(paths["hotspots"], "w", encoding="utf-8") as f:
+        per_render = elapsed / runs * 1000
+        f.write(
+            f"{runs} render(s) of theme '{config.theme}' in {elapsed:.3f}s "
+            f"({per_render:.1f} ms/render, PNG encode {'on' if encode else 'off'})\n\n"
+        )
+        stats = pstats.Stats(profiler, stream=f).strip_dirs()
+        f.write("=== By cumulative time ===\n")
+        stats.sort_stats("cumulative").print_stats(top)
+        f.write("=== By own time ===\n")
+        stats.sort_stats("tottime").print_stats(top)
+
+    # Pass 2: allocation sites, snapshotted while the last frame is still alive
+    tracemalloc.start(25)
+    for _ in range(runs):
+        img = _render_once(config, on, size, encode)
+    snapshot = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del img
+
+    snapshot = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+    with open(paths["allocations"], "w", encoding="utf-8") as f:
+        f.write(f"Peak traced memory: {peak / 1024 / 1024:.1f} MiB\n")
+        f.write("(Pillow image buffers live outside the Python allocator)\n\n")
+        f.write("=== Top allocation sites by line ===\n")
+        for stat in snapshot.statistics("lineno")[:top]:
+            f.write(f"{stat}\n")
+        f.write("\n=== Top allocation sites by traceback ===\n")
+        for stat in snapshot.statistics("traceback")[: min(top, 10)]:
+            f.write(f"{stat}\n")
+            for line in stat.traceback.format()[-6:]:
+                f.write(f"    {line}\n")
+
+    return {"elapsed": elapsed, "runs": runs, **paths}
+
+
+def add_arguments(parser):
+    parser.add_argument("--config", help="Path to life_config.json")
+    parser.add_argument("--theme", help="Theme to profile (defaults to config)")
+    parser.add_argument(
+        "--runs", type=positive_int, default=5, help="Number of renders"
+    )
+    parser.add_argument(
+        "--size", type=parse_size, help="Output resolution, e.g. 3840x2160"
+    )
+    parser.add_argument(
+        "--date", type=date.fromisoformat, help="Date to render (YYYY-MM-DD)"
+    )
+    parser.add_argument(
+        "--no-encode", action="store_true", help="Skip PNG encoding of each frame"
+    )
+    parser.add_argument("--top", type=int, default=30, help="Rows per report table")
+    parser.add_argument("--out", default="profile", help="Report directory")
+
+
+def run(args):
+    from .config_snapshot import load_config
+
+    config = load_config(args.config)
+    if args.theme:
+        config.theme = args.theme
+
+    print(f"Profiling {args.runs} render(s)...")
+    result = profile_renders(
+        config,
+        runs=args.runs,
+        size=args.size,
+        on=args.date,
+        encode=not args.no_encode,
+        out_dir=args.out,
+        top=args.top,
+    )
+    print(f"Done in {result['elapsed']:.2f}s. Reports:")
+    for key in ("hotspots", "folded", "allocations", "pstats"):
+        print(f"  {result[key]}")
+    return 0
@@ -1,12 +1,19 @@
 import os
 import math
-import random
 import calendar
+import time
 from datetime import date, datetime
+from typing import TYPE_CHECKING, Optional, Tuple
 from PIL import Image, ImageDraw, ImageFilter
 
-from .config import AppConfig
-from .utils import load_font_family
+from . import budget, buffers, glyphs
+from .antialias import new_draw
+from .corpus import choose_text
+from .utils import birthday_in, cache_dir, day_fraction, load_font_family, save_image
+
+if TYPE_CHECKING:
+    # Renderers never need pydantic at runtime; see config_snapshot
+    from .config import AppConfig
 
 # Canvas Constraints (4K Native)
 WIDTH = 3840
@@ -45,27 +52,35 @@ class WallpaperRenderer:
     Handles image drawing and post-processing.
     """
 
-    def __init__(self, config: AppConfig):
+    def __init__(
+        self,
+        config: "AppConfig",
+        today: Optional[date] = None,
+        size: Optional[Tuple[int, int]] = None,
+        now: Optional[datetime] = None,
+        plan: Optional[budget.Plan] = None,
+    ):
         self.config = config
+        self.now = now or datetime.now()
+        self.today = today or self.now.date()
+        # Cost-saving strategies (render command only); full quality otherwise
+        self.plan = plan or budget.Plan()
+        # Measured ms per megapixel of each stage, see budget.StageCosts
+        self.stage_costs = {}
 
         # Prepare data for rendering
         self.mantra = (
-            random.choice(config.collections.mantras)
-            if config.collections.mantras
-            else "CARPE DIEM"
+            choose_text(config.collections, "mantras", self.today) or "CARPE DIEM"
         )
         self.val_quote_bottom = (
-            random.choice(config.collections.footer_quotes)
-            if config.collections.footer_quotes
-            else "TIME FLIES"
+            choose_text(config.collections, "footer_quotes", self.today) or "TIME FLIES"
         )
 
-        self.W = WIDTH * SCALE
-        self.H = HEIGHT * SCALE
+        self.W, self.H = size or (WIDTH * SCALE, HEIGHT * SCALE)
         self.s = self.H / 2160
 
-        self.img = Image.new("RGB", (self.W, self.H), C_BG)
-        self.draw = ImageDraw.Draw(self.img, "RGBA")
+        self.img = buffers.new_image("RGB", (self.W, self.H), C_BG)
+        self.draw = self._new_draw()
 
         # Initialize Fonts
         self.f_hero = self._load_font(FONTS_HEAD, 120)
@@ -79,14 +94,18 @@ class WallpaperRenderer:
         self.f_nano = self._load_font(FONTS_REG, 14)
         self.f_big_pct = self._load_font(FONTS_HEAD, 54)
 
+    def _new_draw(self):
+        """Drawing context for the canvas, supersampled in high quality mode."""
+        return new_draw(self.img, "RGBA", self.config.render.quality)
+
     def _load_font(self, font_list, size_pt):
         """Helper to load font with scaling."""
-        size_px = int(size_pt * self.s * SCALE)
+        size_px = max(int(size_pt * self.s * SCALE), 1)
         return load_font_family(font_list, size_px)
 
     def _draw_text_centered(self, x, y, text, font, fill, align_vertical=False):
         """Draws text centered horizontally at the given coordinates."""
-        bbox = self.draw.textbbox((0, 0), text, font=font)
+        bbox = glyphs.text_bbox(self.draw, (0, 0), text, font)
         w, h = bbox[2] - bbox[0], bbox[3] - bbox[1]
         x_pos = x - w / 2
 
@@ -95,13 +114,13 @@ class WallpaperRenderer:
         else:
             y_pos = y
 
-        self.draw.text((x_pos, y_pos), text, font=font, fill=fill)
+        glyphs.draw_text(self.draw, (x_pos, y_pos), text, font, fill)
 
     def _draw_text_right(self, x, y, text, font, fill):
         """Draws text right-aligned at the given x coordinate."""
-        bbox = self.draw.textbbox((0, 0), text, font=font)
+        bbox = glyphs.text_bbox(self.draw, (0, 0), text, font)
         w = bbox[2] - bbox[0]
-        self.draw.text((x - w, y), text, font=font, fill=fill)
+        glyphs.draw_text(self.draw, (x - w, y), text, font, fill)
 
     def _draw_matte_gold_circle(self, cx, cy, radius, halo=False):
         """Draws a stylized gold circle, optionally with a glow effect."""
@@ -119,7 +138,7 @@ class WallpaperRenderer:
             # Re-create draw object after paste operations might be needed if switching modes or buffers,
             # but usually fine if just pasting onto RGBA/RGB background.
             # However, the original code recreated `self.draw`. Let's stick to safe practice.
-            self.draw = ImageDraw.Draw(self.img, "RGBA")
+            self.draw = self._new_draw()
 
         self.draw.ellipse(
             (cx - radius, cy - radius, cx + radius, cy + radius), fill=C_ACCENT
@@ -134,7 +153,7 @@ class WallpaperRenderer:
 
     def draw_header(self):
         """Renders the top header with date and mantra."""
-        today = date.today()
+        today = self.today
         date_str = today.strftime("%A %d").upper()
 
         y_pos = self.H * Y_HEADER
@@ -149,7 +168,7 @@ class WallpaperRenderer:
 
     def draw_grid_system(self):
         """Renders the main year grid and annual progress bar."""
-        today = date.today()
+        today = self.today
         day_of_year = int(today.strftime("%j"))
 
         # Grid Layout Configuration
@@ -237,11 +256,11 @@ class WallpaperRenderer:
 
     def draw_life_trajectory(self):
         """Renders the life expectancy progress bar."""
-        today = date.today()
+        today = self.today
         # Ensure we work with date objects
         dob = self.config.profile.dob
         expectancy = self.config.profile.life_expectancy
-        death = date(dob.year + expectancy, dob.month, dob.day)
+        death = birthday_in(dob, dob.year + expectancy)
 
         days_lived = (today - dob).days
         total_days = (death - dob).days
@@ -295,7 +314,7 @@ class WallpaperRenderer:
 
     def draw_calendar(self):
         """Renders the current month's calendar."""
-        today = date.today()
+        today = self.today
         cal = calendar.monthcalendar(today.year, today.month)
 
         margin_left = 120 * self.s
@@ -347,7 +366,7 @@ class WallpaperRenderer:
         cx = self.W - margin_right - 95 * self.s
         cy = self.H * Y_BOTTOM_WIDGETS + 140 * self.s
 
-        today = date.today()
+        today = self.today
         days_in_m = calendar.monthrange(today.year, today.month)[1]
         pct = today.day / days_in_m
 
@@ -384,36 +403,206 @@ class WallpaperRenderer:
             cx, cy + 120 * self.s, "MONTH", self.f_tiny, C_TEXT_LABEL
         )
 
-    def apply_grain_and_vignette(self):
-        """Applies cinematic grain and vignette properties to the final image."""
-        vignette = Image.new("L", (int(self.W), int(self.H)), 255)
+    def _day_ring_geometry(self):
+        """Center, radius and stroke of the day ring, left of the month ring."""
+        cx = self.W - 120 * self.s - 95 * self.s - 260 * self.s
+        cy = self.H * Y_BOTTOM_WIDGETS + 140 * self.s
+        return cx, cy, 95 * self.s, 6 * self.s
+
+    def intraday_box(self):
+        """Pixel box (x0, y0, x1, y1) covering everything the day ring draws."""
+        cx, cy, r_ring, w_ring = self._day_ring_geometry()
+        reach = r_ring + w_ring
+        boxes = [(cx - reach, cy - reach, cx + reach, cy + reach)]
+        # Text is centered on these points; its far bbox corner bounds both sides
+        for text, font, y in (
+            ("100%", self.f_big_pct, cy),
+            ("DAY", self.f_tiny, cy + 120 * self.s),
+        ):
+            _, _, x1, y1 = font.getbbox(text)
+            boxes.append((cx - x1, y - y1, cx + x1, y + y1))
+
+        pad = 4 * self.s + 2
+        return (
+            max(int(min(b[0] for b in boxes) - pad), 0),
+            max(int(min(b[1] for b in boxes) - pad), 0),
+            min(int(max(b[2] for b in boxes) + pad), self.W),
+            min(int(max(b[3] for b in boxes) + pad), self.H),
+        )
+
+    def draw_day_cluster(self):
+        """Renders the day progress ring next to the month ring."""
+        cx, cy, r_ring, w_ring = self._day_ring_geometry()
+        pct = day_fraction(self.now)
+
+        self.draw.arc(
+            (cx - r_ring, cy - r_ring, cx + r_ring, cy + r_ring),
+            start=0,
+            end=360,
+            fill=C_DOT_EMPTY,
+            width=int(w_ring),
+        )
+        self.draw.arc(
+            (cx - r_ring, cy - r_ring, cx + r_ring, cy + r_ring),
+            start=-90,
+            end=-90 + (pct * 360),
+            fill=C_ACCENT,
+            width=int(w_ring),
+        )
+
+        self._draw_text_centered(
+            cx, cy, f"{int(pct*100)}%", self.f_big_pct, C_TEXT_HEAD, align_vertical=True
+        )
+        self._draw_text_centered(
+            cx, cy + 120 * self.s, "DAY", self.f_tiny, C_TEXT_LABEL
+        )
+
+    def repaint_intraday(self, img, now):
+        """Draws the day ring for `now` onto a finished frame."""
+        self.img, self.now = img, now
+        self.draw = self._new_draw()
+        self.draw_day_cluster()
+
+    def _measure(self, stage, start):
+        """Adds the time since `start` to a stage, per megapixel of canvas."""
+        ms = (time.perf_counter() - start) * 1000
+        mp = self.W * self.H / 1e6
+        self.stage_costs[stage] = self.stage_costs.get(stage, 0.0) + ms / mp
+
+    def _vignette_mask(self):
+        """
+        Darkening mask of the vignette and whether it came from the cache. The
+        300px blur dominates its cost and only depends on the canvas size, so
+        the plan may reuse it from disk.
+        """
+        W, H = int(self.W), int(self.H)
+        pool = buffers.get_pool()
+        key = ("vignette", W, H)
+        kept = pool.kept(key) if pool is not None else None
+        if kept is not None:
+            return kept, True
+
+        path = os.path.join(cache_dir(), f"vignette_{W}x{H}.png")
+        if self.plan.cached_vignette:
+            try:
+                with Image.open(path) as cached:
+                    if cached.mode == "L" and cached.size == (W, H):
+                        vignette = cached.copy()
+                        if pool is not None:
+                            pool.keep(key, vignette)
+                        return vignette, True
+            except OSError:
+                pass
+
+        vignette = Image.new("L", (W, H), 255)
         d_v = ImageDraw.Draw(vignette)
         d_v.ellipse((0, 0, self.W, self.H), fill=0)
         vignette = vignette.filter(ImageFilter.GaussianBlur(radius=300 * self.s))
-        black = Image.new("RGB", (int(self.W), int(self.H)), (0, 0, 0))
         vignette = vignette.point(lambda p: p * 0.08)
-        self.img.paste(black, (0, 0), vignette)
+        if self.plan.cached_vignette:
+            tmp = f"{path}.{os.getpid()}.tmp"
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                vignette.save(tmp, "PNG", compress_level=1)
+                os.replace(tmp, path)
+            except OSError:
+                pass
+        if pool is not None:
+            pool.keep(key, vignette)
+        return vignette, False
 
+    def apply_grain_and_vignette(self):
+        """Applies cinematic grain and vignette properties to the final image."""
+        if self.plan.skip_post:
+            return
+        start = time.perf_counter()
+        vignette, cached = self._vignette_mask()
+        # Colour pastes need no full-frame layer of that colour
+        self.img.paste((0, 0, 0), (0, 0), vignette)
+        self._measure("vignette_cached" if cached else "vignette", start)
+        if self.plan.skip_grain:
+            return
+
+        start = time.perf_counter()
         noise_size = (int(self.W / 4), int(self.H / 4))
         noise_data = os.urandom(noise_size[0] * noise_size[1])
         noise_img = Image.frombytes("L", noise_size, noise_data)
-        noise_img = noise_img.resize((int(self.W), int(self.H)), Image.NEAREST)
-        noise_layer = Image.new("RGB", (int(self.W), int(self.H)), (30, 30, 30))
+        # Scaling after the point() is the same for NEAREST, on 1/16 of the pixels
         mask = noise_img.point(lambda p: p * 0.015)
-        self.img.paste(noise_layer, (0, 0), mask)
-
-    def render(self) -> str:
-        """Execution pipeline. Returns path to generated image."""
-        print("Rendering Life Ledger (4K)...")
+        mask = mask.resize((int(self.W), int(self.H)), Image.NEAREST)
+        self.img.paste((30, 30, 30), (0, 0), mask)
+        self._measure("grain", start)
+
+    def _render_scaled(self):
+        """Renders at the plan's lower resolution and upscales the result."""
+        size = (round(self.W * self.plan.scale), round(self.H * self.plan.scale))
+        plan = budget.Plan(**vars(self.plan))
+        plan.scale = 1.0
+        small = WallpaperRenderer(
+            self.config, today=self.today, size=size, now=self.now, plan=plan
+        )
+        small.mantra, small.val_quote_bottom = self.mantra, self.val_quote_bottom
+        img = small.render_image()
+        # The small renderer's costs are already per megapixel of its canvas
+        self.stage_costs.update(small.stage_costs)
+
+        start = time.perf_counter()
+        buffers.release(self.img)
+        self.img = img.resize((int(self.W), int(self.H)), Image.BILINEAR)
+        buffers.release(img)
+        self.draw = self._new_draw()
+        self._measure("upscale", start)
+        return self.img
+
+    def render_image(self) -> Image.Image:
+        """Draws the full wallpaper and returns it without touching disk."""
+        if self.plan.scale < 1:
+            return self._render_scaled()
+
+        start = time.perf_counter()
         self.draw_header()
         self.draw_grid_system()
         self.draw_life_trajectory()
         self.draw_calendar()
         self.draw_time_cluster()
-
-        print("Applying post-processing...")
+        self._measure("draw", start)
         self.apply_grain_and_vignette()
+        if self.config.render.intraday:
+            # Drawn last so the intraday command can repaint it on its own
+            start = time.perf_counter()
+            self.draw_day_cluster()
+            self._measure("draw", start)
+        return self.img
+
+    def render(self) -> str:
+        """Execution pipeline. Returns path to generated image."""
+        print("Rendering Life Ledger (4K)...")
+        settings = self.config.render
+        mode = budget.low_power_mode(settings)
+        # Costs are only read, measured and saved for renders that plan
+        costs = None
+        if mode[0] or settings.budget_ms is not None:
+            costs = budget.StageCosts("og")
+            self.plan = budget.plan_render(settings, costs, (self.W, self.H), mode)
+        start = time.perf_counter()
+        img = self.render_image()
 
         out_path = os.path.join(os.getcwd(), "life_wallpaper.png")
-        self.img.save(out_path, quality=100)
+        encode_start = time.perf_counter()
+        save_image(
+            img,
+            out_path,
+            threads=self.config.render.png_threads,
+            quality=100,
+            **self.plan.save_params(),
+        )
+        self._measure(
+            "encode_fast" if self.plan.fast_encode else "encode", encode_start
+        )
+        buffers.release(img)
+        if costs is not None:
+            costs.record(self.stage_costs)
+            costs.save()
+        if settings.budget_ms is not None:
+            print(f"Rendered in {(time.perf_counter() - start) * 1000:.0f} ms")
         return out_path
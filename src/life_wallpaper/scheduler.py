@@ -0,0 +1,175 @@
+"""
+Render every profile at its own local midnight.
+
+A min-heap holds the next due time (UTC) of every profile. The loop sleeps
+until the earliest one, renders whatever is due for the date that just
+started in that profile's time zone and pushes the profile's following
+midnight. Profiles spread across time zones spread the renders across the
+day instead of one spike at the host's midnight.
+
+Sleeps are capped at MAX_SLEEP so that a suspended machine notices the
+wall-clock jump soon after waking. Profiles that missed one or more
+midnights meanwhile are rendered once, for their current date.
+"""
+
+import heapq
+import itertools
+import time
+from datetime import datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+from . import buffers
+from .utils import parse_size
+
+MAX_SLEEP = 60.0  # seconds; bounds how late a missed midnight is noticed
+RETRY_DELAY = 300.0  # seconds before a failed render is tried again
+
+
+class SystemClock:
+    """Wall clock in UTC and a real sleep."""
+
+    def now(self):
+        return datetime.now(timezone.utc)
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+
+def profile_zone(config):
+    """The profile's time zone, or None for the host's local time."""
+    name = config.profile.timezone
+    return ZoneInfo(name) if name else None
+
+
+def local_date(now_utc, zone):
+    return now_utc.astimezone(zone).date()
+
+
+def profile_now(config):
+    """Naive wall-clock time in the profile's time zone, None if it has none."""
+    zone = profile_zone(config)
+    return datetime.now(zone).replace(tzinfo=None) if zone else None
+
+
+def next_midnight(now_utc, zone):
+    """First local midnight in `zone` strictly after `now_utc`, in UTC."""
+    day = local_date(now_utc, zone) + timedelta(days=1)
+    midnight = datetime(day.year, day.month, day.day, tzinfo=zone)
+    if zone is None:
+        # Naive local time: let the platform apply the host's rules
+        midnight = midnight.astimezone()
+    # A midnight skipped by a DST jump resolves to the first instant after it
+    return midnight.astimezone(timezone.utc)
+
+
+class Scheduler:
+    """
+    Dispatches `render(key, config, local date)` for every profile at each of
+    its local midnights. `profiles` maps keys to configs; `clock` provides
+    now() (aware UTC) and sleep(seconds), so tests can drive time by hand.
+    """
+
+    def __init__(self, profiles, render, clock=None, render_on_start=True):
+        self.profiles = dict(profiles)
+        self.render = render
+        self.clock = clock or SystemClock()
+        self._heap = []
+        self._order = itertools.count()  # tie-breaker for equal due times
+        # Local date each profile was last rendered for
+        self.rendered = {}
+
+        now = self.clock.now()
+        for key, config in self.profiles.items():
+            zone = profile_zone(config)
+            due = now if render_on_start else next_midnight(now, zone)
+            self._push(due, key)
+
+    def _push(self, due, key):
+        heapq.heappush(self._heap, (due, next(self._order), key))
+
+    def next_due(self):
+        return self._heap[0][0] if self._heap else None
+
+    def run_pending(self):
+        """Renders every profile that is due now; returns the keys rendered."""
+        now = self.clock.now()
+        done = []
+        while self._heap and self._heap[0][0] <= now:
+            due, _, key = heapq.heappop(self._heap)
+            config = self.profiles[key]
+            zone = profile_zone(config)
+            day = local_date(now, zone)
+            if day == self.rendered.get(key):
+                # Never render the same local date twice
+                self._push(next_midnight(now, zone), key)
+                continue
+            if now - due > timedelta(seconds=MAX_SLEEP * 2):
+                print(f"Catching up {key}: due {due:%Y-%m-%d %H:%M} UTC")
+            try:
+                self.render(key, config, day)
+            except Exception as e:
+                print(f"Render for {key} failed: {e}")
+                self._push(now + timedelta(seconds=RETRY_DELAY), key)
+                continue
+            self.rendered[key] = day
+            done.append(key)
+            self._push(next_midnight(now, zone), key)
+        return done
+
+    def run(self, iterations=None):
+        """Main loop; `iterations` limits the number of wake-ups (tests)."""
+        for _ in itertools.count() if iterations is None else range(iterations):
+            self.run_pending()
+            due = self.next_due()
+            if due is None:
+                return
+            wait = (due - self.clock.now()).total_seconds()
+            self.clock.sleep(min(max(wait, 0.0), MAX_SLEEP))
+
+
+def add_arguments(parser):
+    parser.add_argument("input", help="Profiles as .jsonl or .csv (see batch)")
+    parser.add_argument(
+        "--out-dir", default="renders", help="Directory for the wallpapers"
+    )
+    parser.add_argument(
+        "--sink",
+        help="Where to store the wallpapers, as for batch (default: --out-dir)",
+    )
+    parser.add_argument(
+        "--size", type=parse_size, help="Output resolution, e.g. 1920x1080"
+    )
+    parser.add_argument(
+        "--pool",
+        action="store_true",
+        help="Reuse canvas buffers between renders (see buffers.py)",
+    )
+    parser.add_argument(
+        "--no-initial",
+        action="store_true",
+        help="Wait for each profile's next midnight instead of rendering now",
+    )
+
+
+def run(args):
+    from .api import encode_image, render_image
+    from .batch import iter_configs, output_key, read_records
+    from .sinks import open_sink
+
+    if args.pool:
+        buffers.enable()
+    profiles = dict(iter_configs(read_records(args.input)))
+    with open_sink(args.sink or f"dir:{args.out_dir}") as sink:
+
+        def render(key, config, day):
+            img = render_image(config, on=day, size=args.size)
+            data = encode_image(img, "PNG", threads=config.render.png_threads)
+            buffers.release(img)
+            name = output_key(key, "png")
+            outcome = sink.put(name, data).result()
+            print(f"{day} {key}: {sink.location(name)} ({outcome})")
+
+        scheduler = Scheduler(profiles, render, render_on_start=not args.no_initial)
+        print(f"Scheduling {len(profiles)} profile(s)")
+        scheduler.run()
+    return 0
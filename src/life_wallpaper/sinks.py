@@ -0,0 +1,461 @@
+"""
+Output sinks: where encoded wallpapers go once rendered.
+
+A sink takes a key (a relative name such as "ada.png") and the encoded
+bytes. put() returns a concurrent.futures.Future resolving to UPLOADED or
+UNCHANGED, so callers can render the next wallpaper while the previous one
+is still being written or uploaded. Every sink skips writes whose content is
+already in place.
+
+open_sink() builds a sink from a spec:
+
+    file:PATH        every put writes PATH (a single wallpaper)
+    dir:PATH         PATH/<key>
+    users:PATH       PATH/<user>/life_wallpaper.<ext>, one directory per user
+    s3://BUCKET/PFX  an S3-compatible object store (credentials from AWS_*)
+"""
+
+import base64
+import hashlib
+import hmac
+import http.client
+import os
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timezone
+from urllib.parse import quote, urlsplit
+
+UPLOADED = "uploaded"
+UNCHANGED = "unchanged"
+
+CONTENT_TYPES = {
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".bmp": "image/bmp",
+    ".gif": "image/gif",
+    ".webp": "image/webp",
+}
+S3_CONNECTIONS = 4  # pooled keep-alive connections = concurrent uploads
+S3_TIMEOUT = 30.0  # seconds per request
+S3_RETRIES = 2  # extra attempts after a connection error or a 5xx reply
+# Object metadata holding the SHA-256 of the content; unlike the ETag it is
+# also a content hash for objects that were uploaded in parts
+HASH_HEADER = "x-amz-meta-sha256"
+
+
+class SinkError(Exception):
+    """A wallpaper could not be stored."""
+
+
+def content_type(key):
+    return CONTENT_TYPES.get(
+        os.path.splitext(key)[1].lower(), "application/octet-stream"
+    )
+
+
+def _done(result):
+    future = Future()
+    future.set_result(result)
+    return future
+
+
+def _failed(error):
+    future = Future()
+    future.set_exception(error)
+    return future
+
+
+class Sink:
+    """Base class; subclasses implement _store(key, data) -> UPLOADED/UNCHANGED."""
+
+    def __init__(self):
+        self.stats = {UPLOADED: 0, UNCHANGED: 0, "failed": 0, "bytes": 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, outcome, size=0):
+        with self._stats_lock:
+            self.stats[outcome] += 1
+            self.stats["bytes"] += size
+
+    def put(self, key, data):
+        """Stores `data` under `key`; returns a future of the outcome."""
+        try:
+            outcome = self._store(key, data)
+        except Exception as e:
+            self._count("failed")
+            return _failed(e)
+        self._count(outcome, len(data) if outcome == UPLOADED else 0)
+        return _done(outcome)
+
+    def holds(self, key, digest):
+        """
+        Whether `key` is stored with content whose SHA-256 hex digest starts
+        with `digest`. False when that cannot be told.
+        """
+        return False
+
+    def close(self):
+        """Waits for pending writes; returns the stats."""
+        return dict(self.stats)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _write_file(path, data):
+    """Atomic write that leaves an identical existing file untouched."""
+    try:
+        if os.path.getsize(path) == len(data):
+            with open(path, "rb") as f:
+                if f.read() == data:
+                    return UNCHANGED
+    except OSError:
+        pass
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    root, ext = os.path.splitext(path)
+    tmp = f"{root}.{os.getpid()}.{threading.get_ident()}.tmp{ext}"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return UPLOADED
+
+
+def _file_holds(path, digest):
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest().startswith(digest)
+    except OSError:
+        return False
+
+
+class FileSink(Sink):
+    """Writes every wallpaper to the same file, whatever its key."""
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+
+    def location(self, key):
+        return self.path
+
+    def _store(self, key, data):
+        return _write_file(self.path, data)
+
+    def holds(self, key, digest):
+        return _file_holds(self.path, digest)
+
+
+class DirectorySink(Sink):
+    """
+    Writes `root/<key>`. With `per_user`, a key "ada.png" goes to
+    `root/ada/life_wallpaper.png` so every user gets a directory of their own.
+    """
+
+    def __init__(self, root, per_user=False):
+        super().__init__()
+        self.root = root
+        self.per_user = per_user
+
+    def location(self, key):
+        if self.per_user:
+            user, ext = os.path.splitext(key)
+            key = f"{user}/life_wallpaper{ext}"
+        return os.path.join(self.root, *key.split("/"))
+
+    def _store(self, key, data):
+        return _write_file(self.location(key), data)
+
+    def holds(self, key, digest):
+        return _file_holds(self.location(key), digest)
+
+
+def _hmac(key, text):
+    return hmac.new(key, text.encode("utf-8"), hashlib.sha256).digest()
+
+
+def sign_request(
+    method, host, path, headers, payload_hash, access_key, secret_key, region, when
+):
+    """
+    AWS Signature Version 4 for the S3 service. `headers` must not contain
+    Authorization; x-amz-date and x-amz-content-sha256 are added to it, and
+    every header in it is signed. Returns the headers to send.
+    """
+    amz_date = when.strftime("%Y%m%dT%H%M%SZ")
+    scope = f"{when:%Y%m%d}/{region}/s3/aws4_request"
+    headers = dict(headers, host=host)
+    headers["x-amz-date"] = amz_date
+    headers["x-amz-content-sha256"] = payload_hash
+    canonical = {k.lower(): " ".join(str(v).split()) for k, v in headers.items()}
+    signed = ";".join(sorted(canonical))
+    request = "\n".join(
+        [
+            method,
+            quote(path, safe="/~"),
+            "",  # No query string
+            "".join(f"{k}:{canonical[k]}\n" for k in sorted(canonical)),
+            signed,
+            payload_hash,
+        ]
+    )
+    to_sign = "\n".join(
+        [
+            "AWS4-HMAC-SHA256",
+            amz_date,
+            scope,
+            hashlib.sha256(request.encode("utf-8")).hexdigest(),
+        ]
+    )
+    key = ("AWS4" + secret_key).encode("utf-8")
+    for part in scope.split("/"):
+        key = _hmac(key, part)
+    signature = hmac.new(key, to_sign.encode("utf-8"), hashlib.sha256).hexdigest()
+    headers["Authorization"] = (
+        f"AWS4-HMAC-SHA256 Credential={access_key}/{scope}, "
+        f"SignedHeaders={signed}, Signature={signature}"
+    )
+    return headers
+
+
+class ConnectionPool:
+    """Keep-alive HTTP(S) connections to one host, reused across threads."""
+
+    def __init__(self, endpoint, size=S3_CONNECTIONS, timeout=S3_TIMEOUT):
+        parts = urlsplit(endpoint)
+        self.https = parts.scheme == "https"
+        self.host = parts.netloc
+        self.timeout = timeout
+        self._idle = queue.LifoQueue(maxsize=size)
+        self.opened = 0
+
+    def _connect(self):
+        cls = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+        self.opened += 1
+        return cls(self.host, timeout=self.timeout)
+
+    def request(self, method, path, body=None, headers=None):
+        """Returns (status, headers, body); raises OSError/HTTPException."""
+        try:
+            conn = self._idle.get_nowait()
+            reused = True
+        except queue.Empty:
+            conn, reused = self._connect(), False
+        try:
+            conn.request(method, path, body=body, headers=headers or {})
+            response = conn.getresponse()
+            payload = response.read()
+        except (OSError, http.client.HTTPException):
+            conn.close()
+            if not reused:
+                raise
+            # The server may have closed an idle connection; retry on a new one
+            return self.request(method, path, body, headers)
+        if response.will_close:
+            conn.close()
+        else:
+            try:
+                self._idle.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+        return response.status, response.headers, payload
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class S3Sink(Sink):
+    """
+    Uploads to an S3-compatible object store with path-style addressing, so
+    it also works against MinIO, Ceph or a local stand-in server.
+
+    Uploads run on a thread pool over pooled keep-alive connections while
+    the caller goes on rendering; at most `max_pending` wallpapers wait in
+    memory, after which put() blocks. An object whose ETag (the MD5 of a
+    single-part upload) or sha256 metadata already matches is not uploaded
+    again.
+    """
+
+    def __init__(
+        self,
+        bucket,
+        prefix="",
+        endpoint=None,
+        region=None,
+        access_key=None,
+        secret_key=None,
+        session_token=None,
+        connections=S3_CONNECTIONS,
+        max_pending=None,
+    ):
+        super().__init__()
+        env = os.environ
+        self.region = (
+            region
+            or env.get("AWS_REGION")
+            or env.get("AWS_DEFAULT_REGION")
+            or "us-east-1"
+        )
+        self.endpoint = (
+            endpoint
+            or env.get("AWS_ENDPOINT_URL")
+            or f"https://s3.{self.region}.amazonaws.com"
+        ).rstrip("/")
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.access_key = access_key or env.get("AWS_ACCESS_KEY_ID")
+        self.secret_key = secret_key or env.get("AWS_SECRET_ACCESS_KEY")
+        self.session_token = session_token or env.get("AWS_SESSION_TOKEN")
+        if not self.access_key or not self.secret_key:
+            raise SinkError("S3 sink needs AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY")
+        self.pool = ConnectionPool(self.endpoint, size=connections)
+        self._executor = ThreadPoolExecutor(
+            max_workers=connections, thread_name_prefix="s3-upload"
+        )
+        self._slots = threading.BoundedSemaphore(max_pending or 2 * connections)
+        # Content hashes known to be stored, so repeats skip even the HEAD
+        self._stored = {}
+
+    def location(self, key):
+        name = f"{self.prefix}/{key}" if self.prefix else key
+        return f"s3://{self.bucket}/{name}"
+
+    def _path(self, key):
+        name = f"{self.prefix}/{key}" if self.prefix else key
+        return f"/{self.bucket}/{name}"
+
+    def _send(self, method, key, body=b"", headers=None, payload_hash=None):
+        path = self._path(key)
+        headers = dict(headers or {})
+        if self.session_token:
+            headers["x-amz-security-token"] = self.session_token
+        payload_hash = payload_hash or hashlib.sha256(body).hexdigest()
+        for attempt in range(S3_RETRIES + 1):
+            signed = sign_request(
+                method,
+                self.pool.host,
+                path,
+                headers,
+                payload_hash,
+                self.access_key,
+                self.secret_key,
+                self.region,
+                datetime.now(timezone.utc),
+            )
+            try:
+                status, reply, payload = self.pool.request(
+                    method, quote(path, safe="/~"), body or None, signed
+                )
+            except (OSError, http.client.HTTPException) as e:
+                if attempt == S3_RETRIES:
+                    raise SinkError(f"{method} {self.location(key)} failed: {e}")
+                continue
+            if status < 500 or attempt == S3_RETRIES:
+                return status, reply, payload
+
+    def _store(self, key, data):
+        digest = hashlib.sha256(data).hexdigest()
+        md5 = hashlib.md5(data)
+        if self._stored.get(key) == digest:
+            return UNCHANGED
+        status, reply, _ = self._send("HEAD", key)
+        if status == 200 and (
+            reply.get("ETag", "").strip('"') == md5.hexdigest()
+            or reply.get(HASH_HEADER) == digest
+        ):
+            self._stored[key] = digest
+            return UNCHANGED
+
+        headers = {
+            "Content-Type": content_type(key),
+            "Content-Length": str(len(data)),
+            "Content-MD5": base64.b64encode(md5.digest()).decode("ascii"),
+            HASH_HEADER: digest,
+        }
+        status, _, payload = self._send("PUT", key, data, headers, digest)
+        if status != 200:
+            detail = payload.decode("utf-8", "replace").strip()[:200]
+            raise SinkError(f"PUT {self.location(key)} failed: {status} {detail}")
+        self._stored[key] = digest
+        return UPLOADED
+
+    def holds(self, key, digest):
+        try:
+            status, reply, _ = self._send("HEAD", key)
+        except SinkError:
+            return False
+        return status == 200 and reply.get(HASH_HEADER, "").startswith(digest)
+
+    def _upload(self, key, data):
+        try:
+            outcome = self._store(key, data)
+        except Exception:
+            self._count("failed")
+            raise
+        finally:
+            self._slots.release()
+        self._count(outcome, len(data) if outcome == UPLOADED else 0)
+        return outcome
+
+    def put(self, key, data):
+        self._slots.acquire()
+        try:
+            return self._executor.submit(self._upload, key, data)
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        self.pool.close()
+        return dict(self.stats)
+
+
+def merge_stats(stats):
+    """Adds up the stats of several sinks (e.g. one per worker process)."""
+    total = {UPLOADED: 0, UNCHANGED: 0, "failed": 0, "bytes": 0}
+    for entry in stats:
+        for key in total:
+            total[key] += entry.get(key, 0)
+    return total
+
+
+def format_stats(spec, stats):
+    return (
+        f"Sink {spec}: {stats[UPLOADED]} stored "
+        f"({stats['bytes'] / 1024 / 1024:.1f} MiB), "
+        f"{stats[UNCHANGED]} unchanged, {stats['failed']} failed"
+    )
+
+
+def open_sink(spec):
+    """Builds a sink from a spec such as "dir:renders" or "s3://bucket/walls"."""
+    if spec.startswith("s3://"):
+        bucket, _, prefix = spec[len("s3://") :].partition("/")
+        if not bucket:
+            raise ValueError(f"Missing bucket in sink '{spec}'")
+        return S3Sink(bucket, prefix)
+    scheme, sep, path = spec.partition(":")
+    # A bare path (or a Windows drive letter) means a directory
+    if not sep or len(scheme) == 1:
+        return DirectorySink(spec)
+    if scheme == "file":
+        return FileSink(path)
+    if scheme == "dir":
+        return DirectorySink(path)
+    if scheme == "users":
+        return DirectorySink(path, per_user=True)
+    raise ValueError(f"Unknown sink '{spec}'; use file:, dir:, users: or s3://")
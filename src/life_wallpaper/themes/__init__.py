@@ -0,0 +1,11 @@
+from ..renderer import WallpaperRenderer
+from .dashboard import DashboardRenderer
+from .weeks import LifeInWeeksRenderer
+
+# Theme name (as used in life_config.json) -> renderer class
+THEMES = {
+    "original": DashboardRenderer,
+    "og": WallpaperRenderer,
+    "weeks": LifeInWeeksRenderer,
+}
+DEFAULT_THEME = "original"
@@ -2,10 +2,16 @@ import os
 import calendar
 import platform
 import datetime
-from PIL import Image, ImageDraw, ImageFont
+from typing import TYPE_CHECKING, Optional, Tuple
+from PIL import Image, ImageFont
 
-from ..config import AppConfig
-from ..utils import load_font_family
+from .. import budget, buffers, glyphs
+from ..antialias import QUALITY_STANDARD, new_draw
+from ..palette import PaletteDraw
+from ..utils import day_fraction, load_font_family, save_image
+
+if TYPE_CHECKING:
+    from ..config import AppConfig
 
 
 class DashboardRenderer:
@@ -32,11 +38,26 @@ class DashboardRenderer:
         },
     }
 
-    def __init__(self, config: AppConfig):
+    def __init__(
+        self,
+        config: "AppConfig",
+        today: Optional[datetime.date] = None,
+        size: Optional[Tuple[int, int]] = None,
+        now: Optional[datetime.datetime] = None,
+    ):
         self.config = config
+        self.now = now or datetime.datetime.now()
+        self.today = today or self.now.date()
+        self.size = size or self.STYLE["resolution"]
+        # Layout constants are in 4K pixels; scale them to the requested height
+        self.s = self.size[1] / self.STYLE["resolution"][1]
         self.colors = self.STYLE["colors"]
         self.fonts = {}  # Will be loaded in render
 
+    def _px(self, value):
+        """Scales a 4K font size to the output resolution."""
+        return max(int(value * self.s), 1)
+
     def _load_fonts(self):
         # Cross-platform font priorities
         # Prioritize standard legible fonts over Emoji/Symbol fonts
@@ -57,41 +78,49 @@ class DashboardRenderer:
             "DejaVuSans.ttf",
             "FreeSans.ttf",
             "LiberationSans-Regular.ttf",
-            "seguiemj.ttf",  # Fallback for symbols if needed
         ]
 
         self.fonts = {
-            "hero": load_font_family(F_BOLD, 180),
-            "date": load_font_family(F_REGULAR, 80),
-            "sub": load_font_family(F_BOLD, 50),
-            "medium": load_font_family(F_REGULAR, 34),
-            "small": load_font_family(F_REGULAR, 24),
-            "tiny": load_font_family(F_REGULAR, 22),
-            "cal_head": load_font_family(F_BOLD, 40),
-            "cal_days": load_font_family(F_REGULAR, 30),
-            "cal_num": load_font_family(F_REGULAR, 55),
+            "hero": load_font_family(F_BOLD, self._px(180)),
+            "date": load_font_family(F_REGULAR, self._px(80)),
+            "sub": load_font_family(F_BOLD, self._px(50)),
+            "medium": load_font_family(F_REGULAR, self._px(34)),
+            "small": load_font_family(F_REGULAR, self._px(24)),
+            "tiny": load_font_family(F_REGULAR, self._px(22)),
+            "cal_head": load_font_family(F_BOLD, self._px(40)),
+            "cal_days": load_font_family(F_REGULAR, self._px(30)),
+            "cal_num": load_font_family(F_REGULAR, self._px(55)),
         }
 
+    def _new_draw(self, img):
+        if img.mode == "P":
+            return PaletteDraw(img)
+        return new_draw(img, quality=self.config.render.quality)
+
     def _draw_centered(self, draw, cx, cy, text, font, fill):
-        draw.text((cx, cy), text, font=font, fill=fill, anchor="mm")
+        glyphs.draw_text(draw, (cx, cy), text, font, fill, anchor="mm")
 
     def _draw_right_aligned(self, draw, x, y, text, font, fill):
-        draw.text((x, y), text, font=font, fill=fill, anchor="ra")
+        glyphs.draw_text(draw, (x, y), text, font, fill, anchor="ra")
 
     def _draw_glow(self, draw, cx, cy, radius, color):
+        outer = radius + 4 * self.s
+        inner = radius + 2 * self.s
+        line_w = max(int(self.s), 1)
         draw.ellipse(
-            [cx - radius - 4, cy - radius - 4, cx + radius + 4, cy + radius + 4],
+            [cx - outer, cy - outer, cx + outer, cy + outer],
             outline=(30, 80, 50),
-            width=1,
+            width=line_w,
         )
         draw.ellipse(
-            [cx - radius - 2, cy - radius - 2, cx + radius + 2, cy + radius + 2],
+            [cx - inner, cy - inner, cx + inner, cy + inner],
             outline=(40, 150, 80),
-            width=1,
+            width=line_w,
         )
 
-    def draw_life_dashboard(self, draw, x, y):
+    def draw_life_dashboard(self, draw, x, y, date_obj):
         c = self.colors
+        s = self.s
 
         # Adaptation from config
         try:
@@ -99,7 +128,7 @@ class DashboardRenderer:
         except:
             birth = datetime.date(1995, 1, 1)
 
-        today = datetime.date.today()
+        today = date_obj
         days_alive = (today - birth).days
         years_alive = days_alive / 365.25
         year_end = datetime.date(today.year, 12, 31)
@@ -108,13 +137,13 @@ class DashboardRenderer:
         name_text = self.config.profile.name.title()
         self._draw_right_aligned(draw, x, y, name_text, self.fonts["hero"], c["accent"])
 
-        stats_y = y + 180
+        stats_y = y + 180 * s
         age_str = f"{years_alive:.1f} YEARS  •  {days_alive:,} DAYS"
         self._draw_right_aligned(
             draw, x, stats_y, age_str, self.fonts["sub"], c["white"]
         )
 
-        mot_y = stats_y + 70
+        mot_y = stats_y + 70 * s
         mot_str = f"{days_left} DAYS LEFT IN {today.year}"
         self._draw_right_aligned(
             draw, x, mot_y, mot_str, self.fonts["small"], c["grey"]
@@ -122,6 +151,7 @@ class DashboardRenderer:
 
     def draw_year_progress(self, draw, x, y, width, date_obj):
         c = self.colors
+        s = self.s
         year = date_obj.year
         is_leap = calendar.isleap(year)
         total_days = 366 if is_leap else 365
@@ -130,14 +160,14 @@ class DashboardRenderer:
         # Label
         pct = (date_obj.timetuple().tm_yday / total_days) * 100
         draw.text(
-            (x, y - 60),
+            (x, y - 60 * s),
             f"{year} PROGRESS: {pct:.1f}%",
             fill=c["dark"],
             font=self.fonts["medium"],
         )
 
-        height = 14
-        gap = 8
+        height = 14 * s
+        gap = 8 * s
         usable_width = width - (gap * 11)
 
         current_x = x
@@ -171,10 +201,10 @@ class DashboardRenderer:
                 )
                 draw.rectangle(
                     [
-                        current_x + fill_w - 1,
-                        y - 3,
-                        current_x + fill_w + 1,
-                        y + height + 3,
+                        current_x + fill_w - 1 * s,
+                        y - 3 * s,
+                        current_x + fill_w + 1 * s,
+                        y + height + 3 * s,
                     ],
                     fill=c["white"],
                 )
@@ -182,7 +212,7 @@ class DashboardRenderer:
                 draw.rectangle(rect, fill=c["bar_bg"])
 
             draw.text(
-                (current_x + seg_w / 2, y + height + 22),
+                (current_x + seg_w / 2, y + height + 22 * s),
                 month_labels[i],
                 fill=c["dark"],
                 font=self.fonts["tiny"],
@@ -192,15 +222,16 @@ class DashboardRenderer:
 
     def draw_calendar(self, draw, x, y, date_obj):
         c = self.colors
-        opt_text_y = self.STYLE["layout"]["text_optical_offset_y"]
-        opt_circle_y = self.STYLE["layout"]["calendar_highlight_offset_y"]
-        cell_size = 110
+        s = self.s
+        opt_text_y = self.STYLE["layout"]["text_optical_offset_y"] * s
+        opt_circle_y = self.STYLE["layout"]["calendar_highlight_offset_y"] * s
+        cell_size = 110 * s
 
         cal = calendar.Calendar(firstweekday=6)
         matrix = cal.monthdayscalendar(date_obj.year, date_obj.month)
 
         draw.text(
-            (x, y - 80),
+            (x, y - 80 * s),
             date_obj.strftime("%B"),
             fill=c["white"],
             font=self.fonts["cal_head"],
@@ -222,7 +253,7 @@ class DashboardRenderer:
                 cy = grid_y + (r * cell_size) + (cell_size / 2)
 
                 if day == date_obj.day:
-                    rad = 42
+                    rad = 42 * s
                     cy_circle = cy + opt_circle_y
                     self._draw_glow(draw, cx, cy_circle, rad, c["accent"])
                     draw.ellipse(
@@ -258,8 +289,9 @@ class DashboardRenderer:
 
     def draw_year_grid(self, draw, right_x, center_y, date_obj):
         c = self.colors
-        spacing = 38
-        dot_r = 12
+        s = self.s
+        spacing = 38 * s
+        dot_r = 12 * s
 
         grid_w = 53 * spacing
         grid_h = 7 * spacing
@@ -268,7 +300,7 @@ class DashboardRenderer:
         start_y = center_y - (grid_h / 2)
 
         draw.text(
-            (start_x, start_y - 120),
+            (start_x, start_y - 120 * s),
             f"{date_obj.year} OVERVIEW",
             fill=c["white"],
             font=self.fonts["sub"],
@@ -308,28 +340,87 @@ class DashboardRenderer:
             iter_date += datetime.timedelta(days=1)
 
         for m, mx in month_label_pos.items():
-            draw.text((mx, start_y - 50), m, fill=c["dark"], font=self.fonts["tiny"])
+            draw.text(
+                (mx, start_y - 50 * s), m, fill=c["dark"], font=self.fonts["tiny"]
+            )
 
         days = ["S", "", "T", "", "T", "", "S"]
         for i, d in enumerate(days):
             draw.text(
-                (start_x - 35, start_y + (i * spacing)),
+                (start_x - 35 * s, start_y + (i * spacing)),
                 d,
                 fill=c["done"],
                 font=self.fonts["tiny"],
                 anchor="mm",
             )
 
-    def render(self) -> str:
-        """Generates the dashboard wallpaper."""
+    def _day_ring_geometry(self):
+        s = self.s
+        W, H = self.size
+        margin = self.STYLE["layout"]["margin"] * s
+        radius = 110 * s
+        return W - margin - radius, H - margin - radius - 60 * s, radius, 8 * s
+
+    def intraday_box(self):
+        """Pixel box (x0, y0, x1, y1) covering everything the day ring draws."""
+        cx, cy, radius, width = self._day_ring_geometry()
+        reach = radius + width
+        boxes = [(cx - reach, cy - reach, cx + reach, cy + reach)]
+        for text, font, y in (
+            ("100%", self.fonts["sub"], cy),
+            ("TODAY", self.fonts["tiny"], cy + radius + 45 * self.s),
+        ):
+            x0, y0, x1, y1 = font.getbbox(text, anchor="mm")
+            boxes.append((cx + x0, y + y0, cx + x1, y + y1))
+
+        W, H = self.size
+        pad = 4 * self.s + 2
+        return (
+            max(int(min(b[0] for b in boxes) - pad), 0),
+            max(int(min(b[1] for b in boxes) - pad), 0),
+            min(int(max(b[2] for b in boxes) + pad), W),
+            min(int(max(b[3] for b in boxes) + pad), H),
+        )
+
+    def draw_day_progress(self, draw, now):
+        c = self.colors
+        s = self.s
+        cx, cy, radius, width = self._day_ring_geometry()
+        pct = day_fraction(now)
+        box = [cx - radius, cy - radius, cx + radius, cy + radius]
+
+        draw.arc(box, start=0, end=360, fill=c["bar_bg"], width=int(width))
+        draw.arc(
+            box, start=-90, end=-90 + pct * 360, fill=c["accent"], width=int(width)
+        )
+        self._draw_centered(
+            draw, cx, cy, f"{int(pct * 100)}%", self.fonts["sub"], c["white"]
+        )
+        self._draw_centered(
+            draw, cx, cy + radius + 45 * s, "TODAY", self.fonts["tiny"], c["grey"]
+        )
+
+    def repaint_intraday(self, img, now):
+        """Draws the day ring for `now` onto a finished frame."""
+        self.now = now
+        self.draw_day_progress(self._new_draw(img), now)
+
+    def render_image(self) -> Image.Image:
+        """Draws the dashboard and returns it without touching disk."""
         self._load_fonts()
 
-        W, H = self.STYLE["resolution"]
-        img = Image.new("RGB", (W, H), self.colors["bg"])
-        draw = ImageDraw.Draw(img)
+        W, H = self.size
+        s = self.s
+        # The palette fits in 8 bits unless curves are supersampled
+        indexed = self.config.render.palette
+        if indexed and self.config.render.quality != QUALITY_STANDARD:
+            print("Palette mode needs standard quality, rendering in RGB.")
+            indexed = False
+        img = buffers.new_image("P" if indexed else "RGB", (W, H), self.colors["bg"])
+        draw = self._new_draw(img)
 
-        now = datetime.date.today()
-        margin = self.STYLE["layout"]["margin"]
+        now = self.today
+        margin = self.STYLE["layout"]["margin"] * s
 
         # 1. Date Header
         draw.text(
@@ -339,25 +430,42 @@ class DashboardRenderer:
             font=self.fonts["hero"],
         )
         draw.text(
-            (margin, margin + 210),
+            (margin, margin + 210 * s),
             now.strftime("%B %d, %Y"),
             fill=self.colors["white"],
             font=self.fonts["date"],
         )
 
         # 2. Progress Bar
-        self.draw_year_progress(draw, margin, margin + 450, 900, now)
+        self.draw_year_progress(draw, margin, margin + 450 * s, 900 * s, now)
 
         # 3. Calendar
-        cal_height = 9 * 110
+        cal_height = 9 * 110 * s
         self.draw_calendar(draw, margin, H - cal_height, now)
 
         # 4. Life Stats (Right)
-        self.draw_life_dashboard(draw, W - margin, margin)
+        self.draw_life_dashboard(draw, W - margin, margin, now)
 
         # 5. Year Grid (Right Center)
-        self.draw_year_grid(draw, W - 250, H / 2, now)
+        self.draw_year_grid(draw, W - 250 * s, H / 2, now)
+
+        # 6. Day Ring (Bottom Right), last so intraday ticks can repaint it alone
+        if self.config.render.intraday:
+            self.draw_day_progress(draw, self.now)
+
+        return img
+
+    def render(self) -> str:
+        """Generates the dashboard wallpaper."""
+        params = {}
+        low_power, reason = budget.low_power_mode(self.config.render)
+        if low_power:
+            self.config = budget.low_power_config(self.config, palette=True)
+            params = {"compress_level": 1}
+            print(f"Render plan: standard quality, palette, fast encoder ({reason})")
+        img = self.render_image()
 
         out_path = os.path.join(os.getcwd(), "life_wallpaper.png")
-        img.save(out_path)
+        save_image(img, out_path, threads=self.config.render.png_threads, **params)
+        buffers.release(img)
         return out_path
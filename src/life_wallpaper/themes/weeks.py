@@ -0,0 +1,311 @@
+import os
+import datetime
+from typing import TYPE_CHECKING, Optional, Tuple
+import numpy as np
+from PIL import Image, ImageDraw
+
+from .. import budget, buffers, glyphs
+from ..raster import rasterize_cells
+from ..utils import birthday_in, load_font_family, save_image
+
+if TYPE_CHECKING:
+    from ..config import AppConfig
+
+WEEKS_PER_YEAR = 52
+
+# Cell state codes, indices into the palette handed to the rasterizer
+STATE_FUTURE = 0
+STATE_LIVED = 1
+STATE_CURRENT = 2
+
+
+class LifeInWeeksRenderer:
+    """
+    Renderer for the 'Life in Weeks' theme: one cell for every week of a life.
+    Columns are years of age, rows are weeks within that year.
+    """
+
+    STYLE = {
+        "resolution": (3840, 2160),  # 4K
+        "colors": {
+            "bg": (0, 0, 0),
+            "white": (255, 255, 255),
+            "grey": (140, 140, 140),
+            "dark": (50, 50, 50),
+            "accent": (46, 213, 115),  # Spring Green
+            "lived": (70, 70, 70),
+            "future": (24, 24, 24),
+        },
+        "layout": {
+            "margin": 180,
+            "grid_top": 520,
+            "label_gutter": 90,
+            "cell_fill": 0.72,  # Cell diameter relative to spacing
+            "cell_shape": "circle",  # "circle" or "square"
+        },
+    }
+
+    def __init__(
+        self,
+        config: "AppConfig",
+        today: Optional[datetime.date] = None,
+        size: Optional[Tuple[int, int]] = None,
+        now: Optional[datetime.datetime] = None,
+    ):
+        self.config = config
+        self.now = now or datetime.datetime.now()
+        self.today = today or self.now.date()
+        self.size = size or self.STYLE["resolution"]
+        # Layout constants are in 4K pixels; scale them to the requested height
+        self.s = self.size[1] / self.STYLE["resolution"][1]
+        self.colors = self.STYLE["colors"]
+        self.fonts = {}  # Will be loaded in render
+
+    def _px(self, value):
+        """Scales a 4K font size to the output resolution."""
+        return max(int(value * self.s), 1)
+
+    def _load_fonts(self):
+        F_BOLD = [
+            "arialbd.ttf",
+            "calibrib.ttf",
+            "/Library/Fonts/Arial Bold.ttf",
+            "DejaVuSans-Bold.ttf",
+            "FreeSansBold.ttf",
+        ]
+
+        F_REGULAR = [
+            "arial.ttf",
+            "segoeui.ttf",
+            "calibri.ttf",
+            "/Library/Fonts/Arial.ttf",
+            "/System/Library/Fonts/SFNS.ttf",
+            "DejaVuSans.ttf",
+            "FreeSans.ttf",
+            "LiberationSans-Regular.ttf",
+        ]
+
+        self.fonts = {
+            "hero": load_font_family(F_BOLD, self._px(140)),
+            "sub": load_font_family(F_REGULAR, self._px(46)),
+            "small": load_font_family(F_REGULAR, self._px(26)),
+            "tiny": load_font_family(F_REGULAR, self._px(22)),
+        }
+
+    def life_position(self, date_obj):
+        """Returns (age in whole years, week within that year) for date_obj."""
+        dob = self.config.profile.dob
+        age = date_obj.year - dob.year
+        if date_obj < birthday_in(dob, date_obj.year):
+            age -= 1
+        age = max(age, 0)
+        since_birthday = (date_obj - birthday_in(dob, dob.year + age)).days
+        week = min(max(since_birthday, 0) // 7, WEEKS_PER_YEAR - 1)
+        return age, week
+
+    def cell_states(self, date_obj):
+        """State code for every (year, week) cell, shaped (years, 52)."""
+        years = self.config.profile.life_expectancy
+        age, week = self.life_position(date_obj)
+        linear = np.arange(years * WEEKS_PER_YEAR).reshape(years, WEEKS_PER_YEAR)
+        current = age * WEEKS_PER_YEAR + week
+
+        states = np.full(linear.shape, STATE_FUTURE, dtype=np.intp)
+        states[linear < current] = STATE_LIVED
+        states[linear == current] = STATE_CURRENT
+        return states
+
+    def _stats_lines(self, x, y, date_obj):
+        """(position, text, font, fill) of the header lines that change weekly."""
+        c = self.colors
+        s = self.s
+        years = self.config.profile.life_expectancy
+        total = years * WEEKS_PER_YEAR
+        age, week = self.life_position(date_obj)
+        lived = min(age * WEEKS_PER_YEAR + week, total)
+        return [
+            (
+                (x, y + 170 * s),
+                f"{lived:,} WEEKS LIVED  •  {total - lived:,} TO GO",
+                self.fonts["sub"],
+                c["white"],
+            ),
+            (
+                (x, y + 240 * s),
+                f"AGE {age}  •  WEEK {week + 1} OF {WEEKS_PER_YEAR}",
+                self.fonts["small"],
+                c["grey"],
+            ),
+        ]
+
+    def draw_header(self, draw, x, y, date_obj):
+        glyphs.draw_text(
+            draw,
+            (x, y),
+            self.config.profile.name.title(),
+            self.fonts["hero"],
+            self.colors["accent"],
+        )
+        for xy, text, font, fill in self._stats_lines(x, y, date_obj):
+            draw.text(xy, text, fill=fill, font=font)
+
+    def _grid_geometry(self, size):
+        """(start x, start y, cell spacing, cell radius) of the week grid."""
+        layout = self.STYLE["layout"]
+        W, H = size
+        s = self.s
+        years = self.config.profile.life_expectancy
+
+        margin = layout["margin"] * s
+        gutter = layout["label_gutter"] * s
+        top = layout["grid_top"] * s
+        avail_w = W - 2 * margin - gutter
+        avail_h = H - top - margin
+        spacing = min(avail_w / years, avail_h / WEEKS_PER_YEAR)
+        radius = spacing * layout["cell_fill"] / 2
+
+        grid_w = years * spacing
+        start_x = margin + gutter + (avail_w - grid_w) / 2
+        return start_x, top, spacing, radius
+
+    def _cells(self, size, date_obj):
+        """Centers, radii and state codes of every cell, flattened."""
+        start_x, start_y, spacing, radius = self._grid_geometry(size)
+        years = self.config.profile.life_expectancy
+        col, row = np.meshgrid(
+            np.arange(years), np.arange(WEEKS_PER_YEAR), indexing="ij"
+        )
+        centers = np.stack(
+            [
+                start_x + (col + 0.5) * spacing,
+                start_y + (row + 0.5) * spacing,
+            ],
+            axis=-1,
+        ).reshape(-1, 2)
+        states = self.cell_states(date_obj).reshape(-1)
+        radii = np.where(states == STATE_CURRENT, radius * 1.25, radius)
+        return centers, radii, states
+
+    def draw_week_grid(self, img, draw, date_obj):
+        c = self.colors
+        s = self.s
+        layout = self.STYLE["layout"]
+        years = self.config.profile.life_expectancy
+        start_x, start_y, spacing, _ = self._grid_geometry(img.size)
+
+        centers, radii, states = self._cells(img.size, date_obj)
+        palette = [c["future"], c["lived"], c["accent"]]
+        rasterize_cells(
+            img, centers, radii, states, palette, shape=layout["cell_shape"]
+        )
+
+        # Decade labels along the top, quarter markers down the side
+        for age in range(0, years, 10):
+            draw.text(
+                (start_x + (age + 0.5) * spacing, start_y - 30 * s),
+                str(age),
+                fill=c["dark"],
+                font=self.fonts["tiny"],
+                anchor="ms",
+            )
+        for week in (0, 13, 26, 39):
+            draw.text(
+                (start_x - 30 * s, start_y + (week + 0.5) * spacing),
+                f"W{week + 1}",
+                fill=c["dark"],
+                font=self.fonts["tiny"],
+                anchor="rm",
+            )
+
+    def _repaint_cells(self, img, changed, date_obj):
+        """Redraws the cells around `changed` on a fresh tile; returns its box."""
+        c = self.colors
+        centers, radii, states = self._cells(img.size, date_obj)
+        # Same sprite size as a full pass, so the pixels come out identical
+        reach = float(radii.max()) + 1.0
+        W, H = img.size
+        x0 = max(int(np.floor(centers[changed, 0].min() - reach)), 0)
+        y0 = max(int(np.floor(centers[changed, 1].min() - reach)), 0)
+        x1 = min(int(np.ceil(centers[changed, 0].max() + reach)) + 1, W)
+        y1 = min(int(np.ceil(centers[changed, 1].max() + reach)) + 1, H)
+
+        # Every cell reaching into the tile is stamped again, in the same order
+        k = int(np.ceil(reach * 2)) + 1
+        ox = np.floor(centers[:, 0] - reach)
+        oy = np.floor(centers[:, 1] - reach)
+        near = (ox < x1) & (ox + k > x0) & (oy < y1) & (oy + k > y0)
+        tile = Image.new("RGB", (x1 - x0, y1 - y0), c["bg"])
+        rasterize_cells(
+            tile,
+            centers[near] - (x0, y0),
+            radii[near],
+            states[near],
+            [c["future"], c["lived"], c["accent"]],
+            shape=self.STYLE["layout"]["cell_shape"],
+            reach=reach,
+        )
+        img.paste(tile, (x0, y0))
+        return x0, y0, x1, y1
+
+    def repaint_date(self, img, date_obj):
+        """
+        Moves a frame rendered for self.today on to `date_obj`, repainting
+        only the header lines and the cells that changed. Returns the boxes
+        (x0, y0, x1, y1) it repainted.
+        """
+        draw = ImageDraw.Draw(img)
+        margin = self.STYLE["layout"]["margin"] * self.s
+        old = self._stats_lines(margin, margin, self.today)
+        new = self._stats_lines(margin, margin, date_obj)
+        boxes = []
+        if old != new:
+            ink = [
+                draw.textbbox(xy, text, font=font) for xy, text, font, _ in old + new
+            ]
+            box = (
+                int(min(b[0] for b in ink)) - 1,
+                int(min(b[1] for b in ink)) - 1,
+                int(max(b[2] for b in ink)) + 1,
+                int(max(b[3] for b in ink)) + 1,
+            )
+            draw.rectangle(
+                (box[0], box[1], box[2] - 1, box[3] - 1), fill=self.colors["bg"]
+            )
+            for xy, text, font, fill in new:
+                draw.text(xy, text, fill=fill, font=font)
+            boxes.append(box)
+
+        changed = np.flatnonzero(
+            self.cell_states(self.today).reshape(-1)
+            != self.cell_states(date_obj).reshape(-1)
+        )
+        if changed.size:
+            boxes.append(self._repaint_cells(img, changed, date_obj))
+        self.today = date_obj
+        return boxes
+
+    def render_image(self) -> Image.Image:
+        """Draws the life-in-weeks grid and returns it without touching disk."""
+        self._load_fonts()
+
+        img = buffers.new_image("RGB", self.size, self.colors["bg"])
+        draw = ImageDraw.Draw(img)
+
+        margin = self.STYLE["layout"]["margin"] * self.s
+        self.draw_header(draw, margin, margin, self.today)
+        self.draw_week_grid(img, draw, self.today)
+        return img
+
+    def render(self) -> str:
+        """Generates the life-in-weeks wallpaper."""
+        # The grid has nothing cheaper to draw; low power saves on encoding
+        low_power, reason = budget.low_power_mode(self.config.render)
+        params = {"compress_level": 1} if low_power else {}
+        if low_power:
+            print(f"Render plan: fast encoder ({reason})")
+        img = self.render_image()
+
+        out_path = os.path.join(os.getcwd(), "life_wallpaper.png")
+        save_image(img, out_path, threads=self.config.render.png_threads, **params)
+        buffers.release(img)
+        return out_path
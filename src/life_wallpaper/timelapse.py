@@ -0,0 +1,299 @@
+"""Export an animation of the wallpaper evolving over a range of dates."""
+
+import os
+import time
+from datetime import date, datetime, timedelta
+
+from PIL import Image, ImageChops
+
+from . import buffers
+from .utils import parse_size, positive_float
+
+DEFAULT_SIZE = (1920, 1080)
+DEFAULT_FPS = 24
+FORMATS = {".gif": "gif", ".png": "apng", ".apng": "apng", ".webp": "webp"}
+# Box of a frame identical to the one before it
+UNCHANGED = (0, 0, 0, 0)
+# Pillow versions whose Image internals _FrameStream sets (im, _mode, _size)
+STREAMING_PILLOW = ((10, 1), (13, 0))
+
+
+def parse_step(text):
+    """'1d', '2w' or a plain number of days -> timedelta."""
+    text = text.strip().lower()
+    unit = {"d": "days", "w": "weeks"}.get(text[-1:], None)
+    try:
+        count = int(text[:-1] if unit else text)
+    except ValueError:
+        raise ValueError(f"Invalid step '{text}', expected e.g. 1d or 2w") from None
+    if count <= 0:
+        raise ValueError(f"Invalid step '{text}', it must be positive")
+    return timedelta(**{unit or "days": count})
+
+
+def timelapse_days(start, end, step):
+    """Dates from `start` to `end` inclusive, `step` apart."""
+    count = (end - start) // step + 1 if end >= start else 0
+    return [start + i * step for i in range(count)]
+
+
+def _union(boxes):
+    boxes = [b for b in boxes if b[2] > b[0] and b[3] > b[1]]
+    if not boxes:
+        return UNCHANGED
+    return (
+        min(b[0] for b in boxes),
+        min(b[1] for b in boxes),
+        max(b[2] for b in boxes),
+        max(b[3] for b in boxes),
+    )
+
+
+def _frame_config(config):
+    """Copy that shows the same mantra and quote on every frame."""
+    from .api import pin_collections
+
+    config = pin_collections(config)
+    config.render.intraday = False
+    return config
+
+
+def iter_frames(config, days, size=None, theme=None):
+    """
+    Yields (day, frame, box) for every day, `box` being the region that
+    changed since the previous frame (None for the first, UNCHANGED when
+    nothing did).
+
+    Themes that provide repaint_date() (weeks) are rendered once and then
+    moved on day by day, repainting only what changed; the frame is the same
+    image every time, so it is only valid until the next one is requested.
+    Other themes are rendered afresh for every day and diffed.
+    """
+    from . import budget
+    from .themes import DEFAULT_THEME, THEMES
+
+    theme = theme if theme in THEMES else config.theme
+    theme = theme if theme in THEMES else DEFAULT_THEME
+    renderer_cls = THEMES[theme]
+    config = _frame_config(config)
+    # Grain is random noise; it would make every frame differ everywhere
+    options = {"plan": budget.Plan(cached_vignette=True, skip_grain=True)}
+    options = options if theme == "og" else {}
+
+    def render(day):
+        now = datetime.combine(day, datetime.min.time())
+        renderer = renderer_cls(config, today=day, size=size, now=now, **options)
+        img = renderer.render_image()
+        return renderer, img.convert("RGB") if img.mode != "RGB" else img
+
+    days = iter(days)
+    first = next(days, None)
+    if first is None:
+        return
+    renderer, frame = render(first)
+    yield first, frame, None
+
+    incremental = hasattr(renderer, "repaint_date")
+    for day in days:
+        if incremental:
+            box = _union(renderer.repaint_date(frame, day))
+        else:
+            previous = frame
+            renderer, frame = render(day)
+            box = ImageChops.difference(previous, frame).getbbox() or UNCHANGED
+            buffers.release(previous)
+        yield day, frame, box
+
+
+def _region(img, box):
+    """Crop box to store for a frame: everything, or at least one pixel."""
+    if box is None:
+        return (0, 0) + img.size
+    if box[2] <= box[0] or box[3] <= box[1]:
+        return (0, 0, 1, 1)  # Nothing changed; a pixel keeps the frame's timing
+    return box
+
+
+class GifWriter:
+    """
+    Streams a GIF one frame at a time. The first frame fixes a 256-colour
+    palette; later frames only store their changed box, mapped onto it.
+    """
+
+    def __init__(self, fp, delay_ms, loop=0):
+        self.fp = fp
+        self.delay_ms = delay_ms
+        self.loop = loop
+        self._palette = None
+
+    def add(self, img, box=None):
+        from PIL import GifImagePlugin
+
+        region = _region(img, box)
+        if self._palette is None:
+            frame = img.convert("RGB").quantize(256, dither=Image.Dither.NONE)
+            header, _ = GifImagePlugin.getheader(
+                frame,
+                info={"loop": self.loop, "duration": self.delay_ms, "optimize": False},
+            )
+            self.fp.writelines(header)
+            self._palette = frame
+        else:
+            frame = (
+                img.crop(region)
+                .convert("RGB")
+                .quantize(palette=self._palette, dither=Image.Dither.NONE)
+            )
+        self.fp.writelines(
+            GifImagePlugin.getdata(frame, offset=region[:2], duration=self.delay_ms)
+        )
+
+    def close(self):
+        self.fp.write(b";")
+
+
+def _can_stream(version=None):
+    """Whether _FrameStream works with this Pillow (see STREAMING_PILLOW)."""
+    from PIL import __version__
+
+    parts = (version or __version__).split(".")[:2]
+    try:
+        release = tuple(int(part) for part in parts)
+    except ValueError:
+        return False
+    return STREAMING_PILLOW[0] <= release < STREAMING_PILLOW[1]
+
+
+class _FrameStream(Image.Image):
+    """
+    A frame iterator posing as one multi-frame image, so Pillow's animated
+    WebP writer pulls (and libwebp encodes) each frame as soon as it is
+    drawn instead of receiving a list of every frame up front. It sets
+    Image internals, so it is only used where _can_stream() vouches for it.
+    """
+
+    def __init__(self, frames, count):
+        super().__init__()
+        self._frames = iter(frames)
+        self.n_frames = count
+        self._index = -1
+        self.seek(0)
+
+    def seek(self, frame):
+        # Pillow seeks back to the start when it is done; frames only go forward
+        while self._index < frame:
+            img = next(self._frames)
+            self.im = img.im
+            self._mode = img.mode
+            self._size = img.size
+            self._index += 1
+
+    def tell(self):
+        return max(self._index, 0)
+
+
+def export_timelapse(
+    config, path, days, size=None, theme=None, fps=DEFAULT_FPS, loop=0
+):
+    """
+    Renders one frame per day of `days` and streams them into the animation
+    at `path` (.gif, .png/.apng or .webp). Returns the number of frames.
+    """
+    from . import png
+
+    format = FORMATS.get(os.path.splitext(path)[1].lower())
+    if format is None:
+        raise ValueError(
+            f"Unknown animation format for {path}; use .gif, .png or .webp"
+        )
+    days = list(days)
+    if not days:
+        raise ValueError("The date range is empty")
+    if not fps > 0:
+        raise ValueError(f"Invalid frame rate {fps}, it must be positive")
+    delay_ms = 1000 / fps
+    frames = iter_frames(config, days, size=size, theme=theme)
+
+    root, ext = os.path.splitext(path)
+    tmp = f"{root}.{os.getpid()}.tmp{ext}"
+    try:
+        with open(tmp, "wb") as f:
+            if format == "webp":
+                options = {
+                    "save_all": True,
+                    "duration": round(delay_ms),
+                    "loop": loop,
+                    "lossless": True,
+                    "method": 0,
+                }
+                images = (frame for _, frame, _ in frames)
+                if _can_stream():
+                    _FrameStream(images, len(days)).save(f, "WEBP", **options)
+                else:
+                    # Public API: every frame is copied and held until the end
+                    first, *rest = (img.copy() for img in images)
+                    first.save(f, "WEBP", append_images=rest, **options)
+            else:
+                if format == "gif":
+                    writer = GifWriter(f, delay_ms, loop)
+                else:
+                    writer = png.ApngWriter(f, len(days), delay_ms, loop)
+                for _, frame, box in frames:
+                    writer.add(frame, _region(frame, box))
+                writer.close()
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return len(days)
+
+
+def add_arguments(parser):
+    parser.add_argument("output", help="Animation file: .gif, .png (APNG) or .webp")
+    parser.add_argument("--config", help="Path to life_config.json")
+    parser.add_argument("--theme", help="Theme to use (defaults to config)")
+    parser.add_argument(
+        "--start",
+        type=date.fromisoformat,
+        help="First date (default: January 1st of this year)",
+    )
+    parser.add_argument(
+        "--end",
+        type=date.fromisoformat,
+        help="Last date (default: December 31st of this year)",
+    )
+    parser.add_argument(
+        "--step",
+        type=parse_step,
+        default="1d",
+        help="Days between frames, e.g. 1d or 1w",
+    )
+    parser.add_argument(
+        "--size",
+        type=parse_size,
+        default=DEFAULT_SIZE,
+        help="Output resolution (default: 1920x1080)",
+    )
+    parser.add_argument("--fps", type=positive_float, default=DEFAULT_FPS)
+
+
+def run(args):
+    from .config_snapshot import load_config
+
+    config = load_config(args.config)
+    today = date.today()
+    start = args.start or date(today.year, 1, 1)
+    end = args.end or date(today.year, 12, 31)
+    days = timelapse_days(start, end, args.step)
+
+    began = time.perf_counter()
+    count = export_timelapse(
+        config, args.output, days, size=args.size, theme=args.theme, fps=args.fps
+    )
+    elapsed = time.perf_counter() - began
+    print(
+        f"Wrote {count} frames ({start} to {days[-1]}) to {args.output} "
+        f"in {elapsed:.1f}s ({count / elapsed:.1f} frames/s)"
+    )
+    return 0
@@ -1,12 +1,104 @@
+from datetime import date, datetime
 from PIL import ImageFont
 import os
+import sys
 
 
 def load_font_family(font_list: list[str], size_px: int) -> ImageFont.FreeTypeFont:
     """Attempts to load a font from the provided list, respecting preference order."""
+    from .fonts import font_index
+
+    # Only installed fonts are tried, so misses never hit the file system
+    index = font_index()
     for name in font_list:
+        found = index.find(name)
+        if found is None:
+            continue
+        path, face = found
         try:
-            return ImageFont.truetype(name, size_px)
+            return ImageFont.truetype(path, size_px, index=face)
         except Exception:
             continue
     return ImageFont.load_default()
+
+
+def parse_size(text: str) -> tuple[int, int]:
+    """Parses a 'WIDTHxHEIGHT' string such as '3840x2160'."""
+    try:
+        w, h = (int(part) for part in text.lower().split("x"))
+    except ValueError:
+        raise ValueError(f"Invalid size '{text}', expected WIDTHxHEIGHT") from None
+    if w <= 0 or h <= 0:
+        raise ValueError(f"Invalid size '{text}', dimensions must be positive")
+    return w, h
+
+
+def positive_int(text: str) -> int:
+    """Parses a whole number of at least 1 (argparse type)."""
+    value = int(text)
+    if value < 1:
+        raise ValueError(f"{text} is not a positive number")
+    return value
+
+
+def positive_float(text: str) -> float:
+    """Parses a number greater than 0 (argparse type)."""
+    value = float(text)
+    if not value > 0:
+        raise ValueError(f"{text} is not a positive number")
+    return value
+
+
+def birthday_in(dob: date, year: int) -> date:
+    """Birthday in the given year, moving Feb 29 to Feb 28 in common years."""
+    try:
+        return dob.replace(year=year)
+    except ValueError:
+        return date(year, 2, 28)
+
+
+def day_fraction(now: datetime) -> float:
+    """Fraction of the day elapsed at `now`, from 0.0 at midnight towards 1.0."""
+    midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    return (now - midnight).total_seconds() / 86400
+
+
+def cache_dir() -> str:
+    """
+    Per-user directory for data derived from the system (font indexes etc.).
+    LIFE_WALLPAPER_CACHE overrides the platform default. Not created here.
+    """
+    override = os.environ.get("LIFE_WALLPAPER_CACHE")
+    if override:
+        return override
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Caches")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "life_wallpaper")
+
+
+def save_image(img, path: str, threads: int = 0, **params) -> str:
+    """
+    Saves an image atomically: it is written next to `path` under a temporary
+    name and renamed over it, so readers never see a half-written file.
+    PNGs go through the parallel writer in png.py when `threads` > 1.
+    """
+    from . import png
+
+    root, ext = os.path.splitext(path)
+    tmp = f"{root}.{os.getpid()}.tmp{ext}"
+    try:
+        if threads > 1 and ext.lower() == ".png" and img.mode in png.MODES:
+            level = params.get("compress_level", png.DEFAULT_LEVEL)
+            png.save_png(img, tmp, compress_level=level, threads=threads)
+        else:
+            img.save(tmp, **params)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return path
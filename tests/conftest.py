@@ -0,0 +1,10 @@
+import pytest
+
+
+@pytest.fixture(autouse=True, scope="session")
+def _isolated_cache(tmp_path_factory):
+    """Keeps font indexes built during tests out of the real user cache."""
+    mp = pytest.MonkeyPatch()
+    mp.setenv("LIFE_WALLPAPER_CACHE", str(tmp_path_factory.mktemp("cache")))
+    yield
+    mp.undo()
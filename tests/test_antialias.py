@@ -0,0 +1,33 @@
+from PIL import Image, ImageDraw
+from life_wallpaper.antialias import SupersampledDraw, new_draw
+
+
+def test_supersampled_ellipse_blends_edges_only():
+    img = Image.new("RGB", (60, 60), (0, 0, 0))
+    draw = SupersampledDraw(img)
+    draw.ellipse((10, 10, 40, 40), fill=(200, 200, 200))
+    assert img.getpixel((25, 25)) == (200, 200, 200)
+    assert img.getpixel((55, 55)) == (0, 0, 0)
+    values = {img.getpixel((x, 12))[0] for x in range(5, 25)}
+    assert any(0 < v < 200 for v in values)
+
+
+def test_supersampling_leaves_surroundings_untouched():
+    img = Image.new("RGB", (40, 40), (0, 0, 0))
+    plain = ImageDraw.Draw(img)
+    plain.rectangle((0, 0, 39, 39), fill=(10, 20, 30))
+    plain.point((21, 21), fill=(250, 0, 0))
+    before = img.copy()
+
+    SupersampledDraw(img).arc((5, 5, 15, 15), 0, 90, fill=(255, 255, 255), width=2)
+    # Pixels inside the supersampled tile but away from the arc survive exactly
+    assert img.getpixel((21, 21)) == before.getpixel((21, 21))
+    assert (
+        img.crop((20, 20, 40, 40)).tobytes() == before.crop((20, 20, 40, 40)).tobytes()
+    )
+
+
+def test_new_draw_respects_quality():
+    img = Image.new("RGB", (10, 10))
+    assert isinstance(new_draw(img, quality="high"), SupersampledDraw)
+    assert isinstance(new_draw(img, quality="standard"), ImageDraw.ImageDraw)
@@ -0,0 +1,79 @@
+import asyncio
+import io
+from datetime import date
+from PIL import Image
+from life_wallpaper.api import (
+    FINAL,
+    PREVIEW,
+    aiter_progressive,
+    iter_progressive,
+    render_image,
+    render_progressive,
+)
+from life_wallpaper.config import AppConfig
+
+
+def _config(theme="original"):
+    return AppConfig(
+        theme=theme,
+        profile={"name": "Test", "dob": "2000-01-01", "life_expectancy": 80},
+        collections={"mantras": ["Mantra"], "footer_quotes": ["Quote"]},
+    )
+
+
+def test_render_image_in_memory(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    for theme in ("original", "og", "weeks"):
+        img = render_image(_config(theme), on=date(2024, 3, 1), size=(960, 540))
+        assert isinstance(img, Image.Image)
+        assert img.size == (960, 540)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_render_image_is_pinned_to_date():
+    config = _config()
+    first = render_image(config, on=date(2024, 3, 1), size=(640, 360))
+    again = render_image(config, on=date(2024, 3, 1), size=(640, 360))
+    other = render_image(config, on=date(2024, 9, 1), size=(640, 360))
+    assert first.tobytes() == again.tobytes()
+    assert first.tobytes() != other.tobytes()
+
+
+def test_render_image_encodes_bytes_and_overrides_theme():
+    data = render_image(
+        _config(), on=date(2024, 3, 1), size=(320, 180), theme="weeks", format="PNG"
+    )
+    assert data.startswith(b"\x89PNG")
+    assert Image.open(io.BytesIO(data)).size == (320, 180)
+
+
+def test_progressive_preview_then_final():
+    on = date(2024, 3, 1)
+    for theme in ("original", "og", "weeks"):
+        stages = list(iter_progressive(_config(theme), on=on, size=(640, 360)))
+        assert [stage for stage, _ in stages] == [PREVIEW, FINAL]
+        assert stages[0][1].size == (160, 90)
+        assert stages[1][1].size == (640, 360)
+    # Same frame as a one-pass render
+    progressive = dict(iter_progressive(_config(), on=on, size=(640, 360)))
+    final = render_image(_config(), on=on, size=(640, 360))
+    assert progressive[FINAL].tobytes() == final.tobytes()
+
+    seen = []
+    data = render_progressive(
+        _config("weeks"),
+        lambda *r: seen.append(r),
+        on=on,
+        size=(320, 180),
+        format="PNG",
+    )
+    assert [stage for stage, _ in seen] == [PREVIEW, FINAL] and seen[1][1] == data
+    assert Image.open(io.BytesIO(seen[0][1])).size == (80, 45)
+
+
+def test_progressive_async_iterator():
+    async def collect():
+        stages = aiter_progressive(_config("og"), size=(320, 180), format="PNG")
+        return [(stage, data[:4]) async for stage, data in stages]
+
+    assert asyncio.run(collect()) == [(PREVIEW, b"\x89PNG"), (FINAL, b"\x89PNG")]
@@ -0,0 +1,152 @@
+import json
+import tracemalloc
+
+from datetime import date
+
+from PIL import Image
+
+from life_wallpaper import batch
+from life_wallpaper.batch import iter_configs, read_records, run_batch
+from life_wallpaper.journal import Journal
+
+
+def _jsonl(path, records):
+    with open(path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(record if isinstance(record, str) else json.dumps(record))
+            f.write("\n")
+    return str(path)
+
+
+def test_batch_renders_valid_records_and_rejects_the_rest(tmp_path):
+    source = _jsonl(
+        tmp_path / "users.jsonl",
+        [
+            {"id": "ada", "theme": "og", "profile": {"name": "Ada"}, "collections": {}},
+            {"id": "bad", "profile": {"dob": "not a date"}, "collections": {}},
+            "{broken",
+            {"profile": {"name": "Lin"}, "collections": {}, "theme": "weeks"},
+        ],
+    )
+    rejects = tmp_path / "rejects.jsonl"
+    counts = run_batch(
+        source, str(tmp_path / "out"), rejects_path=str(rejects), size=(320, 180)
+    )
+    assert counts == {"read": 4, "rendered": 2, "rejected": 2, "failed": 0}
+    assert sorted(p.name for p in (tmp_path / "out").iterdir()) == ["4.png", "ada.png"]
+    with Image.open(tmp_path / "out" / "ada.png") as img:
+        assert img.size == (320, 180)
+
+    lines = [json.loads(line) for line in rejects.read_text().splitlines()]
+    assert [entry["line"] for entry in lines] == [2, 3]
+    assert "dob" in lines[0]["error"] and lines[0]["record"]["id"] == "bad"
+
+
+def test_csv_columns_are_dotted_config_paths(tmp_path):
+    source = tmp_path / "users.csv"
+    source.write_text(
+        "id,profile.name,profile.dob,collections.mantras,render.quality\n"
+        "u1,Ada,1990-05-01,ONE|TWO,high\n"
+        "u2,Lin,,,\n",
+        encoding="utf-8",
+    )
+    configs = dict(iter_configs(read_records(str(source))))
+    assert configs["u1"].collections.mantras == ["ONE", "TWO"]
+    assert configs["u1"].render.quality == "high"
+    assert str(configs["u2"].profile.dob) == "2000-01-01"
+
+
+def test_validation_memory_stays_flat(tmp_path):
+    record = {"profile": {"name": "User"}, "collections": {"mantras": ["X"] * 20}}
+
+    def peak(count):
+        source = _jsonl(tmp_path / f"{count}.jsonl", [record] * count)
+        tracemalloc.start()
+        counts = run_batch(source, str(tmp_path), validate_only=True)
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        assert counts["valid"] == count
+        return peak_bytes
+
+    peak(50)  # Warm up imports and pydantic's caches
+    small, large = peak(200), peak(4000)
+    # Only the output names are kept (batch._NameSet), never the configs,
+    # which take over 2 KB each
+    assert large - small < 128 * (4000 - 200)
+
+
+def test_journal_resumes_and_retries_only_failures(tmp_path, monkeypatch):
+    source = _jsonl(
+        tmp_path / "users.jsonl",
+        [
+            {"id": name, "profile": {"name": name}, "collections": {}}
+            for name in ("ada", "lin", "kim")
+        ],
+    )
+    journal = tmp_path / "batch.journal"
+    options = {"size": (160, 90), "on": date(2030, 1, 1), "journal": str(journal)}
+    render = batch._render_record
+
+    def flaky(job, size, on):
+        if job[0] == "lin":
+            raise RuntimeError("worker killed")
+        return render(job, size, on)
+
+    monkeypatch.setattr(batch, "_render_record", flaky)
+    counts = run_batch(source, str(tmp_path / "out"), **options)
+    assert counts == {
+        "read": 3,
+        "rendered": 2,
+        "rejected": 0,
+        "failed": 1,
+        "skipped": 0,
+    }
+    # A crash can leave half a line behind
+    with open(journal, "a", encoding="utf-8") as f:
+        f.write('["kim","2030-')
+
+    monkeypatch.setattr(batch, "_render_record", render)
+    counts = run_batch(source, str(tmp_path / "out"), **options)
+    assert counts["rendered"] == 1 and counts["skipped"] == 2
+    assert counts["failed"] == 0
+    assert (tmp_path / "out" / "lin.png").exists()
+
+    # Only the run's date is loaded
+    entries = Journal(str(journal), date(2030, 1, 1))
+    assert len(entries) == 3
+    entries.close()
+    assert len(Journal(str(journal), date(2030, 1, 2))) == 0
+
+    # Other outputs, a lost file or another date are new work
+    jpeg = run_batch(source, str(tmp_path / "jpeg"), format="JPEG", **options)
+    assert jpeg["rendered"] == 3 and len(list((tmp_path / "jpeg").iterdir())) == 3
+    (tmp_path / "out" / "ada.png").unlink()
+    counts = run_batch(source, str(tmp_path / "out"), **options)
+    assert counts["rendered"] == 1 and counts["skipped"] == 2
+    options["on"] = date(2030, 1, 2)
+    assert run_batch(source, str(tmp_path / "out"), **options)["rendered"] == 3
+
+
+def test_records_writing_the_same_file_are_rejected(tmp_path):
+    source = _jsonl(
+        tmp_path / "users.jsonl",
+        [
+            {"id": "ada/1", "profile": {"name": "Ada"}, "collections": {}},
+            {"id": "ada:1", "profile": {"name": "Eve"}, "collections": {}},
+            {"id": "ADA_1", "profile": {"name": "Lin"}, "collections": {}},
+            {"id": "ada/1", "profile": {"name": "Ada"}, "collections": {}},
+            {"id": "ada_2", "profile": {"name": "Bob"}, "collections": {}},
+        ],
+    )
+    rejects = tmp_path / "rejects.jsonl"
+    counts = run_batch(
+        source, str(tmp_path / "out"), rejects_path=str(rejects), size=(320, 180)
+    )
+    assert counts == {"read": 5, "rendered": 2, "rejected": 3, "failed": 0}
+    assert sorted(p.name for p in (tmp_path / "out").iterdir()) == [
+        "ada_1.png",
+        "ada_2.png",
+    ]
+    lines = [json.loads(line) for line in rejects.read_text().splitlines()]
+    assert [entry["line"] for entry in lines] == [2, 3, 4]
+    assert all("line 1" in entry["error"] for entry in lines)
@@ -0,0 +1,122 @@
+import json
+import os
+from unittest.mock import MagicMock
+
+import pytest
+
+from life_wallpaper import budget, power
+from life_wallpaper.config import AppConfig
+from life_wallpaper.renderer import WallpaperRenderer
+
+
+@pytest.fixture
+def battery():
+    power.set_detector(lambda: power.BATTERY)
+    yield
+    power.set_detector(None)
+
+
+def _costs(tmp_path, **measured):
+    costs = budget.StageCosts("og", path=str(tmp_path / "costs.json"))
+    costs.record(measured)
+    return costs
+
+
+def test_budget_picks_least_degraded_plan_that_fits(tmp_path):
+    costs = _costs(tmp_path)
+    size = (3840, 2160)
+    full = costs.estimate(budget.Plan(), size)
+
+    plan, ms = budget.choose_plan(costs, size, budget_ms=full + 1)
+    assert plan.describe() == "full quality"
+
+    cached = budget.Plan(cached_vignette=True)
+    plan, ms = budget.choose_plan(costs, size, budget_ms=costs.estimate(cached, size))
+    assert plan.describe() == "cached vignette"
+
+    # Nothing fits: settle for the cheapest plan
+    plan, ms = budget.choose_plan(costs, size, budget_ms=1)
+    assert ms == min(costs.estimate(p, size) for p in budget.candidates())
+
+
+def test_measured_costs_decide_on_downscaling(tmp_path):
+    size = (3840, 2160)
+    # A slow upscale makes half resolution the more expensive choice
+    costs = _costs(tmp_path, upscale=100.0)
+    plan, _ = budget.choose_plan(costs, size, low_power=True)
+    assert plan.scale == 1.0 and plan.skip_grain
+
+    costs = _costs(tmp_path, upscale=1.0)
+    plan, _ = budget.choose_plan(costs, size, low_power=True)
+    assert plan.scale == 0.5
+
+
+def test_stage_costs_moving_average(tmp_path):
+    costs = _costs(tmp_path, grain=10.0)
+    costs.record({"grain": 20.0})
+    assert costs.get("grain") == pytest.approx(10.0 + budget.SMOOTHING * 10.0)
+    costs.save()
+    reloaded = budget.StageCosts("og", path=costs.path)
+    assert reloaded.get("grain") == costs.get("grain")
+    assert reloaded.get("encode") == budget.DEFAULT_COSTS["encode"]
+
+
+def test_detect_linux_power_supply(tmp_path):
+    def supply(name, **files):
+        os.makedirs(tmp_path / name)
+        for key, value in files.items():
+            (tmp_path / name / key).write_text(value + "\n")
+
+    supply("BAT0", type="Battery", status="Discharging")
+    supply("AC", type="Mains", online="0")
+    assert power.detect_linux(str(tmp_path)) == power.BATTERY
+
+    (tmp_path / "AC" / "online").write_text("1\n")
+    assert power.detect_linux(str(tmp_path)) == power.AC
+    assert power.detect_linux(str(tmp_path / "missing")) == power.UNKNOWN
+
+
+def test_render_on_battery_uses_low_power_plan(tmp_path, battery, capsys):
+    original_getcwd = os.getcwd
+    try:
+        os.getcwd = MagicMock(return_value=str(tmp_path))
+        config = AppConfig(
+            profile={"name": "Test", "dob": "2000-01-01", "life_expectancy": 80},
+            collections={"mantras": ["Mantra"], "footer_quotes": ["Quote"]},
+            render={"low_power": "auto"},
+        )
+        renderer = WallpaperRenderer(config, size=(640, 360))
+        assert os.path.exists(renderer.render())
+    finally:
+        os.getcwd = original_getcwd
+
+    assert "Render plan:" in capsys.readouterr().out
+    assert renderer.plan.skip_grain and renderer.plan.fast_encode
+    with open(budget.StageCosts("og").path) as f:
+        assert "encode_fast" in json.load(f)["og"]
+
+
+def test_low_power_env_forces_cheapest_plan(tmp_path, monkeypatch):
+    monkeypatch.setenv(budget.LOW_POWER_ENV, "1")
+    settings = AppConfig(
+        profile={"name": "Test"}, collections={}, render={"low_power": False}
+    ).render
+    costs = _costs(tmp_path)
+    plan = budget.plan_render(settings, costs, (3840, 2160))
+    assert plan.skip_grain
+
+
+def test_render_without_budget_or_low_power_skips_planning(tmp_path, monkeypatch):
+    probes = []
+    power.set_detector(lambda: probes.append(1) or power.BATTERY)
+    monkeypatch.setattr(budget, "COSTS_FILE", "unplanned_costs.json")
+    monkeypatch.chdir(tmp_path)
+    try:
+        config = AppConfig(profile={"name": "Test"}, collections={})
+        renderer = WallpaperRenderer(config, size=(320, 180))
+        assert os.path.exists(renderer.render())
+    finally:
+        power.set_detector(None)
+    assert not probes
+    assert renderer.plan.describe() == "full quality"
+    assert not os.path.exists(budget.StageCosts("og").path)
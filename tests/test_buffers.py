@@ -0,0 +1,53 @@
+from datetime import date
+
+import pytest
+
+from life_wallpaper import buffers
+from life_wallpaper.api import render_image
+from life_wallpaper.config import AppConfig
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(buffers, "_pool", None)
+    monkeypatch.setenv(buffers.POOL_ENV, "1")
+    return buffers.get_pool()
+
+
+def test_pool_reuses_and_resets_buffers(pool):
+    img = buffers.new_image("RGB", (40, 30), (1, 2, 3))
+    img.paste((200, 0, 0), (0, 0, 10, 10))
+    buffers.release(img)
+    again = buffers.new_image("RGB", (40, 30), (9, 9, 9))
+    assert again is img
+    assert again.getcolors() == [(1200, (9, 9, 9))]
+
+    # Other sizes and palette images get buffers of their own
+    assert buffers.new_image("RGB", (30, 40)) is not img
+    buffers.release(buffers.new_image("P", (40, 30)))
+    stats = buffers.pool_stats()
+    assert (stats["hits"], stats["misses"], stats["idle"]) == (1, 2, 0)
+
+
+def test_pool_is_off_by_default(monkeypatch):
+    monkeypatch.setattr(buffers, "_pool", None)
+    monkeypatch.delenv(buffers.POOL_ENV, raising=False)
+    img = buffers.new_image("RGB", (4, 4))
+    buffers.release(img)
+    assert buffers.new_image("RGB", (4, 4)) is not img
+    assert buffers.pool_stats() is None
+
+
+@pytest.mark.parametrize("theme", ["original", "weeks"])
+def test_pooled_renders_match_fresh_ones(pool, theme):
+    def config(name):
+        return AppConfig(profile={"name": name}, collections={}, theme=theme)
+
+    fresh = render_image(config("Lin"), on=date(2030, 5, 1), size=(320, 180))
+    fresh = fresh.copy()
+    for name in ("Ada", "Lin"):
+        img = render_image(config(name), on=date(2030, 5, 1), size=(320, 180))
+        if name == "Ada":
+            buffers.release(img)
+    assert img.tobytes() == fresh.tobytes()
+    assert buffers.pool_stats()["hits"] >= 1
@@ -0,0 +1,85 @@
+import json
+import os
+import subprocess
+import sys
+import pytest
+from pydantic import BaseModel, ValidationError
+from life_wallpaper import config_snapshot
+from life_wallpaper.config import AppConfig
+
+DATA = {
+    "profile": {"name": "Alex", "dob": "1990-05-17", "life_expectancy": 90},
+    "collections": {"mantras": ["BE HERE NOW"], "footer_quotes": []},
+    "render": {"quality": "high"},
+    "theme": "og",
+}
+
+
+def _write(path, data):
+    path.write_text(json.dumps(data))
+    return str(path)
+
+
+def test_snapshot_hit_skips_validation(tmp_path, monkeypatch):
+    monkeypatch.setenv("LIFE_WALLPAPER_CACHE", str(tmp_path / "cache"))
+    path = _write(tmp_path / "life_config.json", DATA)
+
+    first = config_snapshot.load_config(path)
+    assert isinstance(first, AppConfig)
+    second = config_snapshot.load_config(path)
+    assert isinstance(second, config_snapshot.LiteConfig)
+
+    assert second.profile.dob == first.profile.dob
+    assert second.profile.name == "Alex"
+    assert second.collections.mantras == ["BE HERE NOW"]
+    assert second.render.quality == "high"
+    assert second.render.intraday is False
+    assert second.theme == "og"
+    assert second.model_copy(deep=True).collections.mantras is not (
+        second.collections.mantras
+    )
+
+
+def test_changed_file_is_validated_again(tmp_path, monkeypatch):
+    monkeypatch.setenv("LIFE_WALLPAPER_CACHE", str(tmp_path / "cache"))
+    path = _write(tmp_path / "life_config.json", DATA)
+    config_snapshot.load_config(path)
+
+    broken = dict(DATA, profile={"name": "Alex", "dob": "not a date"})
+    _write(tmp_path / "life_config.json", broken)
+    os.utime(path, ns=(0, 0))
+    with pytest.raises(ValidationError):
+        config_snapshot.load_config(path)
+
+
+def test_lite_config_mirrors_app_config():
+    """LiteConfig must expose every AppConfig field; bump SCHEMA_VERSION too."""
+    full = AppConfig(**DATA)
+    lite = config_snapshot.LiteConfig(full.model_dump(mode="json"))
+    for name, value in full:
+        if isinstance(value, BaseModel):
+            for field in type(value).model_fields:
+                assert getattr(getattr(lite, name), field) == getattr(value, field)
+        else:
+            assert getattr(lite, name) == value
+
+
+def test_warm_start_does_not_import_pydantic(tmp_path):
+    path = _write(tmp_path / "life_config.json", DATA)
+    script = (
+        "import sys\n"
+        "from life_wallpaper.main import get_renderer, load_config\n"
+        f"config = load_config({path!r})\n"
+        "get_renderer(config, size=(320, 180)).render_image()\n"
+        "print('pydantic' in sys.modules)\n"
+    )
+    env = dict(os.environ, LIFE_WALLPAPER_CACHE=str(tmp_path / "cache"))
+    env["PYTHONPATH"] = os.pathsep.join(sys.path)
+    runs = [
+        subprocess.run(
+            [sys.executable, "-c", script], env=env, capture_output=True, text=True
+        )
+        for _ in range(2)
+    ]
+    assert runs[0].stdout.strip().endswith("True")
+    assert runs[1].stdout.strip().endswith("False"), runs[1].stderr
@@ -0,0 +1,106 @@
+import json
+import os
+import random
+import threading
+from datetime import date, timedelta
+
+from life_wallpaper.config import AppConfig
+from life_wallpaper.config_snapshot import load_config
+from life_wallpaper.corpus import Corpus, Rotation, choose_text
+from life_wallpaper.renderer import WallpaperRenderer
+
+
+def test_corpus_index_is_reused_until_the_file_changes(tmp_path, monkeypatch):
+    path = tmp_path / "quotes.txt"
+    path.write_bytes("\ufeffFirst\n\n  \nSecond\r\nThird".encode("utf-8"))
+    corpus = Corpus(str(path))
+    assert len(corpus) == 3
+    assert [corpus.line(i) for i in range(3)] == ["First", "Second", "Third"]
+
+    # A warm start reads single offsets from the index, never the whole file
+    def no_rebuild(self):
+        raise AssertionError("index rebuilt")
+
+    monkeypatch.setattr(Corpus, "rebuild", no_rebuild)
+    warm = Corpus(str(path))
+    assert warm.line(1) == "Second" and warm.choice(random.Random(0))
+    monkeypatch.undo()
+
+    path.write_text("Only\n", encoding="utf-8")
+    os.utime(path, ns=(0, 10**18))
+    assert [Corpus(str(path)).line(0)] == ["Only"]
+
+
+def test_rotation_does_not_repeat_within_the_window(tmp_path):
+    path = tmp_path / "mantras.txt"
+    path.write_text("\n".join(f"line {i}" for i in range(5)), encoding="utf-8")
+    corpus = Corpus(str(path))
+    rotation = Rotation(str(tmp_path / "rotation.json"))
+    start = date(2030, 1, 1)
+    picks = [rotation.pick(corpus, start + timedelta(d), 5) for d in range(10)]
+    for i in range(len(picks) - 4):
+        assert len(set(picks[i : i + 5])) == 5
+    # The same day keeps its line, also for a new process
+    again = Rotation(str(tmp_path / "rotation.json"))
+    assert again.pick(corpus, start + timedelta(9), 5) == picks[-1]
+
+
+def test_renderer_draws_text_from_corpus_files(tmp_path):
+    (tmp_path / "mantras.txt").write_text("FROM THE FILE\n", encoding="utf-8")
+    config = AppConfig(
+        theme="og",
+        profile={"name": "Test", "dob": "2000-01-01"},
+        collections={
+            "mantras": ["INLINE"],
+            "footer_quotes": ["QUOTE"],
+            "mantras_file": str(tmp_path / "mantras.txt"),
+            "footer_quotes_file": str(tmp_path / "missing.txt"),
+            "no_repeat_days": 7,
+        },
+    )
+    renderer = WallpaperRenderer(config, today=date(2030, 1, 1), size=(320, 180))
+    assert renderer.mantra == "FROM THE FILE"
+    # An unreadable file falls back to the inline entries
+    assert renderer.val_quote_bottom == "QUOTE"
+    assert choose_text(config.collections, "footer_quotes") == "QUOTE"
+
+
+def test_rotation_keeps_concurrent_picks(tmp_path):
+    path = tmp_path / "quotes.txt"
+    path.write_text("\n".join(f"q{i}" for i in range(100)), encoding="utf-8")
+    corpus = Corpus(str(path))
+    state = str(tmp_path / "rotation.json")
+    days = [date(2030, 1, 1) + timedelta(d) for d in range(8)]
+    threads = [
+        threading.Thread(target=Rotation(state).pick, args=(corpus, day, 30))
+        for day in days
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    with open(state, encoding="utf-8") as f:
+        (entry,) = json.load(f).values()
+    assert sorted(entry["picks"]) == [day.isoformat() for day in days]
+
+
+def test_relative_corpus_paths_follow_the_config_file(tmp_path, monkeypatch):
+    folder = tmp_path / "profile"
+    folder.mkdir()
+    (folder / "mantras.txt").write_text("NEXT TO THE CONFIG\n", encoding="utf-8")
+    config_file = folder / "life_config.json"
+    config_file.write_text(
+        json.dumps(
+            {
+                "profile": {"name": "Test"},
+                "collections": {"mantras_file": "mantras.txt"},
+            }
+        ),
+        encoding="utf-8",
+    )
+    monkeypatch.chdir(tmp_path)
+    # The full load and the snapshot that the second load comes from
+    for _ in range(2):
+        config = load_config(str(config_file))
+        assert config.collections.mantras_file == str(folder / "mantras.txt")
+        assert choose_text(config.collections, "mantras") == "NEXT TO THE CONFIG"
@@ -2,6 +2,7 @@ from life_wallpaper.config import AppConfig
 from life_wallpaper.main import get_renderer
 from life_wallpaper.themes.dashboard import DashboardRenderer
 from life_wallpaper.renderer import WallpaperRenderer
+from life_wallpaper.themes.weeks import LifeInWeeksRenderer
 
 
 def test_factory_returns_dashboard_by_default():
@@ -42,3 +43,13 @@ def test_factory_fallback():
     )
     renderer = get_renderer(config)
     assert isinstance(renderer, DashboardRenderer)
+
+
+def test_factory_returns_weeks_theme():
+    config = AppConfig(
+        theme="weeks",
+        profile={"name": "Test", "dob": "2000-01-01", "life_expectancy": 80},
+        collections={"mantras": [], "footer_quotes": []},
+    )
+    renderer = get_renderer(config)
+    assert isinstance(renderer, LifeInWeeksRenderer)
@@ -0,0 +1,43 @@
+import os
+from PIL import ImageFont
+from life_wallpaper import fonts
+
+
+def _install(directory, name="Aileron-Regular.ttf"):
+    directory.mkdir(parents=True, exist_ok=True)
+    path = directory / name
+    path.write_bytes(ImageFont.load_default(20).font_bytes)
+    return str(path)
+
+
+def test_font_index_finds_by_file_and_family(tmp_path):
+    path = _install(tmp_path / "fonts" / "aileron")
+    index = fonts.FontIndex([str(tmp_path / "fonts")], str(tmp_path / "index.json"))
+
+    assert index.find("aileron-regular.ttf") == (path, 0)
+    assert index.find("/Library/Fonts/Aileron-Regular.ttf") == (path, 0)
+    assert index.find("Aileron Regular") == (path, 0)
+    assert index.find("aileron.ttf") == (path, 0)
+    assert index.find("arialbd.ttf") is None
+
+
+def test_font_index_cached_until_directory_changes(tmp_path, monkeypatch):
+    font_dir = tmp_path / "fonts"
+    _install(font_dir)
+    index_path = str(tmp_path / "index.json")
+    fonts.FontIndex([str(font_dir)], index_path)
+
+    def fail(self):
+        raise AssertionError("font directories scanned again")
+
+    monkeypatch.setattr(fonts.FontIndex, "rescan", fail)
+    assert fonts.FontIndex([str(font_dir)], index_path).find("aileron-regular.ttf")
+
+    # Installing a font changes the directory mtime and forces a rescan
+    monkeypatch.undo()
+    new_path = _install(font_dir, "Extra.otf")
+    os.utime(font_dir, ns=(0, 0))
+    assert fonts.FontIndex([str(font_dir)], index_path).find("extra.otf") == (
+        new_path,
+        0,
+    )
@@ -0,0 +1,72 @@
+import os
+from PIL import Image, ImageDraw, ImageFont
+from life_wallpaper import glyphs
+
+
+def _font_file(tmp_path):
+    """Writes Pillow's bundled font to disk so it can be indexed by path."""
+    path = tmp_path / "aileron.ttf"
+    path.write_bytes(ImageFont.load_default(20).font_bytes)
+    return str(path)
+
+
+def test_read_cmap_ranges(tmp_path):
+    path = _font_file(tmp_path)
+    ranges = glyphs.read_cmap(path)
+    assert ranges[0] == [32, 126]
+    assert ranges == glyphs.read_cmap(open(path, "rb").read())
+    covered = {cp for start, end in ranges for cp in range(start, end + 1)}
+    assert ord("A") in covered
+    assert ord("中") not in covered
+
+
+def test_font_chain_splits_runs(tmp_path):
+    path = _font_file(tmp_path)
+    primary = ImageFont.truetype(path, 20)
+    # Pretend the primary font only has ASCII and the fallback has the rest
+    chain = glyphs.FontChain(primary, [[32, 126]], [(path, 0, [[0, 0x10FFFF]])])
+
+    runs = chain.runs("Zoë!")
+    assert [part for part, _ in runs] == ["Zo", "ë", "!"]
+    assert runs[0][1] is primary and runs[1][1] is not primary
+    # A combining accent stays in the run of the letter it decorates
+    assert [part for part, _ in chain.runs("Zoé")] == ["Zoé"]
+    assert chain.runs("plain")[0] == ("plain", primary)
+
+
+def test_coverage_index_persists(tmp_path, monkeypatch):
+    path = _font_file(tmp_path)
+    index_path = str(tmp_path / "cache" / "index.json")
+    index = glyphs.CoverageIndex(index_path)
+    ranges = index.ranges(path)
+    index.save()
+    assert os.path.exists(index_path)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("cmap parsed again")
+
+    monkeypatch.setattr(glyphs, "read_cmap", fail)
+    assert glyphs.CoverageIndex(index_path).ranges(path) == ranges
+
+    # A changed file is parsed again
+    os.utime(path, ns=(0, 0))
+    monkeypatch.undo()
+    reloaded = glyphs.CoverageIndex(index_path)
+    assert reloaded.ranges(path) == ranges
+    assert reloaded._dirty
+
+
+def test_draw_text_matches_pillow_for_covered_text():
+    font = ImageFont.load_default(30)
+    expected = Image.new("RGB", (200, 60))
+    ImageDraw.Draw(expected).text(
+        (100, 30), "Life", font=font, fill="white", anchor="mm"
+    )
+
+    img = Image.new("RGB", (200, 60))
+    draw = ImageDraw.Draw(img)
+    glyphs.draw_text(draw, (100, 30), "Life", font, "white", anchor="mm")
+    assert img.tobytes() == expected.tobytes()
+    assert glyphs.text_bbox(draw, (100, 30), "Life", font, anchor="mm") == (
+        draw.textbbox((100, 30), "Life", font=font, anchor="mm")
+    )
@@ -0,0 +1,120 @@
+import importlib.util
+import json
+import os
+import sys
+import time
+
+import pytest
+
+SCRIPT = os.path.join(os.path.dirname(__file__), "..", "scripts", "guard_runner.py")
+
+# Stand-in for life_wallpaper.main, run with `python -m fake_render` in the
+# project root. Every attempt logs its pid and the pid of a child it starts,
+# so the test can check that the whole tree was killed.
+FAKE_RENDER = """
+import os, subprocess, sys, time
+child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])
+with open("pids.txt", "a") as f:
+    f.write(f"{os.getpid()} {child.pid}\\n")
+mode = os.environ.get("LIFE_WALLPAPER_LOW_POWER") and "ok" or open("mode").read()
+if mode == "hang":
+    time.sleep(60)
+child.kill()
+if mode == "fail":
+    sys.exit(3)
+with open("life_wallpaper.png", "w") as f:
+    f.write("fresh")
+"""
+
+
+@pytest.fixture
+def guard(tmp_path, monkeypatch):
+    spec = importlib.util.spec_from_file_location("guard_runner", SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    for name, file in [
+        ("STATE_FILE", "wallpaper_state.json"),
+        ("LOG_FILE", "wallpaper_activity.log"),
+        ("OUTPUT_FILE", "life_wallpaper.png"),
+        ("LAST_GOOD_FILE", "life_wallpaper.last_good.png"),
+    ]:
+        monkeypatch.setattr(module, name, str(tmp_path / file))
+    monkeypatch.setattr(module, "PROJECT_ROOT", str(tmp_path))
+    monkeypatch.setattr(module, "WALLPAPER_MODULE", "fake_render")
+    monkeypatch.delenv(module.LOW_POWER_ENV, raising=False)
+    (tmp_path / "fake_render.py").write_text(FAKE_RENDER)
+    yield module
+    module.logging.getLogger("GuardRunner").handlers = []
+
+
+def _run(guard, tmp_path, monkeypatch, mode, *args):
+    (tmp_path / "mode").write_text(mode)
+    argv = ["guard_runner.py", "--force", "--backoff", "0.1", *args]
+    monkeypatch.setattr(sys, "argv", argv)
+    code = guard.main()
+    with open(guard.STATE_FILE, encoding="utf-8") as f:
+        return code, json.load(f)
+
+
+def _alive(pid):
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().split(") ")[1][0] != "Z"  # Zombies are dead
+    except OSError:
+        return False
+
+
+def _pids(tmp_path):
+    lines = (tmp_path / "pids.txt").read_text().split()
+    return [int(pid) for pid in lines]
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="needs /proc")
+def test_hung_render_is_killed_retried_and_falls_back(guard, tmp_path, monkeypatch):
+    (tmp_path / "life_wallpaper.last_good.png").write_text("good")
+    began = time.monotonic()
+    code, state = _run(
+        guard, tmp_path, monkeypatch, "hang", "--timeout", "1", "--retries", "1"
+    )
+    assert time.monotonic() - began < 15
+    assert code == 0
+    # Both attempts timed out and their process trees are gone
+    pids = _pids(tmp_path)
+    assert len(pids) == 4
+    deadline = time.monotonic() + 5
+    while any(_alive(pid) for pid in pids) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert not any(_alive(pid) for pid in pids)
+
+    assert state["LastOutcome"] == "fallback_cached"
+    assert state["LastAttempts"] == 2
+    assert state["LastError"] == "timed out after 1s"
+    # Re-applying an old wallpaper leaves the day open for the next trigger
+    assert "LastRunDate" not in state
+    assert (tmp_path / "life_wallpaper.png").read_text() == "good"
+
+
+def test_failed_render_without_last_good_renders_in_low_power(
+    guard, tmp_path, monkeypatch
+):
+    code, state = _run(guard, tmp_path, monkeypatch, "fail", "--retries", "2")
+    assert code == 0
+    # Three failed attempts, then the low-power fallback render
+    assert len(_pids(tmp_path)) == 8
+    assert state["LastOutcome"] == "fallback_degraded"
+    assert state["LastAttempts"] == 3
+    assert state["LastError"] == "exited with code 3"
+    assert "LastRunDate" in state
+
+
+def test_successful_render_keeps_last_good_copy(guard, tmp_path, monkeypatch):
+    code, state = _run(guard, tmp_path, monkeypatch, "ok")
+    assert code == 0
+    assert state["LastOutcome"] == "success" and state["LastAttempts"] == 1
+    assert state["LastError"] is None
+    assert (tmp_path / "life_wallpaper.last_good.png").read_text() == "fresh"
+
+    # Already done today: nothing runs without --force
+    monkeypatch.setattr(sys, "argv", ["guard_runner.py"])
+    assert guard.main() == 0
+    assert len(_pids(tmp_path)) == 2
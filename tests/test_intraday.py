@@ -0,0 +1,60 @@
+import io
+from datetime import datetime
+import pytest
+from PIL import Image
+from life_wallpaper.config import AppConfig
+from life_wallpaper.intraday import IntradayUpdater
+from life_wallpaper.main import main
+from life_wallpaper.themes.dashboard import DashboardRenderer
+
+SIZE = (960, 540)
+
+
+def _config(theme="original", intraday=False):
+    return AppConfig(
+        profile={"name": "Test", "dob": "2000-01-01", "life_expectancy": 80},
+        collections={"mantras": [], "footer_quotes": []},
+        render={"intraday": intraday},
+        theme=theme,
+    )
+
+
+def test_intraday_tick_matches_full_render(tmp_path):
+    updater = IntradayUpdater(_config(), size=SIZE, now=datetime(2026, 5, 1, 8, 0))
+    later = datetime(2026, 5, 1, 17, 30)
+    timings = updater.tick(later, str(tmp_path / "frame.bmp"))
+
+    full = DashboardRenderer(_config(intraday=True), size=SIZE, now=later)
+    assert updater.frame.tobytes() == full.render_image().tobytes()
+    assert set(timings) == {"draw", "encode", "write", "total"}
+
+    # The patched BMP decodes to the repainted frame
+    written = Image.open(tmp_path / "frame.bmp")
+    assert written.tobytes() == updater.frame.tobytes()
+    assert Image.open(io.BytesIO(updater.encoded.data)).tobytes() == written.tobytes()
+
+
+def test_intraday_og_repaints_only_its_box():
+    updater = IntradayUpdater(_config("og"), size=SIZE, now=datetime(2026, 5, 1, 8, 0))
+    before = updater.frame.copy()
+    updater.tick(datetime(2026, 5, 1, 20, 0))
+
+    x0, y0, x1, y1 = updater.box
+    assert 0 <= x0 < x1 <= SIZE[0] and 0 <= y0 < y1 <= SIZE[1]
+    outside = Image.new("RGB", SIZE)
+    outside.paste(before)
+    outside.paste(updater.frame.crop(updater.box), updater.box[:2])
+    assert outside.tobytes() == updater.frame.tobytes()
+    assert (
+        before.crop(updater.box).tobytes() != updater.frame.crop(updater.box).tobytes()
+    )
+
+
+def test_intraday_requires_widget():
+    with pytest.raises(ValueError):
+        IntradayUpdater(_config("weeks"), size=SIZE)
+
+
+def test_intraday_rejects_zero_interval():
+    with pytest.raises(SystemExit):
+        main(["intraday", "--interval", "0"])
@@ -0,0 +1,31 @@
+import pytest
+
+from life_wallpaper.config import AppConfig
+from life_wallpaper.loadgen import generate_configs, run_load, synthetic_profile
+from life_wallpaper.main import main
+
+
+def test_synthetic_profiles_are_reproducible_and_valid():
+    assert synthetic_profile(42) == synthetic_profile(42)
+    configs = list(generate_configs(20, seed=7, themes=["og", "weeks"]))
+    assert len(configs) == 20
+    assert all(isinstance(c, AppConfig) for c in configs)
+    assert {c.theme for c in configs} <= {"og", "weeks"}
+
+
+def test_run_load_reports_throughput_and_workers():
+    report = run_load(4, concurrency=2, size=(320, 180), seed=3)
+    assert report["count"] == 4
+    assert report["throughput"] > 0
+    lat = report["latency"]
+    assert 0 < lat["p50"] <= lat["p99"] <= lat["max"]
+    assert sum(w["renders"] for w in report["workers"].values()) == 4
+    assert sum(report["themes"].values()) == 4
+
+
+@pytest.mark.parametrize("flag", ["--count", "--concurrency"])
+@pytest.mark.parametrize("value", ["0", "-2"])
+def test_loadtest_rejects_non_positive_counts(flag, value, capsys):
+    with pytest.raises(SystemExit):
+        main(["loadtest", flag, value])
+    assert f"invalid positive_int value: '{value}'" in capsys.readouterr().err
@@ -0,0 +1,72 @@
+import os
+import subprocess
+import sys
+import textwrap
+import time
+
+from PIL import Image
+
+from life_wallpaper import main as main_module
+from life_wallpaper.lock import FileLock
+from life_wallpaper.utils import cache_dir, save_image
+
+# Holds the render lock like a running update, then publishes its output
+LEADER = textwrap.dedent("""
+    import os, sys, time
+    from life_wallpaper import main
+    from life_wallpaper.lock import FileLock
+    from life_wallpaper.utils import cache_dir
+
+    with FileLock(os.path.join(cache_dir(), main.RENDER_LOCK)):
+        print("locked", flush=True)
+        time.sleep(float(sys.argv[2]))
+        if sys.argv[1] != "-":
+            main._record_render(sys.argv[1])
+    """)
+
+
+def _leader(output, hold):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    proc = subprocess.Popen(
+        [sys.executable, "-c", LEADER, output, str(hold)],
+        stdout=subprocess.PIPE,
+        text=True,
+        env=env,
+    )
+    assert proc.stdout.readline().strip() == "locked"
+    return proc
+
+
+def test_file_lock_excludes_other_processes():
+    path = os.path.join(cache_dir(), main_module.RENDER_LOCK)
+    leader = _leader("-", 1.0)
+    lock = FileLock(path)
+    assert not lock.acquire(timeout=0.2)
+    leader.wait()
+    assert lock.acquire(timeout=5)
+    lock.release()
+
+
+def test_concurrent_update_reuses_leader_output(tmp_path, monkeypatch, capsys):
+    output = tmp_path / "life_wallpaper.png"
+    save_image(Image.new("RGB", (8, 8)), str(output))
+    assert os.listdir(tmp_path) == ["life_wallpaper.png"]
+
+    def no_render(config, **options):
+        raise AssertionError("the follower must not render")
+
+    monkeypatch.setattr(main_module, "get_renderer", no_render)
+    leader = _leader(str(output), 0.5)
+    assert main_module.main([]) == 0
+    leader.wait()
+    assert f"Reusing the render that just finished: {output}" in capsys.readouterr().out
+
+
+def test_lock_wait_leaves_time_before_the_watchdog_deadline(monkeypatch):
+    monkeypatch.delenv(main_module.DEADLINE_ENV, raising=False)
+    assert main_module.lock_wait() == main_module.LOCK_WAIT
+    deadline = time.time() + 60
+    monkeypatch.setenv(main_module.DEADLINE_ENV, str(deadline))
+    assert 25 < main_module.lock_wait() <= 30
+    monkeypatch.setenv(main_module.DEADLINE_ENV, str(deadline - 120))
+    assert main_module.lock_wait() == 0
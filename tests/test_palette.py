@@ -0,0 +1,48 @@
+from datetime import datetime
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+from life_wallpaper.api import encode_image
+from life_wallpaper.config import AppConfig
+from life_wallpaper.palette import PaletteDraw
+from life_wallpaper.themes.dashboard import DashboardRenderer
+
+
+def _config(palette):
+    return AppConfig(
+        profile={"name": "Test", "dob": "2000-01-01", "life_expectancy": 80},
+        collections={"mantras": [], "footer_quotes": []},
+        render={"palette": palette, "intraday": True},
+    )
+
+
+def test_palette_text_keeps_antialiasing():
+    font = ImageFont.load_default(40)
+    img = Image.new("P", (200, 60), (0, 0, 0))
+    PaletteDraw(img).text((10, 5), "Aa", fill=(46, 213, 115), font=font)
+
+    reference = Image.new("RGB", (200, 60))
+    ImageDraw.Draw(reference).text((10, 5), "Aa", fill=(46, 213, 115), font=font)
+    diff = np.abs(
+        np.asarray(img.convert("RGB"), dtype=int) - np.asarray(reference, dtype=int)
+    )
+    assert len(img.getcolors()) > 3
+    assert diff.max() <= 5
+
+
+def test_dashboard_palette_matches_rgb():
+    now = datetime(2026, 5, 14, 15, 0)
+    rgb = DashboardRenderer(_config(False), size=(960, 540), now=now).render_image()
+    indexed = DashboardRenderer(_config(True), size=(960, 540), now=now)
+    indexed = indexed.render_image()
+
+    assert indexed.mode == "P"
+    diff = np.abs(
+        np.asarray(indexed.convert("RGB"), dtype=int) - np.asarray(rgb, dtype=int)
+    )
+    # Shapes are identical; text edges differ by at most one coverage step
+    assert diff.max() <= 5
+    assert (diff.max(axis=2) > 0).mean() < 0.01
+
+    # Formats without palette support get the expanded image
+    assert encode_image(indexed, "JPEG")[:2] == b"\xff\xd8"
+    assert encode_image(indexed, "PNG")[25] == 3  # PNG colour type 3: indexed
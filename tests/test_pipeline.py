@@ -0,0 +1,66 @@
+import functools
+from datetime import date
+
+import pytest
+
+from life_wallpaper.loadgen import _pipeline_frame, run_pipelined_load
+from life_wallpaper.main import main
+from life_wallpaper.pipeline import run_pipeline
+
+
+def test_pipelined_load_reports_both_stages():
+    report = run_pipelined_load(
+        5, draw_workers=2, encode_workers=1, depth=2, size=(320, 180), seed=3
+    )
+    assert report["count"] == 5 and report["errors"] == 0
+    assert report["stages"]["draw"]["frames"] == 5
+    assert report["stages"]["encode"]["frames"] == 5
+    assert report["stages"]["draw"]["workers"] == 2
+    assert report["stages"]["encode"]["capacity"] > 0
+
+
+def test_pipeline_reports_frames_that_do_not_fit_a_slot():
+    frame = functools.partial(
+        _pipeline_frame, themes=["og"], size=(64, 36), on=date(2024, 1, 1)
+    )
+    outcomes = {}
+    report = run_pipeline(
+        range(2),
+        frame,
+        (32, 18),
+        on_result=lambda job, result, error: outcomes.update({job: error}),
+    )
+    assert report["errors"] == 2
+    assert all("does not fit" in error for error in outcomes.values())
+
+
+@pytest.mark.parametrize(
+    "option, message",
+    [
+        ({"draw_workers": 0}, "draw_workers 0"),
+        ({"encode_workers": 0}, "encode_workers 0"),
+        ({"depth": 0}, "depth 0"),
+    ],
+)
+def test_pipeline_rejects_empty_stages(option, message):
+    frame = functools.partial(
+        _pipeline_frame, themes=["og"], size=(64, 36), on=date(2024, 1, 1)
+    )
+    with pytest.raises(ValueError, match=message):
+        run_pipeline(range(2), frame, (64, 36), **option)
+
+
+@pytest.mark.parametrize(
+    "argv",
+    [
+        ["loadtest", "--pipeline", "--draw-workers", "0"],
+        ["loadtest", "--pipeline", "--encode-workers", "0"],
+        ["loadtest", "--pipeline", "--depth", "0"],
+        ["batch", "users.jsonl", "--pipeline", "--draw-workers", "0"],
+        ["batch", "users.jsonl", "--pipeline", "--encode-workers", "0"],
+    ],
+)
+def test_pipeline_flags_reject_zero(argv, capsys):
+    with pytest.raises(SystemExit):
+        main(argv)
+    assert "invalid positive_int value: '0'" in capsys.readouterr().err
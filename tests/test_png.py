@@ -0,0 +1,56 @@
+import io
+import zlib
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from life_wallpaper import png
+from life_wallpaper.utils import save_image
+
+
+def _frame(mode, size=(300, 200)):
+    rng = np.random.default_rng(1)
+    w, h = size
+    channels = png.MODES[mode][0]
+    # Flat bands with noisy patches, like the themes' output
+    pixels = np.zeros((h, w, channels), np.uint8)
+    pixels[h // 3 :] = 40
+    pixels[:, w // 2 :] = rng.integers(0, 256, (h, w - w // 2, channels))
+    img = Image.fromarray(pixels.squeeze(axis=2) if channels == 1 else pixels, mode)
+    if mode == "P":
+        img.putpalette([(i * 7) % 256 for i in range(768)])
+    return img
+
+
+@pytest.mark.parametrize("mode", sorted(png.MODES))
+@pytest.mark.parametrize("level", [1, 6, 9])
+def test_parallel_png_round_trips(mode, level, monkeypatch):
+    # Small strips so that the frame spans many of them
+    monkeypatch.setattr(png, "STRIP_BYTES", 4096)
+    img = _frame(mode)
+    buf = io.BytesIO()
+    png.save_png(img, buf, compress_level=level, threads=3)
+
+    buf.seek(0)
+    back = Image.open(buf)
+    back.load()
+    assert back.mode == img.mode
+    assert np.array_equal(np.asarray(back), np.asarray(img))
+    if mode == "P":
+        assert back.getpalette() == img.getpalette()
+
+
+def test_adler32_combine_matches_zlib():
+    a, b = b"life" * 5000, b"wallpaper" * 7000
+    combined = png._adler32_combine(zlib.adler32(a), zlib.adler32(b), len(b))
+    assert combined == zlib.adler32(a + b)
+
+
+def test_save_image_uses_parallel_writer(tmp_path):
+    img = _frame("RGB")
+    path = str(tmp_path / "out.png")
+    save_image(img, path, threads=2, compress_level=9)
+    with Image.open(path) as back:
+        assert np.array_equal(np.asarray(back), np.asarray(img))
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["out.png"]
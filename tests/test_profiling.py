@@ -0,0 +1,52 @@
+import pytest
+
+from life_wallpaper.config import AppConfig
+from life_wallpaper.main import main
+from life_wallpaper.profiling import profile_renders
+
+
+def test_profile_renders_writes_reports(tmp_path):
+    config = AppConfig(
+        theme="weeks",
+        profile={"name": "Test", "dob": "2000-01-01", "life_expectancy": 80},
+        collections={"mantras": [], "footer_quotes": []},
+    )
+    result = profile_renders(config, runs=1, size=(480, 270), out_dir=str(tmp_path))
+
+    hotspots = open(result["hotspots"], encoding="utf-8").read()
+    assert "render_image" in hotspots
+    for line in open(result["folded"], encoding="utf-8"):
+        stack, count = line.rsplit(" ", 1)
+        assert ";" in stack and int(count) > 0
+    assert "Peak traced memory" in open(result["allocations"], encoding="utf-8").read()
+
+
+def test_profile_command(tmp_path):
+    out = tmp_path / "report"
+    code = main(
+        [
+            "profile",
+            "--runs",
+            "1",
+            "--size",
+            "320x180",
+            "--theme",
+            "og",
+            "--out",
+            str(out),
+        ]
+    )
+    assert code == 0
+    assert (out / "hotspots.txt").exists()
+    assert (out / "render.pstats").exists()
+
+
+def test_profile_rejects_zero_runs(tmp_path):
+    with pytest.raises(SystemExit):
+        main(["profile", "--runs", "0"])
+    config = AppConfig(
+        profile={"name": "Test", "dob": "2000-01-01", "life_expectancy": 80},
+        collections={"mantras": [], "footer_quotes": []},
+    )
+    with pytest.raises(ValueError, match="Invalid number of runs 0"):
+        profile_renders(config, runs=0, out_dir=str(tmp_path))
@@ -0,0 +1,31 @@
+from PIL import Image
+from life_wallpaper.raster import rasterize_cells
+
+
+def test_rasterize_circle_fills_center_and_leaves_outside():
+    img = Image.new("RGB", (40, 40), (0, 0, 0))
+    rasterize_cells(img, [(20.5, 20.5)], 6, [1], [(0, 0, 0), (200, 100, 50)])
+    assert img.getpixel((20, 20)) == (200, 100, 50)
+    assert img.getpixel((2, 2)) == (0, 0, 0)
+    # Edge pixels are blended rather than hard-switched
+    edge = img.getpixel((26, 20))
+    assert 0 < edge[0] < 200
+
+
+def test_rasterize_uses_state_colors_per_cell():
+    img = Image.new("RGB", (60, 20), (0, 0, 0))
+    palette = [(10, 10, 10), (255, 0, 0), (0, 255, 0)]
+    rasterize_cells(img, [(10, 10), (30, 10), (50, 10)], 5, [0, 1, 2], palette)
+    assert img.getpixel((10, 10)) == (10, 10, 10)
+    assert img.getpixel((30, 10)) == (255, 0, 0)
+    assert img.getpixel((50, 10)) == (0, 255, 0)
+
+
+def test_rasterize_square_and_clipping():
+    img = Image.new("RGB", (20, 20), (0, 0, 0))
+    # Partially off-canvas cells must not raise
+    rasterize_cells(
+        img, [(0, 0), (10, 10)], 4, [1, 1], [(0, 0, 0), (9, 9, 9)], "square"
+    )
+    assert img.getpixel((13, 13)) == (9, 9, 9)
+    assert img.getpixel((0, 0)) == (9, 9, 9)
@@ -36,3 +36,21 @@ def test_render_smoke_test(tmp_path):
 
     finally:
         os.getcwd = original_getcwd
+
+
+def test_render_high_quality_smoke(tmp_path):
+    """High quality mode supersamples curved primitives and still renders."""
+    original_getcwd = os.getcwd
+    try:
+        os.getcwd = MagicMock(return_value=str(tmp_path))
+
+        config = AppConfig(
+            profile={"name": "Test", "dob": "2000-01-01", "life_expectancy": 80},
+            collections={"mantras": ["Mantra"], "footer_quotes": ["Quote"]},
+            render={"quality": "high"},
+        )
+        output = WallpaperRenderer(config).render()
+        assert os.path.exists(output)
+
+    finally:
+        os.getcwd = original_getcwd
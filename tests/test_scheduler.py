@@ -0,0 +1,85 @@
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+from pydantic import ValidationError
+
+from life_wallpaper.config import AppConfig
+from life_wallpaper.scheduler import Scheduler, next_midnight
+
+UTC = timezone.utc
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.current = now
+        self.sleeps = []
+
+    def now(self):
+        return self.current
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.current += timedelta(seconds=seconds)
+
+
+def _config(tz):
+    return AppConfig(profile={"name": tz, "timezone": tz}, collections={})
+
+
+def _scheduler(clock, zones):
+    calls = []
+    scheduler = Scheduler(
+        {tz: _config(tz) for tz in zones},
+        lambda key, config, day: calls.append((clock.now(), key, day)),
+        clock=clock,
+        render_on_start=False,
+    )
+    return scheduler, calls
+
+
+def test_each_profile_renders_at_its_own_midnight():
+    clock = FakeClock(datetime(2026, 3, 1, 12, 0, tzinfo=UTC))
+    scheduler, calls = _scheduler(clock, ["Asia/Tokyo", "America/New_York", "UTC"])
+    scheduler.run(iterations=24 * 60 + 5)
+
+    assert [(key, day) for _, key, day in calls] == [
+        ("Asia/Tokyo", date(2026, 3, 2)),
+        ("UTC", date(2026, 3, 2)),
+        ("America/New_York", date(2026, 3, 2)),
+    ]
+    # Dispatched within one sleep cap of the true local midnight
+    expected = {
+        "Asia/Tokyo": datetime(2026, 3, 1, 15, 0, tzinfo=UTC),
+        "UTC": datetime(2026, 3, 2, 0, 0, tzinfo=UTC),
+        "America/New_York": datetime(2026, 3, 2, 5, 0, tzinfo=UTC),
+    }
+    for when, key, _ in calls:
+        assert timedelta(0) <= when - expected[key] < timedelta(seconds=1)
+
+
+def test_suspend_catches_up_once_per_profile():
+    clock = FakeClock(datetime(2026, 3, 1, 12, 0, tzinfo=UTC))
+    scheduler, calls = _scheduler(clock, ["Asia/Tokyo", "Europe/Berlin"])
+    clock.current += timedelta(days=3, hours=2)  # Machine slept for three days
+    scheduler.run_pending()
+
+    assert sorted((key, day) for _, key, day in calls) == [
+        ("Asia/Tokyo", date(2026, 3, 4)),
+        ("Europe/Berlin", date(2026, 3, 4)),
+    ]
+    assert scheduler.next_due() == datetime(2026, 3, 4, 15, 0, tzinfo=UTC)
+
+
+def test_next_midnight_across_dst_change():
+    berlin = ZoneInfo("Europe/Berlin")
+    # Clocks go forward on 2026-03-29: that midnight is still UTC+1
+    before = datetime(2026, 3, 28, 12, 0, tzinfo=UTC)
+    assert next_midnight(before, berlin) == datetime(2026, 3, 28, 23, 0, tzinfo=UTC)
+    after = datetime(2026, 3, 29, 12, 0, tzinfo=UTC)
+    assert next_midnight(after, berlin) == datetime(2026, 3, 29, 22, 0, tzinfo=UTC)
+
+
+def test_unknown_timezone_is_rejected():
+    with pytest.raises(ValidationError, match="Unknown time zone"):
+        _config("Mars/Olympus_Mons")
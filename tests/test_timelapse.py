@@ -0,0 +1,77 @@
+from datetime import date, timedelta
+
+import pytest
+from PIL import Image
+
+from life_wallpaper.config import AppConfig
+from life_wallpaper import timelapse
+from life_wallpaper.themes.weeks import LifeInWeeksRenderer
+from life_wallpaper.timelapse import (
+    _can_stream,
+    export_timelapse,
+    iter_frames,
+    parse_step,
+    timelapse_days,
+)
+
+
+def _config(theme):
+    return AppConfig(
+        profile={"name": "Ada", "dob": "1990-03-15"},
+        collections={"mantras": ["ONE", "TWO"], "footer_quotes": ["A", "B"]},
+        theme=theme,
+    )
+
+
+def test_timelapse_days():
+    days = timelapse_days(date(2030, 1, 1), date(2030, 1, 29), parse_step("2w"))
+    assert days == [date(2030, 1, 1), date(2030, 1, 15), date(2030, 1, 29)]
+    assert parse_step("3") == timedelta(days=3)
+    with pytest.raises(ValueError):
+        parse_step("0w")
+
+
+def test_apng_frames_store_changed_regions(tmp_path):
+    config = _config("weeks")
+    days = timelapse_days(date(2020, 3, 1), date(2020, 4, 30), timedelta(weeks=1))
+    boxes = [box for _, _, box in iter_frames(config, days, size=(320, 180))]
+    assert boxes[0] is None and all(box[2] < 320 for box in boxes[1:])
+
+    path = tmp_path / "life.png"
+    assert export_timelapse(config, str(path), days, size=(320, 180)) == len(days)
+    full = LifeInWeeksRenderer(config, today=days[-1], size=(320, 180))
+    with Image.open(path) as img:
+        assert img.n_frames == len(days)
+        img.seek(img.n_frames - 1)
+        assert img.convert("RGB").tobytes() == full.render_image().tobytes()
+
+
+@pytest.mark.parametrize("name", ["life.gif", "life.webp"])
+def test_other_themes_are_rendered_and_diffed(tmp_path, name):
+    days = timelapse_days(date(2030, 1, 1), date(2030, 1, 3), timedelta(days=1))
+    path = tmp_path / name
+    export_timelapse(_config("original"), str(path), days, size=(320, 180))
+    with Image.open(path) as img:
+        assert img.size == (320, 180) and img.n_frames == 3
+    assert [p.name for p in tmp_path.iterdir()] == [name]
+
+
+def test_webp_without_frame_streaming_matches(tmp_path, monkeypatch):
+    assert _can_stream("12.3.0") and not _can_stream("10.0.1")
+    assert not _can_stream("13.0.0") and not _can_stream("dev")
+    days = timelapse_days(date(2030, 1, 1), date(2030, 1, 15), timedelta(weeks=1))
+    config = _config("weeks")
+    frames = {}
+    for streaming in (True, False):
+        monkeypatch.setattr(timelapse, "_can_stream", lambda: streaming)
+        path = tmp_path / f"{streaming}.webp"
+        export_timelapse(config, str(path), days, size=(320, 180))
+        with Image.open(path) as img:
+            frames[streaming] = []
+            for i in range(img.n_frames):
+                img.seek(i)
+                frames[streaming].append(img.convert("RGB").tobytes())
+    assert len(frames[True]) == 3 and frames[True] == frames[False]
+
+    with pytest.raises(ValueError, match="frame rate"):
+        export_timelapse(config, str(tmp_path / "x.gif"), days, fps=0)
@@ -0,0 +1,57 @@
+import os
+from datetime import date
+from unittest.mock import MagicMock
+from life_wallpaper.themes.weeks import (
+    LifeInWeeksRenderer,
+    STATE_CURRENT,
+    STATE_LIVED,
+)
+from life_wallpaper.config import AppConfig
+
+
+def _config(expectancy=80):
+    return AppConfig(
+        profile={"name": "Test", "dob": "2000-01-01", "life_expectancy": expectancy},
+        collections={"mantras": [], "footer_quotes": []},
+        theme="weeks",
+    )
+
+
+def test_weeks_cell_states():
+    renderer = LifeInWeeksRenderer(_config())
+    states = renderer.cell_states(date(2010, 1, 15))
+    assert states.shape == (80, 52)
+    assert renderer.life_position(date(2010, 1, 15)) == (10, 2)
+    assert (states == STATE_CURRENT).sum() == 1
+    assert states[10, 2] == STATE_CURRENT
+    assert (states == STATE_LIVED).sum() == 10 * 52 + 2
+
+
+def test_weeks_leap_day_birthday():
+    config = _config()
+    config.profile.dob = date(2000, 2, 29)
+    renderer = LifeInWeeksRenderer(config)
+    assert renderer.life_position(date(2001, 2, 28)) == (1, 0)
+
+
+def test_weeks_render_smoke(tmp_path):
+    """Smoke test for a full century of weeks."""
+    original_getcwd = os.getcwd
+    try:
+        os.getcwd = MagicMock(return_value=str(tmp_path))
+        renderer = LifeInWeeksRenderer(_config(expectancy=100))
+        output = renderer.render()
+        assert os.path.exists(output)
+    finally:
+        os.getcwd = original_getcwd
+
+
+def test_weeks_repaint_date_matches_full_render():
+    config = _config()
+    renderer = LifeInWeeksRenderer(config, today=date(2009, 12, 20), size=(640, 360))
+    img = renderer.render_image()
+    for day in (date(2009, 12, 27), date(2010, 1, 2), date(2013, 6, 1)):
+        boxes = renderer.repaint_date(img, day)
+        assert boxes
+        full = LifeInWeeksRenderer(config, today=day, size=(640, 360)).render_image()
+        assert img.tobytes() == full.tobytes()